@@ -3,3 +3,10 @@ class OrdersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.orders"
     label = "orders"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .profiling import install_db_wrapper
+        from . import signals  # noqa: F401
+
+        connection_created.connect(install_db_wrapper, dispatch_uid="orders_profiling_db_wrapper")
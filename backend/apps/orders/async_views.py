@@ -0,0 +1,185 @@
+"""Versões async-nativas dos endpoints de leitura mais acessados.
+
+Rodam direto no event loop do UvicornWorker, sem o salto para a thread pool
+que toda view DRF síncrona exige. Os demais métodos das mesmas URLs (POST em
+/items/, PATCH em /orders/<id>/ ...) continuam na view DRF original.
+Ligadas em core/urls.py quando ASYNC_READ_VIEWS=True.
+"""
+import asyncio
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import aprefetch_related_objects
+from django.http import HttpResponse
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import catalog_search, order_status, versions, warmup
+from .catalog_cache import acategory_snapshot
+from .http_cache import aconditional_response, etag_matches, set_validators
+from .models import Pedido
+from .presence import parse_presence_request
+from .redis_client import get_async_redis_client
+from .serializers import ItemSerializer, PedidoSerializer
+from .views import (
+    ItemView,
+    PedidoView,
+    categories_view,
+    item_queryset,
+    presence_first_seen,
+    presence_payload,
+    register_presence,
+)
+
+
+_renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+
+def json_response(data, status=200):
+    return HttpResponse(_renderer.render(data), status=status, content_type="application/json")
+
+
+def with_sync_fallback(sync_view, methods=("GET", "HEAD")):
+    """Atende `methods` com a view async decorada e repassa os demais para `sync_view`."""
+    def decorator(async_view):
+        @functools.wraps(async_view)
+        async def view(request, *args, **kwargs):
+            if request.method in methods:
+                return await async_view(request, *args, **kwargs)
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        # Views DRF são csrf_exempt (a checagem é feita pela autenticação do DRF)
+        view.csrf_exempt = True
+        view.sync_view = sync_view
+        view.async_methods = methods
+        return view
+    return decorator
+
+
+def request_data(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+async def paginate(request, queryset, serializer_class):
+    """Equivalente async do LimitOffsetPagination configurado no REST_FRAMEWORK."""
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    drf_request = Request(request)
+    paginator.request = drf_request
+    paginator.limit = paginator.get_limit(drf_request)
+    if paginator.limit is None:
+        objs = [obj async for obj in queryset]
+        return serializer_class(objs, many=True).data
+    paginator.offset = paginator.get_offset(drf_request)
+    paginator.count = await queryset.acount()
+    if paginator.count == 0 or paginator.offset > paginator.count:
+        objs = []
+    else:
+        objs = [obj async for obj in queryset[paginator.offset:paginator.offset + paginator.limit]]
+    return paginator.get_paginated_response(serializer_class(objs, many=True).data).data
+
+
+@with_sync_fallback(ItemView.as_view({"get": "list", "post": "create"}))
+async def items_list(request):
+    async def build():
+        params = request.GET
+        snap = await acategory_snapshot()
+        index = await catalog_search.asearch_index() if catalog_search.tokenize(params.get("q") or "") else None
+        qs = item_queryset(
+            params, only_active=not params.get("all"), category_orders=snap.category_orders, search_index=index
+        )
+        return json_response(await paginate(request, qs, ItemSerializer))
+
+    tokens = await versions.aread(versions.CATALOG, versions.ORDERS)
+    return await aconditional_response(request, tokens, build, request.get_full_path())
+
+
+@with_sync_fallback(categories_view)
+async def categories(request):
+    snap = await acategory_snapshot()
+    if etag_matches(request, snap.etag):
+        return set_validators(HttpResponse(status=304), snap.etag)
+    return set_validators(json_response(snap.categories), snap.etag)
+
+
+@with_sync_fallback(PedidoView.as_view({
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+}))
+async def order_detail(request, pk):
+    async def build():
+        try:
+            pedido = await Pedido.objects.aget(pk=pk)
+        except (Pedido.DoesNotExist, TypeError, ValueError):
+            # mesma mensagem do get_object_or_404 usado pelo DRF
+            return json_response({"detail": f"No {Pedido._meta.object_name} matches the given query."}, status=404)
+        if "itens" not in pedido.resumo:
+            # pedido sem resumo (order_snapshot): o serializer lê as linhas
+            await aprefetch_related_objects([pedido], "itens")
+        return json_response(PedidoSerializer(pedido).data)
+
+    return await aconditional_response(request, await versions.aorder_tokens(pk), build, str(pk))
+
+
+async def order_watch(request, pk):
+    """Long-poll do status do pedido (order_status): responde quando `v` mudar de `?since=`."""
+    if request.method not in ("GET", "HEAD"):
+        return json_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    since = request.GET.get("since", "")
+    try:
+        timeout = min(float(request.GET.get("timeout", settings.ORDER_STATUS_WAIT_S)), settings.ORDER_STATUS_WAIT_S)
+    except ValueError:
+        timeout = settings.ORDER_STATUS_WAIT_S
+    timeout = max(timeout, 0.0)
+    try:
+        state = await order_status.get_hub().wait(pk, since, timeout)
+    except Exception:
+        # sem Redis: lê do banco e segura a resposta para o cliente não girar em loop
+        state = await sync_to_async(order_status.load)(pk)
+        if state is not None and since and order_status.payload(pk, state)["v"] == since:
+            await asyncio.sleep(settings.ORDER_STATUS_FALLBACK_S)
+            state = await sync_to_async(order_status.load)(pk)
+    if state is None:
+        return json_response({"detail": f"No {Pedido._meta.object_name} matches the given query."}, status=404)
+    response = json_response(order_status.payload(pk, state))
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@with_sync_fallback(register_presence, methods=("POST",))
+async def presence(request):
+    data = request_data(request)
+    if data is None:
+        return json_response({"detail": "JSON inválido."}, status=400)
+    parsed = parse_presence_request(data)
+    if parsed is None:
+        return json_response({"detail": "session_id inválido."}, status=400)
+    source, session_id, ttl = parsed
+    key = f"presence:{source}:{session_id}"
+    payload = presence_payload(request, source, ttl)
+
+    try:
+        client = get_async_redis_client()
+        payload["first_seen"] = presence_first_seen(await client.get(key), payload["timestamp"])
+        await client.setex(key, ttl, json.dumps(payload))
+    except Exception as exc:
+        return json_response({"detail": f"Erro ao registrar presença: {exc}"}, status=503)
+
+    return json_response({"ok": True, "expires_in": ttl})
+
+
+async def readiness(request):
+    """Prontidão do worker (warmup): 503 até o aquecimento terminar; /healthz é só liveness."""
+    data = await warmup.areadiness()
+    response = json_response(data, status=200 if data["ready"] else 503)
+    response["Cache-Control"] = "no-store"
+    return response
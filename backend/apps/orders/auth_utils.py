@@ -1,12 +1,18 @@
+import hashlib
+import json
 import secrets
+import time
 from datetime import timedelta
 from django.utils import timezone
 from django.contrib.auth.hashers import check_password, make_password
 from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from .cache_bus import cache
 from .models import DashboardUser, AuthToken
 
 
 TOKEN_TTL_HOURS = 24
+# tokens válidos ficam no cache_bus; logout e mudanças em DashboardUser invalidam
+AUTH_NAMESPACE = "auth"
 
 
 def hash_password(raw: str) -> str:
@@ -24,26 +30,51 @@ def _authenticate_header(request):
     return header.split(" ", 1)[1].strip()
 
 
+def _load_session(token_value):
+    """O mínimo para autorizar uma requisição; sem a chave do token nem o hash da senha."""
+    token = (
+        AuthToken.objects
+        .select_related("user")
+        .filter(key=token_value, is_active=True)
+        .first()
+    )
+    if not token:
+        return None
+    return {
+        "user_id": token.user_id,
+        "routes": list(token.user.allowed_routes or []),
+        "is_active": token.user.is_active,
+        "expires_at": token.expires_at.timestamp(),
+    }
+
+
 def authenticate_dashboard(request):
+    """DashboardUser da requisição (só id, allowed_routes e is_active preenchidos) ou None."""
     if hasattr(request, "_cached_dashboard_user"):
         return request._cached_dashboard_user
     token_value = _authenticate_header(request)
     if not token_value:
         request._cached_dashboard_user = None
         return None
-    now = timezone.now()
-    token = (
-        AuthToken.objects
-        .select_related("user")
-        .filter(key=token_value, is_active=True, expires_at__gt=now)
-        .first()
+
+    # no Redis fica só o dict de _load_session, em JSON, sob o sha256 do token
+    session = cache.get(
+        AUTH_NAMESPACE, hashlib.sha256(token_value.encode()).hexdigest(), lambda: _load_session(token_value), json
     )
-    if not token or not token.user.is_active:
+    if not session or not session["is_active"] or session["expires_at"] <= time.time():
         request._cached_dashboard_user = None
         return None
-    request._cached_dashboard_user = token.user
-    request._cached_dashboard_token = token
-    return token.user
+    user = DashboardUser(id=session["user_id"], allowed_routes=session["routes"], is_active=True)
+    request._cached_dashboard_user = user
+    return user
+
+
+def current_token(request):
+    """AuthToken ativo do cabeçalho Authorization (lido do banco), ou None."""
+    token_value = _authenticate_header(request)
+    if not token_value:
+        return None
+    return AuthToken.objects.filter(key=token_value, is_active=True).first()
 
 
 def require_dashboard_user(request, routes=None):
@@ -74,3 +105,8 @@ def create_token(user: DashboardUser, user_agent: str = "", ip: str = "") -> Aut
 def invalidate_token(token: AuthToken):
     token.is_active = False
     token.save(update_fields=["is_active"])
+    invalidate_auth_cache()
+
+
+def invalidate_auth_cache():
+    cache.invalidate(AUTH_NAMESPACE)
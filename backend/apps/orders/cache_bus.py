@@ -0,0 +1,240 @@
+"""Cache em duas camadas (LRU local + Redis) coerente entre workers e réplicas.
+
+Cada área (namespace: "catalog", "auth", ...) tem uma versão em
+`cache:ver:<ns>` no Redis. Quem escreve chama `invalidate(ns)`: a versão sobe
+(INCR) e sai um aviso no canal pub/sub `cache:invalidate`. Cada processo tem
+uma thread assinando o canal que atualiza a versão local e descarta as
+entradas antigas do LRU, então leituras com o LRU quente não vão ao Redis.
+
+- camada Redis: `cache:<ns>:<versão>:<chave>` (pickle, ou o `serializer` de
+  quem chama; CACHE_REDIS_TTL s); um leitor atrasado que grave dados antigos
+  grava sob a versão velha, que ninguém mais lê;
+- sem a assinatura ativa (Redis caiu, reconectando), a versão é lida do Redis
+  a cada acesso, como antes; sem Redis algum, o LRU vale CACHE_LOCAL_MAX_AGE s;
+- toda entrada local expira em CACHE_LOCAL_MAX_AGE s de qualquer forma, o
+  teto de desatualização se um aviso se perder.
+
+`python manage.py check_cache_coherence` mede a janela com vários processos.
+"""
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import db_router
+from .redis_client import get_redis_client
+
+
+CHANNEL = "cache:invalidate"
+
+# INCR da versão + aviso no canal em uma ida ao Redis
+_INVALIDATE = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', ARGV[1], '{"ns": "' .. ARGV[2] .. '", "version": ' .. version .. '}')
+return version
+"""
+
+
+def version_key(ns) -> str:
+    return f"cache:ver:{ns}"
+
+
+def data_key(ns, version, key) -> str:
+    return f"cache:{ns}:{version}:{key}"
+
+
+class TwoTierCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (ns, chave) -> (versão, valor, guardado_em)
+        self._entries = OrderedDict()
+        # ns -> versão conhecida; só vale enquanto a assinatura estiver ativa
+        self._versions = {}
+        self._subscribed = threading.Event()
+        self._listener_pid = None
+        self.stats = {"local_hits": 0, "redis_hits": 0, "loads": 0, "invalidations": 0}
+
+    # --- assinatura do canal -------------------------------------------------
+
+    def _ensure_listener(self):
+        # depois do fork (gunicorn --preload) a thread do processo pai não existe no filho
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            self._subscribed.clear()
+            self._entries.clear()
+            self._versions.clear()
+        threading.Thread(target=self._listen, name="cache-bus", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                # avisos perdidos enquanto desconectado: recomeça do zero
+                with self._lock:
+                    self._entries.clear()
+                    self._versions.clear()
+                self._subscribed.set()
+                checked = time.monotonic()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._apply(message["data"])
+                    if time.monotonic() - checked > 15:
+                        # conexão morta sem erro não entrega avisos: o PING força a falha
+                        pubsub.ping()
+                        checked = time.monotonic()
+            except Exception:
+                self._subscribed.clear()
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _apply(self, raw):
+        try:
+            data = json.loads(raw)
+            ns, version = data["ns"], int(data["version"])
+        except (ValueError, KeyError, TypeError):
+            return
+        with self._lock:
+            if version <= self._versions.get(ns, 0):
+                return
+            self._versions[ns] = version
+            for entry_key in [k for k in self._entries if k[0] == ns]:
+                del self._entries[entry_key]
+
+    # --- leitura -------------------------------------------------------------
+
+    def _version(self, ns, client):
+        """Versão atual do ns: da memória com a assinatura ativa, senão do Redis."""
+        if self._subscribed.is_set():
+            with self._lock:
+                known = self._versions.get(ns)
+            if known is not None:
+                return known
+        version = int(client.get(version_key(ns)) or 0)
+        if self._subscribed.is_set():
+            with self._lock:
+                # um aviso pode ter chegado enquanto lia; fica a maior
+                version = max(version, self._versions.get(ns, 0))
+                self._versions[ns] = version
+        return version
+
+    def _local(self, ns, key, version):
+        with self._lock:
+            entry = self._entries.get((ns, key))
+            if entry is None:
+                return None
+            entry_version, value, stored_at = entry
+            fresh = time.monotonic() - stored_at < settings.CACHE_LOCAL_MAX_AGE
+            if not fresh or (version is not None and entry_version != version):
+                del self._entries[(ns, key)]
+                return None
+            self._entries.move_to_end((ns, key))
+            self.stats["local_hits"] += 1
+            return (value,)
+
+    def _store_local(self, ns, key, version, value):
+        with self._lock:
+            # invalidado durante o load: não guarda o valor velho
+            if version is not None and self._subscribed.is_set() and self._versions.get(ns, version) != version:
+                return
+            self._entries[(ns, key)] = (version, value, time.monotonic())
+            self._entries.move_to_end((ns, key))
+            while len(self._entries) > settings.CACHE_LOCAL_MAXSIZE:
+                self._entries.popitem(last=False)
+
+    def _fast_hit(self, ns, key):
+        """LRU local sem I/O, possível com a assinatura ativa e a versão conhecida."""
+        self._ensure_listener()
+        if not self._subscribed.is_set():
+            return None
+        with self._lock:
+            version = self._versions.get(ns)
+        if version is None:
+            return None
+        return self._local(ns, key, version)
+
+    def get(self, ns, key, loader, serializer=pickle):
+        """Valor de (ns, chave): LRU local, depois Redis, depois `loader()`.
+        None (ex.: token inexistente) não é guardado. `serializer` (dumps/loads)
+        é o formato na camada Redis; json para o que não pode virar pickle.loads."""
+        hit = self._fast_hit(ns, key)
+        if hit is not None:
+            return hit[0]
+        try:
+            client = get_redis_client()
+            version = self._version(ns, client)
+        except Exception:
+            client = version = None
+        hit = self._local(ns, key, version)
+        if hit is not None:
+            return hit[0]
+        if client is not None:
+            try:
+                raw = client.get(data_key(ns, version, key))
+                value = serializer.loads(raw) if raw is not None else None
+            except Exception:
+                # Redis fora ou entrada em outro formato (ex.: pickle antigo): recarrega
+                raw = None
+            if raw is not None:
+                with self._lock:
+                    self.stats["redis_hits"] += 1
+                self._store_local(ns, key, version, value)
+                return value
+        # cache compartilhado sempre do primário: dado atrasado da réplica ficaria sob a versão nova
+        with db_router.use_primary():
+            value = loader()
+        with self._lock:
+            self.stats["loads"] += 1
+        if value is None:
+            return None
+        if client is not None:
+            try:
+                client.set(data_key(ns, version, key), serializer.dumps(value), ex=settings.CACHE_REDIS_TTL)
+            except Exception:
+                pass
+        self._store_local(ns, key, version, value)
+        return value
+
+    async def aget(self, ns, key, loader, serializer=pickle):
+        hit = self._fast_hit(ns, key)
+        if hit is not None:
+            return hit[0]
+        return await sync_to_async(self.get)(ns, key, loader, serializer)
+
+    # --- escrita -------------------------------------------------------------
+
+    def invalidate(self, ns):
+        """Nova versão do ns para todos os processos (chamar após o commit)."""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == ns]:
+                del self._entries[entry_key]
+            self.stats["invalidations"] += 1
+        try:
+            version = get_redis_client().eval(_INVALIDATE, 1, version_key(ns), CHANNEL, ns)
+        except Exception:
+            return None
+        self._apply(json.dumps({"ns": ns, "version": version}))
+        return version
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = TwoTierCache()
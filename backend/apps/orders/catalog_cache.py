@@ -0,0 +1,62 @@
+"""Snapshot da ordem das categorias do cardápio, compartilhado entre workers.
+
+Compilado a partir de CategoryOrder + categorias dos itens ativos e
+reaproveitado por categories_view (com ETag/304) e pela ordenação do ItemView.
+Fica no cache de duas camadas (cache_bus, namespace "catalog"): escritas em
+Item/CategoryOrder (signals.py) chamam invalidate_catalog após o commit, que
+sobe a versão do namespace e avisa todos os workers pelo pub/sub, além de
+trocar `catalog:version` (versions.py) usada nos ETags.
+"""
+import hashlib
+import json
+
+from . import versions
+from .cache_bus import cache
+from .models import CategoryOrder, Item
+
+
+NAMESPACE = "catalog"
+FALLBACK_ORDER = {"hamburguer": 0, "drink": 1, "bebidas": 2}
+
+
+class CategorySnapshot:
+    __slots__ = ("category_orders", "order_map", "categories", "etag")
+
+    def __init__(self, category_orders, categories):
+        # [(nome, ordem)] na ordem de CategoryOrder.Meta.ordering
+        self.category_orders = category_orders
+        self.order_map = {nome.lower(): ordem for nome, ordem in category_orders}
+        self.categories = sort_categories(categories, self.order_map)
+        digest = hashlib.md5(json.dumps(self.categories).encode("utf-8")).hexdigest()
+        self.etag = f'"cat-{digest}"'
+
+
+def sort_categories(cats, order_map):
+    cats = [c or "Outros" for c in cats]
+
+    def score(cat: str):
+        key = (cat or "").lower()
+        return order_map.get(key, FALLBACK_ORDER.get(key, 999))
+
+    cats.sort(key=lambda c: (score(c), c.lower()))
+    return cats
+
+
+def _build():
+    category_orders = list(CategoryOrder.objects.values_list("nome", "ordem"))
+    categories = list(Item.objects.filter(ativo=True).values_list("categoria", flat=True).distinct())
+    return CategorySnapshot(category_orders, categories)
+
+
+def category_snapshot() -> CategorySnapshot:
+    return cache.get(NAMESPACE, "categories", _build)
+
+
+async def acategory_snapshot() -> CategorySnapshot:
+    return await cache.aget(NAMESPACE, "categories", _build)
+
+
+def invalidate_catalog():
+    """Descarta o snapshot em todos os workers e troca a versão usada nos ETags."""
+    cache.invalidate(NAMESPACE)
+    versions.bump(versions.CATALOG)
@@ -0,0 +1,212 @@
+"""Importação do cardápio em lote (CSV ou JSON), com upsert por `sku`.
+
+Montar o cardápio de um evento item a item pelo painel custa uma requisição
+e uma transação por item. Aqui o arquivo inteiro é validado de uma vez
+(nenhuma escrita se alguma linha tiver erro) e gravado numa transação:
+
+- skus novos entram com um `bulk_create(update_conflicts=True)`, que também
+  cobre outro processo criando o mesmo sku no meio da importação;
+- skus existentes recebem só as colunas presentes na linha, com um
+  `bulk_update`;
+- com `deactivate_missing`, itens fora do arquivo são desativados;
+- o catálogo (snapshot de categorias, índice de busca, ETags) é invalidado
+  uma vez, depois do commit.
+
+`vendidos` não é importado: é o contador de vendas (sales.py).
+Usado por POST /api/items/import e por `python manage.py import_catalog`.
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+
+from .catalog_cache import invalidate_catalog
+from .models import Item
+
+
+FIELDS = ("nome", "descricao", "preco", "categoria", "imagem_url", "ativo", "estoque_inicial")
+REQUIRED_ON_CREATE = ("nome", "preco")
+IMPORT_MAX_ROWS = 2000
+TRUE_VALUES = {"1", "true", "t", "sim", "s", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "nao", "não", "n", "no", ""}
+
+
+class CatalogImportError(ValueError):
+    """Arquivo que não dá para ler (formato, cabeçalho, tamanho)."""
+
+
+def parse_csv(text: str) -> list:
+    """Linhas do CSV como dicts; aceita `,`, `;` (Excel em pt-BR) ou tab."""
+    text = text.lstrip("\ufeff")
+    if not text.strip():
+        return []
+    try:
+        dialect = csv.Sniffer().sniff(text.splitlines()[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    if not reader.fieldnames or "sku" not in [(name or "").strip().lower() for name in reader.fieldnames]:
+        raise CatalogImportError("O CSV precisa de um cabeçalho com a coluna 'sku'.")
+    rows = []
+    for raw in reader:
+        # coluna vazia no CSV = não informada (não apaga o valor atual)
+        rows.append({
+            (key or "").strip().lower(): value.strip()
+            for key, value in raw.items()
+            if key and isinstance(value, str) and value.strip() != ""
+        })
+    return rows
+
+
+def parse_json(data) -> list:
+    """Lista de itens, ou {"items": [...]}."""
+    if isinstance(data, (str, bytes)):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            raise CatalogImportError("JSON inválido.")
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise CatalogImportError("Envie uma lista de itens (ou {\"items\": [...]}).")
+    return data
+
+
+def _clean(name, value):
+    if name in ("nome", "categoria", "descricao", "imagem_url"):
+        value = "" if value is None else str(value).strip()
+        limit = {"nome": 200, "categoria": 120}.get(name)
+        if limit and len(value) > limit:
+            raise ValueError(f"no máximo {limit} caracteres")
+        if name == "nome" and not value:
+            raise ValueError("obrigatório")
+        return value
+    if name == "preco":
+        text = str(value).strip().replace("R$", "").strip()
+        if "," in text and "." not in text:
+            text = text.replace(",", ".")
+        try:
+            preco = Decimal(text)
+        except InvalidOperation:
+            raise ValueError("número inválido")
+        if not preco.is_finite() or preco < 0 or preco >= Decimal("10000000"):
+            raise ValueError("fora da faixa")
+        if preco != preco.quantize(Decimal("0.01")):
+            raise ValueError("no máximo 2 casas decimais")
+        return preco.quantize(Decimal("0.01"))
+    if name == "ativo":
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError("use sim/não")
+    if name == "estoque_inicial":
+        try:
+            estoque = int(str(value).strip())
+        except ValueError:
+            raise ValueError("inteiro inválido")
+        if estoque < 0:
+            raise ValueError("não pode ser negativo")
+        return estoque
+    raise ValueError("coluna desconhecida")
+
+
+def validate(rows) -> tuple:
+    """Valida tudo em uma passada: ({sku: (linha, {campo: valor})}, [erros]).
+
+    `linha` nos erros conta a partir de 1 (no CSV, a primeira depois do cabeçalho)."""
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise CatalogImportError(f"Máximo de {IMPORT_MAX_ROWS} itens por importação.")
+    parsed = {}
+    errors = []
+    for line, row in enumerate(rows, start=1):
+        try:
+            sku = int(str(row.get("sku", "")).strip())
+            if sku <= 0:
+                raise ValueError
+        except ValueError:
+            errors.append({"linha": line, "campo": "sku", "erro": "inteiro positivo obrigatório"})
+            continue
+        if sku in parsed:
+            errors.append({"linha": line, "sku": sku, "campo": "sku", "erro": "repetido no arquivo"})
+            continue
+        fields = {}
+        for name in FIELDS:
+            if name not in row or row[name] is None:
+                continue
+            try:
+                fields[name] = _clean(name, row[name])
+            except ValueError as exc:
+                errors.append({"linha": line, "sku": sku, "campo": name, "erro": str(exc)})
+        parsed[sku] = (line, fields)
+    return parsed, errors
+
+
+def upsert(parsed: dict, deactivate_missing=False, dry_run=False) -> dict:
+    """Grava os itens validados. Devolve {"created", "updated", "unchanged", "deactivated", "errors"}."""
+    summary = {"created": [], "updated": [], "unchanged": [], "deactivated": [], "errors": []}
+    with transaction.atomic():
+        existing = {it.sku: it for it in Item.objects.select_for_update().filter(sku__in=parsed)}
+        to_create = []
+        to_update = []
+        update_fields = set()
+        for sku, (line, fields) in parsed.items():
+            item = existing.get(sku)
+            if item is None:
+                missing = [name for name in REQUIRED_ON_CREATE if name not in fields]
+                if missing:
+                    summary["errors"].extend(
+                        {"linha": line, "sku": sku, "campo": name, "erro": "obrigatório para sku novo"} for name in missing
+                    )
+                    continue
+                to_create.append(Item(sku=sku, **fields))
+                summary["created"].append(sku)
+                continue
+            changed = [name for name, value in fields.items() if getattr(item, name) != value]
+            if not changed:
+                summary["unchanged"].append(sku)
+                continue
+            for name in changed:
+                setattr(item, name, fields[name])
+            update_fields.update(changed)
+            to_update.append(item)
+            summary["updated"].append(sku)
+
+        if deactivate_missing:
+            missing = Item.objects.filter(ativo=True).exclude(sku__in=parsed)
+            summary["deactivated"] = sorted(missing.values_list("sku", flat=True))
+
+        if summary["errors"] or dry_run:
+            transaction.set_rollback(True)
+            return summary
+
+        if to_create:
+            conflict_target = {}
+            if connection.features.supports_update_conflicts_with_target:
+                conflict_target["unique_fields"] = ["sku"]
+            Item.objects.bulk_create(
+                to_create, update_conflicts=True, update_fields=list(FIELDS), **conflict_target
+            )
+        if to_update:
+            Item.objects.bulk_update(to_update, sorted(update_fields))
+        if summary["deactivated"]:
+            Item.objects.filter(sku__in=summary["deactivated"]).update(ativo=False)
+        if to_create or to_update or summary["deactivated"]:
+            # bulk_* e update() não disparam post_save: uma invalidação para o lote todo
+            transaction.on_commit(invalidate_catalog)
+    return summary
+
+
+def import_rows(rows, deactivate_missing=False, dry_run=False) -> dict:
+    parsed, errors = validate(rows)
+    # com erro nas linhas nada é gravado; a passada no banco só completa a lista de erros
+    summary = upsert(parsed, deactivate_missing=deactivate_missing, dry_run=dry_run or bool(errors))
+    errors = sorted(errors + summary.pop("errors"), key=lambda error: error["linha"])
+    if errors:
+        return {"ok": False, "dry_run": dry_run, "created": [], "updated": [], "unchanged": [], "deactivated": [], "errors": errors}
+    return {"ok": True, "dry_run": dry_run, **summary, "errors": []}
@@ -0,0 +1,147 @@
+"""Busca do cardápio (`?q=` em /api/items/) num índice em memória.
+
+Em vez de três `LIKE '%q%'` (nome, descrição, categoria) a cada tecla, cada
+worker consulta um índice invertido dos itens:
+
+- termos normalizados: minúsculas e sem acento ("pão" casa com "pao");
+- vocabulário ordenado, para busca por prefixo ("hamb" -> "hamburguer");
+- trigramas de cada termo, para trechos no meio da palavra ("acon" ->
+  "bacon") e erros de digitação ("hamburger" -> "hamburguer").
+
+Todo termo da busca precisa casar com algum campo do item. A nota soma, por
+termo, o melhor casamento (exato > prefixo > trecho > parecido) pesado pelo
+campo (nome > categoria > descrição); empate fica em ordem alfabética.
+A listagem ordena por faixa de nota no banco (um `IN` por nota distinta).
+
+O índice fica no cache de duas camadas junto do snapshot de categorias
+(namespace "catalog"): escritas em Item invalidam os dois, e o índice só é
+refeito quando o catálogo muda.
+"""
+import bisect
+import re
+import unicodedata
+from collections import Counter
+
+from .cache_bus import cache
+from .catalog_cache import NAMESPACE
+from .models import Item
+
+
+FIELD_WEIGHTS = (("nome", 3.0), ("categoria", 2.0), ("descricao", 1.0))
+EXACT = 1.0
+PREFIX = 0.8
+INFIX = 0.5
+# termo parecido vale FUZZY * similaridade (Dice dos trigramas)
+FUZZY = 0.4
+MIN_SIMILARITY = 0.5
+# termos curtos geram trigramas demais em comum com qualquer palavra
+MIN_FUZZY_LEN = 4
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text) -> str:
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text) -> list:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(term) -> set:
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, rows):
+        # termo -> {item_id: maior peso de campo em que o termo aparece}
+        self.postings = {}
+        self.active = set()
+        self.names = {}
+        for item_id, ativo, *fields in rows:
+            if ativo:
+                self.active.add(item_id)
+            self.names[item_id] = normalize(fields[0])
+            for (_, weight), text in zip(FIELD_WEIGHTS, fields):
+                for term in tokenize(text):
+                    items = self.postings.setdefault(term, {})
+                    if weight > items.get(item_id, 0):
+                        items[item_id] = weight
+        self.terms = sorted(self.postings)
+        self.grams = {}
+        self.gram_counts = {}
+        for term in self.terms:
+            grams = trigrams(term)
+            self.gram_counts[term] = len(grams)
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(term)
+
+    def _matches(self, word) -> dict:
+        """{termo do vocabulário: qualidade do casamento com `word`}."""
+        found = {}
+        start = bisect.bisect_left(self.terms, word)
+        for term in self.terms[start:]:
+            if not term.startswith(word):
+                break
+            found[term] = EXACT if term == word else PREFIX
+        grams = trigrams(word)
+        if not grams:
+            return found
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        for term, count in shared.items():
+            if term in found:
+                continue
+            if count == len(grams) and word in term:
+                found[term] = INFIX
+            elif len(word) >= MIN_FUZZY_LEN:
+                similarity = 2 * count / (len(grams) + self.gram_counts[term])
+                if similarity >= MIN_SIMILARITY:
+                    found[term] = FUZZY * similarity
+        return found
+
+    def scores(self, q, only_active=True) -> dict:
+        """{item_id: nota} dos itens que casam com todos os termos de `q`."""
+        scores = None
+        for word in dict.fromkeys(tokenize(q)):
+            best = {}
+            for term, quality in self._matches(word).items():
+                for item_id, weight in self.postings[term].items():
+                    score = weight * quality
+                    if score > best.get(item_id, 0):
+                        best[item_id] = score
+            if scores is None:
+                scores = best
+            else:
+                scores = {item_id: scores[item_id] + score for item_id, score in best.items() if item_id in scores}
+            if not scores:
+                return {}
+        if scores is None:
+            return {}
+        return {item_id: round(score, 3) for item_id, score in scores.items() if not only_active or item_id in self.active}
+
+    def search(self, q, only_active=True) -> list:
+        """Ids dos itens que casam com `q`, do mais relevante para o menos."""
+        scores = self.scores(q, only_active)
+        return sorted(scores, key=lambda item_id: (-scores[item_id], self.names[item_id], item_id))
+
+    def tiers(self, q, only_active=True) -> list:
+        """Ids agrupados por nota, da maior para a menor (empates ficam juntos)."""
+        groups = {}
+        for item_id, score in self.scores(q, only_active).items():
+            groups.setdefault(score, []).append(item_id)
+        return [groups[score] for score in sorted(groups, reverse=True)]
+
+
+def _build():
+    return SearchIndex(Item.objects.values_list("id", "ativo", "nome", "categoria", "descricao"))
+
+
+def search_index() -> SearchIndex:
+    return cache.get(NAMESPACE, "search", _build)
+
+
+async def asearch_index() -> SearchIndex:
+    return await cache.aget(NAMESPACE, "search", _build)
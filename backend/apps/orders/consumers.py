@@ -1,16 +1,93 @@
+import asyncio
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from . import orders_feed, presence, waiting_room
 
 
 class OrdersConsumer(AsyncJsonWebsocketConsumer):
-    group_name = "orders"
+    """Eventos de pedidos para TV, cozinha e painel, via o OrdersFeed do processo."""
+
+    # sem canal próprio no channel layer: o feed recebe o grupo uma vez por processo
+    channel_layer_alias = None
+
+    async def connect(self):
+        await self.accept()
+        self.subscriber = orders_feed.get_feed().subscribe(self.send_text)
+
+    async def disconnect(self, close_code):
+        subscriber = getattr(self, "subscriber", None)
+        if subscriber:
+            orders_feed.get_feed().unsubscribe(subscriber)
+
+    async def send_text(self, text):
+        await self.send(text_data=text)
+
+
+class WaitingRoomConsumer(AsyncJsonWebsocketConsumer):
+    """Envia a posição da senha a cada WAITING_ROOM_PUSH_INTERVAL s até ser liberada.
+
+    Cada envio roda o tick da sala (heartbeat da senha + liberação, se for a vez),
+    então a fila anda enquanto houver alguém esperando conectado.
+    """
+
+    channel_layer_alias = None
 
     async def connect(self):
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        self.ticket = self.scope["url_route"]["kwargs"]["ticket"]
         await self.accept()
+        self.pusher = asyncio.ensure_future(self.push_positions())
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        pusher = getattr(self, "pusher", None)
+        if pusher:
+            pusher.cancel()
+
+    async def push_positions(self):
+        while True:
+            try:
+                state = await waiting_room.atick(self.ticket)
+            except Exception:
+                # sem Redis não há fila
+                state = {"status": waiting_room.ADMITTED}
+            await self.send_json({"event": "waiting_room", **state})
+            if state["status"] != waiting_room.WAITING:
+                await self.close()
+                return
+            await asyncio.sleep(settings.WAITING_ROOM_PUSH_INTERVAL)
+
+
+class PresenceConsumer(AsyncJsonWebsocketConsumer):
+    """Presença pelo ciclo de vida da conexão (ws/presence?session_id=...&source=client|admin).
+
+    Entra no connect e sai no disconnect; os pings do cliente só recebem pong,
+    sem escrita no Redis. Conexões meio abertas caem pelo ping do próprio
+    servidor WebSocket (uvicorn), e o disconnect roda do mesmo jeito.
+    """
 
-    async def orders_event(self, event):
-        await self.send_json(event.get("data", {}))
+    channel_layer_alias = None
+
+    async def connect(self):
+        params = parse_qs(self.scope.get("query_string", b"").decode())
+        parsed = presence.parse_presence_request({
+            "session_id": params.get("session_id", [""])[0],
+            "source": params.get("source", ["client"])[0],
+        })
+        if parsed is None:
+            await self.close(code=4400)
+            return
+        self.source, self.session_id, _ = parsed
+        await self.accept()
+        await presence.tracker.join(self.source, self.session_id, presence.socket_payload(self.scope, self.source))
+        self.joined = True
+
+    async def disconnect(self, close_code):
+        if getattr(self, "joined", False):
+            self.joined = False
+            await presence.tracker.leave(self.source, self.session_id)
 
+    async def receive_json(self, content, **kwargs):
+        if isinstance(content, dict) and content.get("type") == "ping":
+            await self.send_json({"type": "pong"})
@@ -0,0 +1,64 @@
+"""Backend MySQL com pool de conexões (ENGINE = "apps.orders.db_pool").
+
+Configuração em DATABASES[alias]["POOL"]: MAX_SIZE, TIMEOUT (s de espera por
+uma vaga), RECYCLE (idade máxima da conexão, s) e PING_AFTER (s parada antes
+de um ping de verificação). Use com CONN_MAX_AGE=0 para que o fim de cada
+requisição devolva a conexão ao pool.
+"""
+from django.db import OperationalError
+from django.db.backends.mysql import base as mysql_base
+from django.utils.functional import cached_property
+
+from .pool import PoolTimeout, get_pool
+
+
+def _connect(conn_params):
+    connection = mysql_base.Database.connect(**conn_params)
+    # mesmo ajuste de encoders feito por mysql_base.DatabaseWrapper.get_new_connection
+    if connection.encoders.get(bytes) is bytes:
+        connection.encoders.pop(bytes)
+    return connection
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    def get_pool(self):
+        options = self.settings_dict.get("POOL") or {}
+        conn_params = self.get_connection_params()
+        return get_pool(
+            self.alias,
+            lambda: _connect(conn_params),
+            max_size=int(options.get("MAX_SIZE", 10)),
+            timeout=float(options.get("TIMEOUT", 5)),
+            recycle=float(options.get("RECYCLE", 3600)),
+            ping_after=float(options.get("PING_AFTER", 10)),
+        )
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.get_pool().acquire()
+        except PoolTimeout as exc:
+            raise OperationalError(str(exc)) from exc
+
+    @cached_property
+    def mysql_server_data(self):
+        # Sob ASGI cada requisição cria um DatabaseWrapper novo; sem este cache
+        # a primeira checagem de features de cada requisição custaria uma query.
+        pool = self.get_pool()
+        if pool.server_data is None:
+            pool.server_data = super().mysql_server_data
+        return pool.server_data
+
+    def init_connection_state(self):
+        # Conexões reaproveitadas já passaram pelos SETs de sessão
+        if getattr(self.connection, "_pool_initialized", False):
+            return
+        super().init_connection_state()
+        self.connection._pool_initialized = True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Fechada dentro de atomic() o Django ainda mantém a referência: não pode voltar ao pool.
+        # Conexão com erro não verificado também é descartada.
+        discard = self.in_atomic_block or (self.errors_occurred and not self.is_usable())
+        self.get_pool().release(self.connection, discard=discard)
@@ -0,0 +1,212 @@
+"""Pool de conexões por processo, compartilhado entre as threads do worker.
+
+Sob ASGI cada requisição roda as partes síncronas em uma thread própria
+(ThreadSensitiveContext), então conexões thread-local com CONN_MAX_AGE
+morrem junto com a thread. O pool guarda as conexões no processo: a thread
+pega uma no connect() e devolve no close() do fim da requisição.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=10, timeout=5.0, recycle=3600.0, ping_after=10.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._cond = threading.Condition()
+        # (conexão, criada_em, devolvida_em) — LIFO para reaproveitar as mais quentes
+        self._idle = deque()
+        # Conexões emprestadas; se a thread morrer sem devolver, o GC libera a vaga
+        self._in_use = weakref.WeakKeyDictionary()
+        self._pid = os.getpid()
+        # Dados do servidor (versão, sql_mode) consultados uma vez por processo
+        self.server_data = None
+        self.stats = {
+            "checkouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "recycled": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "timeouts": 0,
+        }
+
+    def _check_fork(self):
+        # Pool herdado de um fork (gunicorn --preload): descarta sem fechar os sockets do pai
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._in_use = weakref.WeakKeyDictionary()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        waited_from = None
+        while True:
+            stale = []
+            with self._cond:
+                self._check_fork()
+                while True:
+                    conn = self._take_idle(stale)
+                    if conn is not None:
+                        break
+                    if len(self._in_use) < self.max_size:
+                        break
+                    if waited_from is None:
+                        waited_from = time.monotonic()
+                        self.stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        for raw in stale:
+                            _close_quietly(raw)
+                        raise PoolTimeout(
+                            f"Nenhuma conexão livre no pool após {self.timeout:.1f}s (max_size={self.max_size})"
+                        )
+                    # espera curta: vagas liberadas pelo GC não chamam notify()
+                    self._cond.wait(min(remaining, 0.05))
+                if conn is not None:
+                    # a vaga fica com esta thread enquanto o ping roda fora do lock
+                    self._in_use[conn[0]] = conn[1]
+                else:
+                    # reserva a vaga antes de conectar fora do lock
+                    placeholder = _Slot()
+                    self._in_use[placeholder] = 0.0
+            # fechar e pingar podem bloquear até o timeout do socket (servidor morto ou
+            # conexão meio aberta): fora do lock, para não travar as outras threads
+            for raw in stale:
+                _close_quietly(raw)
+            if conn is None:
+                break
+            raw, _, needs_ping = conn
+            if not needs_ping or self._ping(raw):
+                self._count_checkout(waited_from)
+                return raw
+            # conexão morta: libera a vaga e tenta de novo
+            with self._cond:
+                self._in_use.pop(raw, None)
+                self.stats["discarded"] += 1
+                self._cond.notify()
+            _close_quietly(raw)
+
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use.pop(placeholder, None)
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._in_use.pop(placeholder, None)
+            self._in_use[raw] = time.monotonic()
+            self.stats["created"] += 1
+        self._count_checkout(waited_from)
+        return raw
+
+    def _count_checkout(self, waited_from):
+        with self._cond:
+            if waited_from is not None:
+                wait_ms = (time.monotonic() - waited_from) * 1000
+                self.stats["wait_ms_total"] += wait_ms
+                self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+            self.stats["checkouts"] += 1
+
+    def _take_idle(self, stale):
+        """(conexão, criada_em, precisa_ping) da ociosa mais recente; as vencidas vão para `stale`."""
+        now = time.monotonic()
+        while self._idle:
+            raw, created_at, released_at = self._idle.pop()
+            if self.recycle and now - created_at > self.recycle:
+                self.stats["recycled"] += 1
+                stale.append(raw)
+                continue
+            # health check apenas de conexões paradas há algum tempo
+            return raw, created_at, self.ping_after is not None and now - released_at > self.ping_after
+        return None
+
+    @staticmethod
+    def _ping(raw) -> bool:
+        try:
+            raw.ping()
+        except Exception:
+            return False
+        return True
+
+    def release(self, raw, discard=False):
+        with self._cond:
+            self._check_fork()
+            created_at = self._in_use.pop(raw, None)
+            if created_at is None:
+                # não veio deste pool (ou pool reiniciado após fork)
+                discard = True
+            if not discard:
+                try:
+                    # nunca devolve uma transação aberta para o próximo usuário
+                    raw.rollback()
+                except Exception:
+                    discard = True
+            if discard:
+                self.stats["discarded"] += 1
+                _close_quietly(raw)
+            else:
+                self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                _close_quietly(self._idle.pop()[0])
+
+    def snapshot(self):
+        with self._cond:
+            in_use = sum(1 for key in self._in_use if not isinstance(key, _Slot))
+            data = dict(self.stats)
+            data.update({
+                "max_size": self.max_size,
+                "in_use": in_use,
+                "connecting": len(self._in_use) - in_use,
+                "idle": len(self._idle),
+                "wait_ms_avg": round(data["wait_ms_total"] / data["waits"], 2) if data["waits"] else 0.0,
+            })
+        data["wait_ms_total"] = round(data["wait_ms_total"], 2)
+        data["wait_ms_max"] = round(data["wait_ms_max"], 2)
+        return data
+
+
+class _Slot:
+    """Marca uma vaga reservada enquanto a conexão nova está sendo aberta."""
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, **options):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(connect, **options)
+        return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.snapshot() for alias, pool in pools.items()}
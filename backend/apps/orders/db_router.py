@@ -0,0 +1,158 @@
+"""Leituras de relatórios e painéis numa réplica do MySQL (alias "replica").
+
+Sem DATABASES["replica"] nada muda: tudo vai para o primário. Com ela:
+
+- `ReplicaRoutingMiddleware` (middleware.py) roda as rotas de DB_REPLICA_ROUTES
+  (relatório, estoque, histórico de métricas...) dentro de `use_replica()`;
+  o router manda as leituras dessas requisições para a réplica. Escritas vão
+  sempre para o primário, mesmo de objetos lidos da réplica;
+- read-your-writes: uma escrita bem-sucedida da equipe grava
+  `db:sticky:<usuário>` no Redis (DB_REPLICA_STICKY_S); enquanto a chave
+  existir as leituras desse usuário ficam no primário. Sem Redis, também;
+- réplica que não conecta não derruba nada: as leituras voltam ao primário e o
+  processo tenta a réplica de novo depois de DB_REPLICA_RETRY_S;
+- o que vai para cache compartilhado (cache_bus) é sempre lido do primário:
+  um snapshot atrasado ficaria guardado sob a versão nova;
+- respostas com ETag cuja versão mudou há menos de DB_REPLICA_MAX_LAG_S são
+  montadas com o primário, para o cliente não guardar dados atrasados sob a
+  ETag nova (http_cache.py).
+
+Para testar localmente: `DB_SQLITE_DIR=/tmp/umadsede python manage.py
+check_replica_routing` (dois arquivos SQLite; a "replicação" é uma cópia do
+arquivo) confere roteamento, stickiness, a janela de atraso e a volta ao
+primário com a réplica fora do ar.
+"""
+import contextvars
+import re
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .redis_client import get_async_redis_client, get_redis_client
+
+
+REPLICA = "replica"
+
+# alias das leituras da requisição atual; None = primário
+_read_alias = contextvars.ContextVar("db_read_alias", default=None)
+
+
+def replica_enabled() -> bool:
+    return REPLICA in settings.DATABASES
+
+
+# réplica que falhou ao conectar: até este instante (monotonic) as leituras ficam no primário
+_replica_down_until = 0.0
+
+
+def replica_available() -> bool:
+    """A réplica conecta nesta thread; se não, o processo desiste dela por DB_REPLICA_RETRY_S."""
+    global _replica_down_until
+    connection = connections[REPLICA]
+    if connection.connection is not None:
+        return True
+    if time.monotonic() < _replica_down_until:
+        return False
+    try:
+        connection.ensure_connection()
+    except Exception:
+        _replica_down_until = time.monotonic() + settings.DB_REPLICA_RETRY_S
+        return False
+    return True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_alias.get() != REPLICA:
+            return None
+        # réplica fora do ar: a requisição lê do primário em vez de falhar
+        return REPLICA if replica_available() else None
+
+    def db_for_write(self, model, **hints):
+        # sem isso o Django gravaria no banco de onde a instância foi lida
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {"default", REPLICA, None}:
+            return True
+        return None
+
+
+@contextmanager
+def use_replica():
+    token = _read_alias.set(REPLICA if replica_enabled() else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def use_primary():
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def changed_recently(last_modified) -> bool:
+    """Versão (epoch) mais nova que o atraso tolerado da réplica."""
+    return bool(last_modified) and time.time() - last_modified < settings.DB_REPLICA_MAX_LAG_S
+
+
+def using_replica() -> bool:
+    return _read_alias.get() == REPLICA
+
+
+_routes = None
+
+
+def _compiled_routes():
+    global _routes
+    if _routes is None:
+        _routes = [(set(methods), re.compile(pattern)) for methods, pattern in settings.DB_REPLICA_ROUTES]
+    return _routes
+
+
+def match_route(request) -> bool:
+    """A requisição está em DB_REPLICA_ROUTES (regex sobre caminho + query string)."""
+    if not replica_enabled():
+        return False
+    path = request.get_full_path()
+    return any(request.method in methods and pattern.search(path) for methods, pattern in _compiled_routes())
+
+
+def sticky_key(user_id) -> str:
+    return f"db:sticky:{user_id}"
+
+
+def mark_write(user_id):
+    try:
+        get_redis_client().set(sticky_key(user_id), "1", ex=settings.DB_REPLICA_STICKY_S)
+    except Exception:
+        pass
+
+
+async def amark_write(user_id):
+    try:
+        await get_async_redis_client().set(sticky_key(user_id), "1", ex=settings.DB_REPLICA_STICKY_S)
+    except Exception:
+        pass
+
+
+def is_sticky(user_id) -> bool:
+    try:
+        return bool(get_redis_client().exists(sticky_key(user_id)))
+    except Exception:
+        # sem saber se houve escrita recente, lê do primário
+        return True
+
+
+async def ais_sticky(user_id) -> bool:
+    try:
+        return bool(await get_async_redis_client().exists(sticky_key(user_id)))
+    except Exception:
+        return True
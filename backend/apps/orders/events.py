@@ -0,0 +1,124 @@
+"""Eventos (edições de venda) e arquivamento dos pedidos de eventos encerrados.
+
+Todo pedido novo pertence ao evento ativo, e as consultas quentes (lista de
+pedidos, quadro da cozinha, estoque) filtram por `evento__ativo=True`.
+Encerrar um evento é só trocar o ativo; os pedidos antigos saem das tabelas
+quentes depois, em lotes pequenos (archive_closed_events, rodado pelo comando
+`archive_events`), indo para ArchivedPedido com itens, pagamento e histórico.
+"""
+import time
+
+from django.db import router, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from . import status_log
+from .models import ArchivedPedido, Evento, Pagamento, Pedido, PedidoItem, StatusLog
+
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def current_event() -> Evento:
+    evento = Evento.objects.filter(ativo=True).order_by("-id").first()
+    if evento is None:
+        with transaction.atomic():
+            evento = Evento.objects.select_for_update().filter(ativo=True).order_by("-id").first()
+            if evento is None:
+                evento = Evento.objects.create(nome=default_event_name())
+    return evento
+
+
+def default_event_name() -> str:
+    return f"Evento {timezone.localtime():%d/%m/%Y %H:%M}"
+
+
+def close_current_event(nome=None):
+    """Encerra o evento ativo e abre outro. Devolve (encerrado, novo)."""
+    with transaction.atomic():
+        ativos = list(Evento.objects.select_for_update().filter(ativo=True))
+        now = timezone.now()
+        for evento in ativos:
+            evento.ativo = False
+            evento.encerrado_em = now
+            evento.save(update_fields=["ativo", "encerrado_em"])
+        novo = Evento.objects.create(nome=(nome or "").strip() or default_event_name())
+    return (ativos[0] if ativos else None), novo
+
+
+def _archived(pedido) -> ArchivedPedido:
+    pagamento = getattr(pedido, "pagamento", None)
+    return ArchivedPedido(
+        id=pedido.id,
+        evento_id=pedido.evento_id,
+        cliente_nome=pedido.cliente_nome,
+        cliente_waid=pedido.cliente_waid,
+        valor_total=pedido.valor_total,
+        status=pedido.status,
+        meio_pagamento=pedido.meio_pagamento,
+        provider_payment_id=pedido.provider_payment_id,
+        observacoes=pedido.observacoes,
+        precisa_embalagem=pedido.precisa_embalagem,
+        antecipado=pedido.antecipado,
+        created_at=pedido.created_at,
+        paid_at=pedido.paid_at,
+        itens=[
+            {"item": pi.item_id, "nome": pi.nome, "preco": str(pi.preco), "qtd": pi.qtd}
+            for pi in pedido.itens.all()
+        ],
+        pagamento=None if pagamento is None else {
+            "preference_id": pagamento.preference_id,
+            "status": pagamento.status,
+            "status_detail": pagamento.status_detail,
+            "init_point": pagamento.init_point,
+            "raw": pagamento.raw,
+            "updated_at": pagamento.updated_at.isoformat() if pagamento.updated_at else None,
+        },
+        historico=[
+            {"de": log.de, "para": log.para, "quando": log.quando.isoformat()}
+            for log in pedido.statuslog_set.all()
+        ],
+    )
+
+
+def archive_batch(evento, batch_size=ARCHIVE_BATCH_SIZE) -> int:
+    """Move até `batch_size` pedidos do evento para ArchivedPedido. Devolve quantos moveu."""
+    using = router.db_for_write(Pedido)
+    with transaction.atomic(using=using):
+        ids = list(Pedido.objects.filter(evento=evento).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return 0
+        pedidos = (
+            Pedido.objects.filter(id__in=ids)
+            .select_related("pagamento")
+            .prefetch_related("itens", Prefetch("statuslog_set", queryset=StatusLog.objects.order_by("quando", "id")))
+        )
+        ArchivedPedido.objects.bulk_create([_archived(p) for p in pedidos], ignore_conflicts=True)
+        # DELETE direto, sem coletor: delete() dispararia post_delete por pedido (quadro,
+        # versão dos pedidos, order_status.forget), trabalho inútil para um evento encerrado.
+        # Os filhos saem antes porque _raw_delete não faz a cascata.
+        for related in (StatusLog, PedidoItem, Pagamento):
+            related.objects.filter(pedido_id__in=ids).order_by()._raw_delete(using)
+        Pedido.objects.filter(id__in=ids).order_by()._raw_delete(using)
+    return len(ids)
+
+
+def archive_closed_events(batch_size=ARCHIVE_BATCH_SIZE, pause=0.2, max_batches=None) -> int:
+    """Arquiva, em lotes, os pedidos dos eventos encerrados. Devolve o total movido."""
+    # transições ainda no buffer do Redis precisam chegar ao StatusLog antes de arquivar
+    status_log.flush()
+    moved = 0
+    batches = 0
+    for evento in Evento.objects.filter(ativo=False, arquivado_em__isnull=True).order_by("id"):
+        while max_batches is None or batches < max_batches:
+            count = archive_batch(evento, batch_size)
+            if not count:
+                Evento.objects.filter(pk=evento.pk).update(arquivado_em=timezone.now())
+                break
+            moved += count
+            batches += 1
+            # folga entre lotes para não disputar o banco com o atendimento
+            time.sleep(pause)
+        else:
+            break
+    return moved
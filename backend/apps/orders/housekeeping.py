@@ -0,0 +1,142 @@
+"""Limpeza periódica das tabelas/chaves que só crescem.
+
+- AuthToken: create_token insere uma linha por login e o logout só desativa;
+  tokens desativados ou expirados há mais que a janela do histórico de
+  métricas (TOKEN_PURGE_GRACE_MINUTES) são apagados em lotes pequenos.
+- presence:samples: entradas inválidas, repetidas no mesmo minuto (dois
+  workers gravando juntos) ou mais velhas que a janela são descartadas.
+- ItemSalesShard: as parcelas do contador de vendas são consolidadas em
+  Item.vendidos (sales.fold), para não crescerem sem limite.
+- statuslog:buffer: transições que ficaram no Redis quando o movimento parou
+  (status_log só drena quando alguém grava) vão para o banco.
+- pedidos de eventos encerrados vão para ArchivedPedido
+  (events.archive_closed_events), a não ser com archive=False.
+
+run() faz tudo isso e guarda o resumo em `housekeeping:last`, exibido
+em /api/admin/metrics. Rodado pelo comando `housekeeping` (serviço worker).
+"""
+import json
+import time
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import events, sales, status_log
+from .models import AuthToken
+from .redis_client import get_redis_client
+
+
+SAMPLES_KEY = "presence:samples"
+# mesma janela máxima de admin_metrics_history (minutos)
+SAMPLES_WINDOW = 720
+REPORT_KEY = "housekeeping:last"
+
+
+def purge_tokens(batch_size=None, pause=0.05) -> int:
+    """Apaga tokens inativos/expirados em lotes de `batch_size`. Devolve quantos apagou."""
+    batch_size = batch_size or settings.TOKEN_PURGE_BATCH
+    cutoff = timezone.now() - timedelta(minutes=settings.TOKEN_PURGE_GRACE_MINUTES)
+    stale = AuthToken.objects.filter(Q(is_active=False) | Q(expires_at__lte=cutoff))
+    deleted = 0
+    while True:
+        ids = list(stale.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += AuthToken.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            return deleted
+        # lotes curtos, com folga, para não segurar travas durante o login
+        time.sleep(pause)
+
+
+def _compacted(raws, now):
+    oldest = now - timedelta(minutes=SAMPLES_WINDOW)
+    seen = set()
+    kept = []
+    for raw in raws:
+        try:
+            data = json.loads(raw)
+            ts = parse_datetime(data.get("timestamp") or "")
+        except (ValueError, TypeError, AttributeError):
+            continue
+        if ts is None:
+            continue
+        if timezone.is_naive(ts):
+            ts = timezone.make_aware(ts, timezone=timezone.utc)
+        # a lista é mais nova primeiro: a primeira entrada do minuto é a que vale
+        if ts < oldest or ts in seen:
+            continue
+        seen.add(ts)
+        kept.append((ts, raw))
+    kept.sort(key=lambda pair: pair[0], reverse=True)
+    return [raw for _, raw in kept]
+
+
+def compact_presence_samples(client=None) -> int:
+    """Reescreve presence:samples sem lixo. Devolve quantas entradas removeu."""
+    client = client or get_redis_client()
+    for _ in range(5):
+        with client.pipeline() as pipe:
+            try:
+                pipe.watch(SAMPLES_KEY)
+                raws = pipe.lrange(SAMPLES_KEY, 0, -1)
+                kept = _compacted(raws, timezone.now())
+                if len(kept) == len(raws) and kept == raws:
+                    return 0
+                pipe.multi()
+                pipe.delete(SAMPLES_KEY)
+                if kept:
+                    pipe.rpush(SAMPLES_KEY, *kept)
+                pipe.execute()
+                return len(raws) - len(kept)
+            except redis.WatchError:
+                # store_presence_sample gravou no meio; tenta de novo com a lista nova
+                continue
+    return 0
+
+
+def run(batch_size=None, archive=True) -> dict:
+    started = time.perf_counter()
+    report = {"tokens_deleted": purge_tokens(batch_size)}
+    try:
+        client = get_redis_client()
+        report["samples_removed"] = compact_presence_samples(client)
+    except Exception:
+        client = None
+        report["samples_removed"] = None
+    try:
+        report["sales_items_folded"] = sales.fold()
+    except Exception:
+        report["sales_items_folded"] = None
+    try:
+        report["status_logs_flushed"] = status_log.flush()
+    except Exception:
+        # o lote fica em statuslog:processing para a próxima rodada
+        report["status_logs_flushed"] = None
+    if archive:
+        try:
+            report["orders_archived"] = events.archive_closed_events()
+        except Exception:
+            # o lote em andamento volta (transação); o resto fica para a próxima rodada
+            report["orders_archived"] = None
+    report["tokens_remaining"] = AuthToken.objects.count()
+    report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    report["finished_at"] = timezone.now().isoformat()
+    if client is not None:
+        try:
+            client.set(REPORT_KEY, json.dumps(report))
+        except Exception:
+            pass
+    return report
+
+
+def last_report():
+    try:
+        raw = get_redis_client().get(REPORT_KEY)
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
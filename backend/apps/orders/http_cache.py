@@ -0,0 +1,104 @@
+"""Requisições condicionais (ETag / Last-Modified) guiadas pelas versões de versions.py.
+
+Com a versão lida do Redis antes de montar a resposta, um poll que não mudou
+nada responde 304 sem consultar o banco nem serializar.
+"""
+import hashlib
+import math
+import time
+from contextlib import nullcontext
+
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import db_router
+from .versions import token_time
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if not header or not etag:
+        return False
+    if header.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def last_modified_second(last_modified) -> int:
+    """Last-Modified só tem segundos. Depois que o segundo da versão passou, manda
+    o segundo seguinte (If-Modified-Since igual a ele casa com a versão); antes,
+    uma troca no mesmo segundo daria o mesmo valor, então manda o segundo da
+    versão, que is_not_modified trata como modificado."""
+    ceiling = math.ceil(last_modified)
+    return ceiling if time.time() >= ceiling else math.floor(last_modified)
+
+
+def set_validators(response, etag: str, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified_second(last_modified))
+    # o navegador sempre revalida, mas pode reaproveitar o corpo com 304
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def validators(tokens, *parts):
+    """(etag, last_modified) a partir dos tokens de versão e de partes extras (ex.: URL)."""
+    if tokens is None or None in tokens:
+        # versão ausente: uma ETag sem ela poderia repetir a de antes de uma mudança
+        return None, None
+    raw = "|".join([*(t.decode() for t in tokens), *parts])
+    etag = f'W/"{hashlib.md5(raw.encode("utf-8")).hexdigest()}"'
+    times = [t for t in map(token_time, tokens) if t]
+    return etag, (max(times) if times else None)
+
+
+def is_not_modified(request, etag, last_modified) -> bool:
+    # If-None-Match tem precedência sobre If-Modified-Since (RFC 9110)
+    if request.META.get("HTTP_IF_NONE_MATCH"):
+        return etag_matches(request, etag)
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    # sem truncar: versão de 10.7 não casa com If-Modified-Since 10 (last_modified_second)
+    return bool(since and last_modified and last_modified <= since)
+
+
+def _finish(response, etag, last_modified):
+    if response.status_code == 200:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def _reads_for(last_modified):
+    # versão recém-trocada: a réplica pode ainda não ter a escrita, e a ETag nova
+    # ficaria presa a dados antigos no cliente
+    if db_router.using_replica() and db_router.changed_recently(last_modified):
+        return db_router.use_primary()
+    return nullcontext()
+
+
+def conditional_response(request, tokens, build, *parts):
+    """Responde 304 se o cliente já tem a versão atual; senão chama build()."""
+    etag, last_modified = validators(tokens, *parts)
+    if etag is None:
+        return build()
+    if is_not_modified(request, etag, last_modified):
+        return set_validators(HttpResponseNotModified(), etag, last_modified)
+    with _reads_for(last_modified):
+        return _finish(build(), etag, last_modified)
+
+
+async def aconditional_response(request, tokens, build, *parts):
+    etag, last_modified = validators(tokens, *parts)
+    if etag is None:
+        return await build()
+    if is_not_modified(request, etag, last_modified):
+        return set_validators(HttpResponseNotModified(), etag, last_modified)
+    with _reads_for(last_modified):
+        return _finish(await build(), etag, last_modified)
@@ -0,0 +1,41 @@
+"""Move os pedidos dos eventos encerrados para ArchivedPedido, em lotes.
+
+Encerrar o evento (POST /api/admin/reset-sales) só troca o evento ativo; este
+comando esvazia as tabelas quentes depois, um lote por transação, com uma
+pausa entre lotes para não competir com o atendimento.
+
+    python manage.py archive_events --batch-size 500 --pause 0.2
+    python manage.py archive_events --loop --interval 60
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from ... import events
+
+
+class Command(BaseCommand):
+    help = "Arquiva em lotes os pedidos dos eventos encerrados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=events.ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=0.2, help="Segundos entre lotes")
+        parser.add_argument("--max-batches", type=int, default=None, help="Para depois de N lotes")
+        parser.add_argument("--loop", action="store_true", help="Continua rodando e verifica a cada --interval s")
+        parser.add_argument("--interval", type=float, default=60.0)
+
+    def handle(self, *args, **opts):
+        if opts["batch_size"] <= 0:
+            raise CommandError("--batch-size deve ser positivo.")
+        while True:
+            started = time.perf_counter()
+            moved = events.archive_closed_events(
+                batch_size=opts["batch_size"], pause=opts["pause"], max_batches=opts["max_batches"]
+            )
+            if moved or not opts["loop"]:
+                self.stdout.write(f"{moved} pedidos arquivados em {time.perf_counter() - started:.1f}s")
+            if not opts["loop"]:
+                return
+            close_old_connections()
+            time.sleep(opts["interval"])
@@ -0,0 +1,63 @@
+"""Compara a latência de "uma requisição" com conexão nova vs. conexão do pool.
+
+Cada iteração imita o ciclo de uma requisição ASGI: thread nova, DatabaseWrapper
+novo, uma query curta e close() no final (request_finished).
+
+    python manage.py bench_db --iterations 500 --concurrency 8
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from ...db_pool.pool import pool_stats
+
+
+class Command(BaseCommand):
+    help = "Benchmark de conexão MySQL: direta (sem pool) vs. apps.orders.db_pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--iterations", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--query", default="SELECT 1")
+
+    def handle(self, *args, **opts):
+        base_settings = connections[opts["database"]].settings_dict
+        if "mysql" not in base_settings["ENGINE"] and base_settings["ENGINE"] != "apps.orders.db_pool":
+            raise CommandError("O benchmark de pool só se aplica ao MySQL.")
+
+        for label, engine in (("direta", "django.db.backends.mysql"), ("pool", "apps.orders.db_pool")):
+            settings_dict = dict(base_settings, ENGINE=engine, CONN_MAX_AGE=0)
+            wrapper_cls = load_backend(engine).DatabaseWrapper
+            alias = f"bench_{label}"
+            latencies = self.run(wrapper_cls, settings_dict, alias, opts)
+            latencies.sort()
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            p99 = latencies[int(0.99 * (len(latencies) - 1))]
+            self.stdout.write(
+                f"{label:>6}: média {statistics.mean(latencies):.2f} ms | p50 {statistics.median(latencies):.2f} ms | "
+                f"p95 {p95:.2f} ms | p99 {p99:.2f} ms"
+            )
+        stats = pool_stats().get("bench_pool")
+        if stats:
+            self.stdout.write(f"pool: {stats}")
+
+    def run(self, wrapper_cls, settings_dict, alias, opts):
+        def one_request(_):
+            conn = wrapper_cls(settings_dict, alias)
+            start = time.perf_counter()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(opts["query"])
+                    cursor.fetchall()
+            finally:
+                conn.close()
+            return (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as executor:
+            list(executor.map(one_request, range(min(20, opts["iterations"]))))  # aquecimento
+            return list(executor.map(one_request, range(opts["iterations"])))
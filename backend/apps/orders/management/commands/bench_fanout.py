@@ -0,0 +1,196 @@
+"""Benchmark da entrega de eventos de pedidos para muitos sockets de ws/orders.
+
+Abre N sockets direto na aplicação ASGI do consumer (sem rede), publica
+eventos `order_updated` no grupo "orders" e mede, nos dois modos:
+
+- legado: um canal por socket no RedisChannelLayer e `group_send` copiando o
+  evento para cada canal (como era o OrdersConsumer);
+- feed: RedisPubSubChannelLayer + OrdersFeed (um PUBLISH por evento, uma
+  inscrição por processo, JSON codificado uma vez, fila com junção por socket).
+
+Uma fração dos sockets (--slow-pct) demora --slow-ms em cada envio, como uma
+TV em Wi-Fi ruim. Latência = publicação -> primeiro texto do socket que cita
+o pedido (ou um resync). Usa o Redis do CHANNEL_LAYERS (ou REDIS_HOST/REDIS_PORT).
+
+    python manage.py bench_fanout --sockets 100,1000,5000 --events 30
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import channel_layers
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from ...consumers import OrdersConsumer
+from ...orders_feed import GROUP
+
+
+class LegacyOrdersConsumer(AsyncJsonWebsocketConsumer):
+    """OrdersConsumer de antes do OrdersFeed: canal próprio no grupo e um send_json por evento."""
+
+    async def connect(self):
+        await self.channel_layer.group_add(GROUP, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(GROUP, self.channel_name)
+
+    async def orders_event(self, event):
+        await self.send_json(event.get("data", {}))
+
+
+MODES = {
+    "legado": ("channels_redis.core.RedisChannelLayer", LegacyOrdersConsumer),
+    "feed": ("channels_redis.pubsub.RedisPubSubChannelLayer", OrdersConsumer),
+}
+
+
+class Socket:
+    def __init__(self, app, slow_s, published):
+        self.app = app
+        self.slow_s = slow_s
+        self.published = published
+        self.seen = {}
+        self.messages = 0
+        self.inbox = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.task = None
+
+    async def open(self):
+        scope = {"type": "websocket", "path": "/ws/orders", "query_string": b"", "headers": [], "subprotocols": []}
+        await self.inbox.put({"type": "websocket.connect"})
+        self.task = asyncio.ensure_future(self.app(scope, self.inbox.get, self.send))
+        accepted = asyncio.ensure_future(self.accepted.wait())
+        await asyncio.wait([accepted, self.task], return_when=asyncio.FIRST_COMPLETED)
+        if not self.accepted.is_set():
+            accepted.cancel()
+            # consumer caiu antes do accept (ex.: Redis do channel layer fora)
+            self.task.result()
+            raise CommandError("O consumer fechou sem aceitar a conexão.")
+
+    async def send(self, message):
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.send":
+            if self.slow_s:
+                await asyncio.sleep(self.slow_s)
+            now = time.perf_counter()
+            self.messages += 1
+            data = json.loads(message["text"])
+            if data.get("event") == "resync":
+                ids = list(self.published)
+            elif "orders" in data:
+                ids = [entry["id"] for entry in data["orders"]]
+            else:
+                ids = [data.get("id")]
+            for pk in ids:
+                self.seen.setdefault(pk, now)
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self.task, 5)
+        except (asyncio.TimeoutError, Exception):
+            self.task.cancel()
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * (len(values) - 1)))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = "Mede a entrega de eventos de pedidos para 100/1.000/5.000 sockets (legado x feed pub/sub)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", default="100,1000,5000", help="Tamanhos, separados por vírgula")
+        parser.add_argument("--events", type=int, default=30)
+        parser.add_argument("--interval-ms", type=float, default=20.0, help="Tempo entre eventos")
+        parser.add_argument("--slow-pct", type=float, default=5.0, help="%% de sockets lentos")
+        parser.add_argument("--slow-ms", type=float, default=200.0, help="Atraso de cada envio num socket lento")
+        parser.add_argument("--mode", choices=["both", *MODES], default="both")
+
+    def handle(self, *args, **opts):
+        try:
+            sizes = [int(part) for part in opts["sockets"].split(",") if part.strip()]
+        except ValueError:
+            raise CommandError("--sockets deve ser uma lista de inteiros, ex.: 100,1000,5000")
+        hosts = settings.CHANNEL_LAYERS["default"].get("CONFIG", {}).get("hosts") or [
+            (os.getenv("REDIS_HOST", "redis"), int(os.getenv("REDIS_PORT", "6379")))
+        ]
+        modes = list(MODES) if opts["mode"] == "both" else [opts["mode"]]
+        for size in sizes:
+            for mode in modes:
+                loop = asyncio.new_event_loop()
+                try:
+                    result = loop.run_until_complete(self.run(mode, size, hosts, opts))
+                except Exception as exc:
+                    # o legado esgota o pool de conexões do Redis com muitos sockets; os consumers
+                    # presos nele não terminam ao cancelar, então o loop é descartado com eles
+                    self.stdout.write(f"{mode:>6} | {size:>5} sockets | falhou: {type(exc).__name__}: {exc}")
+                    continue
+                finally:
+                    loop.close()
+                self.stdout.write(
+                    f"{mode:>6} | {size:>5} sockets | conexão {result['connect_s']:.1f}s | "
+                    f"latência p50 {result['p50']:.1f} ms p99 {result['p99']:.1f} ms máx {result['max']:.1f} ms | "
+                    f"CPU {result['cpu_ms']:.1f} ms/evento | lentos: {result['slow_msgs']:.1f} msgs/{opts['events']} eventos | "
+                    f"não entregues {result['missing']}"
+                )
+
+    async def run(self, mode, size, hosts, opts):
+        backend, consumer = MODES[mode]
+        # prefixo próprio: não entrega nada aos sockets reais do grupo "orders"
+        layer = import_string(backend)(hosts=hosts, prefix=f"bench{int(time.time())}")
+        channel_layers.set("default", layer)
+        app = consumer.as_asgi()
+
+        published = {}
+        slow_every = int(100 / opts["slow_pct"]) if opts["slow_pct"] > 0 else 0
+        sockets = [
+            Socket(app, opts["slow_ms"] / 1000 if slow_every and i % slow_every == 0 else 0, published)
+            for i in range(size)
+        ]
+        started = time.perf_counter()
+        for start in range(0, size, 200):
+            await asyncio.gather(*(sock.open() for sock in sockets[start:start + 200]))
+        connect_s = time.perf_counter() - started
+        # a inscrição do feed (ou do último socket) precisa estar ativa antes do primeiro evento
+        await asyncio.sleep(0.5)
+
+        cpu_started = time.process_time()
+        for pk in range(1, opts["events"] + 1):
+            published[pk] = time.perf_counter()
+            await layer.group_send(GROUP, {"type": "orders.event", "data": {"event": "order_updated", "id": pk, "status": "pronto"}})
+            await asyncio.sleep(opts["interval_ms"] / 1000)
+
+        last = opts["events"]
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline and any(last not in sock.seen for sock in sockets):
+            await asyncio.sleep(0.05)
+        cpu_ms = (time.process_time() - cpu_started) * 1000 / opts["events"]
+
+        latencies = sorted(
+            (sock.seen[pk] - at) * 1000
+            for sock in sockets if not sock.slow_s
+            for pk, at in published.items() if pk in sock.seen
+        )
+        missing = sum(1 for sock in sockets for pk in published if pk not in sock.seen)
+        slow = [sock.messages for sock in sockets if sock.slow_s]
+
+        for start in range(0, size, 500):
+            await asyncio.gather(*(sock.close() for sock in sockets[start:start + 500]))
+        await layer.flush()
+        return {
+            "connect_s": connect_s,
+            "p50": statistics.median(latencies) if latencies else 0.0,
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0,
+            "cpu_ms": cpu_ms,
+            "slow_msgs": statistics.mean(slow) if slow else 0.0,
+            "missing": missing,
+        }
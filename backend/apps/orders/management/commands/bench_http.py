@@ -0,0 +1,138 @@
+"""Benchmark HTTP simples (requisições/s e latência de cauda) contra um servidor rodando.
+
+Exemplo, comparando o caminho DRF síncrono com as views async com o mesmo
+número de workers:
+
+    ASYNC_READ_VIEWS=False gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker --workers 3
+    python manage.py bench_http --base-url http://localhost:8000 --path /api/items/?limit=20 --path /api/categories
+
+    ASYNC_READ_VIEWS=True gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker --workers 3
+    python manage.py bench_http --base-url http://localhost:8000 --path /api/items/?limit=20 --path /api/categories
+"""
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("conexão encerrada pelo servidor")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        size = 0
+        while True:
+            chunk_len = int((await reader.readline()).split(b";")[0], 16)
+            if chunk_len == 0:
+                await reader.readline()
+                break
+            size += len(await reader.readexactly(chunk_len))
+            await reader.readline()
+    else:
+        size = len(await reader.readexactly(int(headers.get("content-length", "0"))))
+    return status, size, headers.get("connection", "").lower() == "close"
+
+
+class Command(BaseCommand):
+    help = "Mede requisições/s e latência (p50/p95/p99) de endpoints GET com conexões keep-alive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--path", action="append", dest="paths", help="Pode ser repetido")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=2000, help="Total por path")
+        parser.add_argument("--warmup", type=int, default=100)
+        parser.add_argument("--header", action="append", default=[], help="Ex.: 'Authorization: Bearer ...'")
+        parser.add_argument("--json", action="store_true", help="Saída em JSON")
+
+    def handle(self, *args, **opts):
+        base = urlsplit(opts["base_url"])
+        if base.scheme != "http":
+            raise CommandError("Apenas http:// é suportado (rode contra o backend, sem TLS).")
+        paths = opts["paths"] or ["/api/items/?limit=20", "/api/categories"]
+        results = []
+        for path in paths:
+            asyncio.run(self.run_load(base, path, opts["warmup"], opts["concurrency"], opts["header"]))
+            results.append(asyncio.run(
+                self.run_load(base, path, opts["requests"], opts["concurrency"], opts["header"])
+            ))
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for r in results:
+            self.stdout.write(
+                f"{r['path']}: {r['rps']:.1f} req/s | p50 {r['p50_ms']:.1f} ms | p95 {r['p95_ms']:.1f} ms | "
+                f"p99 {r['p99_ms']:.1f} ms | max {r['max_ms']:.1f} ms | erros {r['errors']} | "
+                f"{r['bytes_avg']} bytes/resp"
+            )
+
+    async def run_load(self, base, path, total, concurrency, extra_headers):
+        host, port = base.hostname, base.port or 80
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: {base.netloc}\r\nAccept: application/json\r\n"
+            + "".join(f"{h}\r\n" for h in extra_headers)
+            + "\r\n"
+        ).encode()
+        latencies, sizes = [], []
+        errors = 0
+        remaining = total
+
+        async def worker():
+            nonlocal errors, remaining
+            reader = writer = None
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    writer.write(request)
+                    status, size, close = await _read_response(reader)
+                    if close:
+                        writer.close()
+                        writer = None
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    errors += 1
+                    if writer is not None:
+                        writer.close()
+                    writer = None
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                sizes.append(size)
+                if status >= 400:
+                    errors += 1
+            if writer is not None:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+
+        def pct(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))]
+
+        return {
+            "path": path,
+            "requests": len(latencies),
+            "errors": errors,
+            "concurrency": concurrency,
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": latencies[-1] if latencies else 0.0,
+            "bytes_avg": int(sum(sizes) / len(sizes)) if sizes else 0,
+        }
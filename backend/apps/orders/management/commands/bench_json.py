@@ -0,0 +1,130 @@
+"""Micro-benchmark de serialização JSON: renderer padrão do DRF x orjson.
+
+Mede tempo de encode (e de parse) e pico de alocação (tracemalloc) sobre a
+saída de PedidoSerializer e ItemSerializer. Por padrão monta objetos em
+memória (não precisa de banco); com --source db usa os registros existentes.
+
+    python manage.py bench_json --orders 500 --items-per-order 4 --menu 120
+"""
+import datetime
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ...models import Item, Pedido, PedidoItem
+from ...renderers import ORJSONParser, ORJSONRenderer, orjson
+from ...serializers import ItemSerializer, PedidoSerializer
+
+
+def _fake_menu(count):
+    return [
+        Item(
+            id=i, sku=i, nome=f"Item {i} – especial", descricao="Pão, carne, queijo e molho da casa",
+            preco=Decimal("19.90") + i, categoria=("Hamburguer", "Drink", "Bebidas")[i % 3],
+            imagem_url=f"https://cdn.exemplo.com/itens/{i}.jpg", ativo=True,
+            estoque_inicial=200, vendidos=i,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _fake_orders(count, per_order, menu):
+    now = timezone.now()
+    orders = []
+    for n in range(1, count + 1):
+        pedido = Pedido(
+            id=n, cliente_nome=f"Cliente {n}", cliente_waid="5511999990000", valor_total=Decimal("0"),
+            status="pago", provider_payment_id=str(10_000 + n),
+            payment_link=f"https://www.mercadopago.com.br/checkout/v1/redirect?pref_id={n}",
+            observacoes="sem cebola" if n % 4 == 0 else "", precisa_embalagem=n % 2 == 0,
+            created_at=now - datetime.timedelta(minutes=n), paid_at=now,
+        )
+        itens = []
+        for k in range(per_order):
+            item = menu[(n + k) % len(menu)]
+            itens.append(PedidoItem(id=n * 100 + k, pedido=pedido, item=item, nome=item.nome, preco=item.preco, qtd=1 + k % 3))
+        pedido.valor_total = sum(i.preco * i.qtd for i in itens)
+        pedido._prefetched_objects_cache = {"itens": itens}
+        orders.append(pedido)
+    return orders
+
+
+def _measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), min(timings), peak
+
+
+class Command(BaseCommand):
+    help = "Compara tempo de encode/parse e alocações do JSONRenderer do DRF com o ORJSONRenderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=["memory", "db"], default="memory")
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument("--items-per-order", type=int, default=4)
+        parser.add_argument("--menu", type=int, default=120)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--json", action="store_true", help="Saída em JSON")
+
+    def handle(self, *args, **opts):
+        if orjson is None:
+            raise CommandError("orjson não está instalado; o ORJSONRenderer cairia no JSON do DRF.")
+
+        if opts["source"] == "db":
+            menu = list(Item.objects.all()[: opts["menu"]])
+            orders = list(Pedido.objects.prefetch_related("itens").order_by("-id")[: opts["orders"]])
+        else:
+            menu = _fake_menu(opts["menu"])
+            orders = _fake_orders(opts["orders"], opts["items_per_order"], menu)
+
+        datasets = {
+            "PedidoSerializer": PedidoSerializer(orders, many=True).data,
+            "ItemSerializer": ItemSerializer(menu, many=True).data,
+        }
+        encoders = {"drf": JSONRenderer(), "orjson": ORJSONRenderer()}
+        parsers = {"drf": JSONParser(), "orjson": ORJSONParser()}
+
+        results = []
+        for name, data in datasets.items():
+            payload = encoders["drf"].render(data)
+            if json.loads(payload) != json.loads(encoders["orjson"].render(data)):
+                raise CommandError(f"{name}: saídas divergentes entre os renderers")
+            for label, renderer in encoders.items():
+                median, best, peak = _measure(lambda: renderer.render(data), opts["repeat"])
+                results.append({
+                    "dataset": name, "op": "encode", "impl": label, "rows": len(data),
+                    "median_ms": round(median, 3), "min_ms": round(best, 3),
+                    "peak_kb": round(peak / 1024, 1), "bytes": len(payload),
+                })
+            for label, json_parser in parsers.items():
+                median, best, peak = _measure(lambda: json_parser.parse(io.BytesIO(payload)), opts["repeat"])
+                results.append({
+                    "dataset": name, "op": "parse", "impl": label, "rows": len(data),
+                    "median_ms": round(median, 3), "min_ms": round(best, 3),
+                    "peak_kb": round(peak / 1024, 1), "bytes": len(payload),
+                })
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for r in results:
+            self.stdout.write(
+                f"{r['dataset']:<17} {r['op']:<6} {r['impl']:<6} {r['rows']:>5} linhas | "
+                f"mediana {r['median_ms']:.3f} ms | min {r['min_ms']:.3f} ms | "
+                f"pico {r['peak_kb']:.1f} KiB | {r['bytes']} bytes"
+            )
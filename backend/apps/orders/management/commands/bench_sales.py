@@ -0,0 +1,126 @@
+"""Benchmark de aprovações concorrentes de pedidos com o mesmo item.
+
+Cria um item e N pedidos com ele, aprova todos em paralelo e mede
+aprovações/s nos dois modos:
+
+- legado: select_for_update no Item + save(update_fields=["vendidos"])
+  (como era feito em processar_webhook e PedidoView.status);
+- parcelas: UPDATE ... vendidos + n em uma parcela sorteada (apps.orders.sales).
+
+No fim confere o total vendido e apaga os dados criados. Rode contra o MySQL:
+no SQLite a trava é do banco inteiro e os dois modos ficam iguais.
+
+    python manage.py bench_sales --orders 400 --concurrency 16 --hold-ms 5
+"""
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from ... import sales
+from ...models import Item, Pedido, PedidoItem
+
+
+def approve_legacy(pedido_id):
+    itens = PedidoItem.objects.filter(pedido_id=pedido_id)
+    item_ids = [pi.item_id for pi in itens]
+    map_items = {it.id: it for it in Item.objects.select_for_update().filter(id__in=item_ids)}
+    for pi in itens:
+        it = map_items[pi.item_id]
+        it.vendidos = it.vendidos + pi.qtd
+        it.save(update_fields=["vendidos"])
+
+
+def approve_sharded(pedido_id):
+    sales.add_sales(sales.sold_quantities([pedido_id]))
+
+
+MODES = {"legado": approve_legacy, "parcelas": approve_sharded}
+
+
+class Command(BaseCommand):
+    help = "Mede aprovações/s com todos os pedidos disputando o mesmo item (legado x contador em parcelas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=400, help="Pedidos por modo")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--qtd", type=int, default=1, help="Unidades do item por pedido")
+        parser.add_argument("--hold-ms", type=float, default=0.0,
+                            help="Tempo extra dentro da transação (simula o resto da aprovação)")
+        parser.add_argument("--mode", choices=["both", *MODES], default="both")
+
+    def handle(self, *args, **opts):
+        if connection.vendor == "sqlite":
+            self.stderr.write("Aviso: no SQLite a trava é do banco inteiro; use o MySQL para comparar os modos.")
+        if opts["orders"] <= 0 or opts["concurrency"] <= 0:
+            raise CommandError("--orders e --concurrency devem ser positivos.")
+        modes = list(MODES) if opts["mode"] == "both" else [opts["mode"]]
+        for mode in modes:
+            self.run_mode(mode, opts)
+
+    def run_mode(self, mode, opts):
+        sku = 900_000_000 + random.randrange(1_000_000)
+        item = Item.objects.create(
+            sku=sku, nome=f"bench {mode}", preco=Decimal("10.00"), ativo=False, estoque_inicial=10**9
+        )
+        # bulk_create não dispara os signals (quadro da cozinha, versões no Redis)
+        pedidos = Pedido.objects.bulk_create(
+            [Pedido(cliente_nome="bench", valor_total=Decimal("10.00")) for _ in range(opts["orders"])]
+        )
+        if pedidos[0].pk is None:
+            pedidos = list(Pedido.objects.filter(cliente_nome="bench", status="aguardando pagamento").order_by("-id")[: opts["orders"]])
+        PedidoItem.objects.bulk_create(
+            [PedidoItem(pedido=p, item=item, nome=item.nome, preco=item.preco, qtd=opts["qtd"]) for p in pedidos]
+        )
+        approve = MODES[mode]
+        hold = opts["hold_ms"] / 1000
+        retries = 0
+        failed = 0
+
+        def one(pedido_id):
+            nonlocal retries, failed
+            start = time.perf_counter()
+            for attempt in range(5):
+                try:
+                    with transaction.atomic():
+                        Pedido.objects.select_for_update().filter(pk=pedido_id).exists()
+                        approve(pedido_id)
+                        Pedido.objects.filter(pk=pedido_id).update(status="pago", paid_at=timezone.now())
+                        if hold:
+                            time.sleep(hold)
+                    break
+                except OperationalError:
+                    # deadlock/lock wait timeout: conta e tenta de novo
+                    retries += 1
+                    time.sleep(0.01 * (attempt + 1))
+            else:
+                failed += 1
+            return (time.perf_counter() - start) * 1000
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=opts["concurrency"]) as executor:
+                latencies = sorted(executor.map(one, [p.pk for p in pedidos]))
+            elapsed = time.perf_counter() - started
+
+            item.refresh_from_db()
+            total = sales.current_vendidos(item)
+            approved = Pedido.objects.filter(pk__in=[p.pk for p in pedidos], status="pago").count()
+            expected = approved * opts["qtd"]
+            self.stdout.write(
+                f"{mode:>8}: {approved / elapsed:.1f} aprovações/s | p50 {statistics.median(latencies):.1f} ms | "
+                f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.1f} ms | retries {retries} | falhas {failed} | "
+                f"vendidos {total}/{expected}{'' if total == expected else ' (DIVERGENTE)'}"
+            )
+            if mode == "parcelas":
+                sales.fold()
+                item.refresh_from_db()
+                self.stdout.write(f"          após fold(): Item.vendidos = {item.vendidos}")
+        finally:
+            Pedido.objects.filter(pk__in=[p.pk for p in pedidos]).delete()
+            item.delete()
@@ -0,0 +1,158 @@
+"""Benchmark de partida a frio do backend: tempo até o primeiro 200 em /healthz.
+
+Sobe o gunicorn como o entrypoint.sh (gunicorn.conf.py), uma vez por rodada,
+com e sem GUNICORN_PRELOAD, e mede:
+
+- primeiro 200: do spawn até /healthz responder 200;
+- pronto: até /readyz responder 200 (aquecimento concluído, apps.orders.warmup);
+- todos os workers: até o último worker terminar o startup e aceitar conexões;
+- memória: PSS somada de master + workers depois da partida (o que os
+  workers compartilham por copy-on-write conta uma vez só).
+
+Com --tasks mede também os passos do entrypoint (`./entrypoint.sh tasks`):
+migrate + collectstatic a cada start (como antes) x com o carimbo de hash.
+
+    python manage.py bench_startup --runs 3 --workers 3 --tasks
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+MODES = {"sem-preload": "False", "preload": "True"}
+# uvicorn loga ao fim do lifespan.startup (aquecimento do warmup.py)
+WORKER_READY = re.compile(r"Application startup complete")
+
+
+class Command(BaseCommand):
+    help = "Mede a partida a frio (primeiro 200 em /healthz e /readyz) com e sem preload do app no gunicorn."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--workers", type=int, default=3)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--timeout", type=float, default=60.0, help="Desiste de uma rodada depois de N s")
+        parser.add_argument("--mode", choices=["both", *MODES], default="both")
+        parser.add_argument("--tasks", action="store_true", help="Mede também migrate/collectstatic do entrypoint")
+
+    def handle(self, *args, **opts):
+        if opts["runs"] <= 0 or opts["workers"] <= 0:
+            raise CommandError("--runs e --workers devem ser positivos.")
+        if opts["tasks"]:
+            self.bench_tasks(opts)
+        modes = list(MODES) if opts["mode"] == "both" else [opts["mode"]]
+        for mode in modes:
+            results = [self.run_server(mode, opts) for _ in range(opts["runs"])]
+            first = [r["first_200"] for r in results]
+            ready = [r["ready"] for r in results]
+            all_workers = [r["all_workers"] for r in results if r["all_workers"] is not None]
+            pss = [r["pss_mb"] for r in results if r["pss_mb"] is not None]
+            line = (
+                f"{mode:>11} | {opts['workers']} workers | primeiro 200 mediana {statistics.median(first):.2f}s "
+                f"(mín {min(first):.2f}s, máx {max(first):.2f}s)"
+            )
+            line += f" | pronto (/readyz) {statistics.median(ready):.2f}s"
+            if all_workers:
+                line += f" | todos os workers {statistics.median(all_workers):.2f}s"
+            if pss:
+                line += f" | PSS master+workers {statistics.median(pss):.1f} MB"
+            self.stdout.write(line)
+
+    def run_server(self, mode, opts) -> dict:
+        env = {
+            **os.environ,
+            "GUNICORN_PRELOAD": MODES[mode],
+            "GUNICORN_BIND": f"127.0.0.1:{opts['port']}",
+            "WEB_CONCURRENCY": str(opts["workers"]),
+        }
+        base = f"http://127.0.0.1:{opts['port']}"
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "core.asgi:application", "-c", "gunicorn.conf.py"],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        ready_at = []
+        log = []
+
+        def read_log():
+            for line in proc.stderr:
+                log.append(line)
+                if WORKER_READY.search(line):
+                    ready_at.append(time.perf_counter() - started)
+
+        reader = threading.Thread(target=read_log, daemon=True)
+        reader.start()
+        try:
+            deadline = started + opts["timeout"]
+
+            def wait_200(path):
+                while True:
+                    if proc.poll() is not None:
+                        raise CommandError(f"gunicorn saiu com código {proc.returncode}:\n{''.join(log[-20:])}")
+                    if time.perf_counter() > deadline:
+                        raise CommandError(f"sem 200 em {path} depois de {opts['timeout']}s:\n{''.join(log[-20:])}")
+                    try:
+                        with urllib.request.urlopen(base + path, timeout=1) as response:
+                            if response.status == 200:
+                                return time.perf_counter() - started
+                    except (urllib.error.URLError, ConnectionError, OSError):
+                        time.sleep(0.01)
+
+            first_200 = wait_200("/healthz")
+            ready = wait_200("/readyz")
+            while len(ready_at) < opts["workers"] and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            # deixa os workers terminarem de subir antes de medir a memória
+            time.sleep(1)
+            return {
+                "first_200": first_200,
+                "ready": ready,
+                "all_workers": ready_at[opts["workers"] - 1] if len(ready_at) >= opts["workers"] else None,
+                "pss_mb": self.pss_mb(proc.pid),
+            }
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def pss_mb(self, pid):
+        try:
+            import psutil
+
+            master = psutil.Process(pid)
+            procs = [master, *master.children(recursive=True)]
+            return sum(p.memory_full_info().pss for p in procs) / 1024 / 1024
+        except Exception:
+            # sem psutil ou sem PSS (fora do Linux)
+            return None
+
+    def bench_tasks(self, opts):
+        entrypoint = os.path.join(settings.BASE_DIR, "entrypoint.sh")
+        with tempfile.TemporaryDirectory() as stamps:
+            env = {**os.environ, "STARTUP_STAMP_DIR": stamps}
+            timings = {}
+            for label, force in (("sempre (antes)", "True"), ("com carimbo", "False")):
+                durations = []
+                for _ in range(opts["runs"]):
+                    started = time.perf_counter()
+                    subprocess.run(
+                        ["bash", entrypoint, "tasks"], cwd=settings.BASE_DIR, check=True,
+                        env={**env, "FORCE_STARTUP_TASKS": force}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    )
+                    durations.append(time.perf_counter() - started)
+                timings[label] = statistics.median(durations)
+            for label, seconds in timings.items():
+                self.stdout.write(f"{'entrypoint':>11} | migrate + collectstatic {label}: {seconds:.2f}s")
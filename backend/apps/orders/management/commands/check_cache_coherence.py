@@ -0,0 +1,111 @@
+"""Confere a coerência do cache_bus com vários processos lendo e um escrevendo.
+
+Cada leitor (processo separado, como um worker do gunicorn) lê sem parar o
+valor de um namespace de teste pelo cache de duas camadas; o escritor troca o
+valor de origem (uma chave no Redis, fazendo o papel do banco), chama
+invalidate() e anota o instante. Para cada escrita mede quanto tempo cada
+leitor levou para enxergar o valor novo e falha se passar de --max-stale-ms.
+
+    python manage.py check_cache_coherence --readers 6 --writes 50 --max-stale-ms 500
+"""
+import multiprocessing
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ...cache_bus import cache
+from ...redis_client import get_redis_client
+
+
+NAMESPACE = "coherence-check"
+SOURCE_KEY = "coherence-check:source"
+
+
+def load_source():
+    return int(get_redis_client().get(SOURCE_KEY) or 0)
+
+
+def reader(stop_at, queue):
+    """Devolve {valor: primeiro instante em que foi lido} e quantas leituras fez."""
+    # conexões herdadas do processo pai não podem ser usadas no filho
+    connections.close_all()
+    first_seen = {}
+    reads = 0
+    while time.time() < stop_at:
+        value = cache.get(NAMESPACE, "value", load_source)
+        reads += 1
+        first_seen.setdefault(value, time.time())
+    queue.put((os.getpid(), first_seen, reads, dict(cache.stats)))
+
+
+class Command(BaseCommand):
+    help = "Mede a janela de leitura desatualizada do cache_bus entre processos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writes", type=int, default=30)
+        parser.add_argument("--interval-ms", type=float, default=100.0, help="Tempo entre escritas")
+        parser.add_argument("--max-stale-ms", type=float, default=500.0)
+
+    def handle(self, *args, **opts):
+        try:
+            client = get_redis_client()
+            client.ping()
+        except Exception as exc:
+            raise CommandError(f"Redis indisponível: {exc}")
+        client.set(SOURCE_KEY, 0)
+        cache.invalidate(NAMESPACE)
+
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        interval = opts["interval_ms"] / 1000
+        # folga para os leitores assinarem o canal antes da primeira escrita
+        warmup = 1.5
+        stop_at = time.time() + warmup + opts["writes"] * interval + 2
+        connections.close_all()
+        procs = [ctx.Process(target=reader, args=(stop_at, queue)) for _ in range(opts["readers"])]
+        for proc in procs:
+            proc.start()
+
+        time.sleep(warmup)
+        written_at = {}
+        for value in range(1, opts["writes"] + 1):
+            client.set(SOURCE_KEY, value)
+            cache.invalidate(NAMESPACE)
+            written_at[value] = time.time()
+            time.sleep(interval)
+
+        results = [queue.get(timeout=stop_at - time.time() + 30) for _ in procs]
+        for proc in procs:
+            proc.join()
+
+        lags = []
+        missing = 0
+        for pid, first_seen, reads, stats in results:
+            for value, at in written_at.items():
+                # primeiro instante em que o leitor viu este valor ou um mais novo
+                seen = [t for v, t in first_seen.items() if v >= value]
+                if not seen:
+                    missing += 1
+                    continue
+                lags.append(max(0.0, min(seen) - at) * 1000)
+            self.stdout.write(
+                f"leitor {pid}: {reads} leituras | local {stats['local_hits']} | redis {stats['redis_hits']} | "
+                f"origem {stats['loads']}"
+            )
+
+        if not lags:
+            raise CommandError("Nenhuma escrita observada pelos leitores.")
+        lags.sort()
+        worst = lags[-1]
+        self.stdout.write(
+            f"janela de desatualização: p50 {statistics.median(lags):.1f} ms | "
+            f"p99 {lags[int(0.99 * (len(lags) - 1))]:.1f} ms | máx {worst:.1f} ms | não vistos {missing}"
+        )
+        client.delete(SOURCE_KEY)
+        if missing or worst > opts["max_stale_ms"]:
+            raise CommandError(f"Leituras desatualizadas além de {opts['max_stale_ms']:.0f} ms.")
+        self.stdout.write(self.style.SUCCESS("OK: nenhuma leitura desatualizada além do limite."))
@@ -0,0 +1,147 @@
+"""Confere o roteamento de leituras para a réplica (db_router) com dois SQLite.
+
+Roda só com DB_SQLITE_DIR (settings): o banco "default" e a "replica" são
+arquivos descartáveis nesse diretório. O comando migra o primário, cria dados
+de teste, "replica" copiando o arquivo e então faz requisições pelo stack
+inteiro (middlewares, views), contando as consultas em cada alias:
+
+- rota de relatório (/api/items/stock) lê da réplica; o cardápio dos clientes não;
+- depois de uma escrita, quem escreveu lê do primário e outro usuário continua
+  na réplica (e enxerga o valor antigo: a réplica está "atrasada");
+- passado DB_REPLICA_STICKY_S, quem escreveu volta para a réplica;
+- versão trocada há menos de DB_REPLICA_MAX_LAG_S: resposta montada no primário;
+- réplica que não conecta: a requisição responde 200 lendo do primário.
+
+    DB_SQLITE_DIR=/tmp/umadsede python manage.py check_replica_routing
+"""
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+
+from ... import db_router, versions
+from ...auth_utils import create_token, hash_password
+from ...models import DashboardUser, Item
+from ...redis_client import get_redis_client
+
+
+class Command(BaseCommand):
+    help = "Confere réplica, stickiness, janela de atraso e volta ao primário com dois SQLite (DB_SQLITE_DIR)."
+
+    def handle(self, *args, **opts):
+        if not settings.DB_SQLITE_DIR or not db_router.replica_enabled():
+            raise CommandError("Rode com DB_SQLITE_DIR=<diretório>: o comando apaga e recria os dois bancos.")
+        try:
+            get_redis_client().ping()
+        except Exception as exc:
+            raise CommandError(f"Redis indisponível (stickiness e versões usam o Redis): {exc}")
+        os.makedirs(settings.DB_SQLITE_DIR, exist_ok=True)
+        primary = connections["default"].settings_dict["NAME"]
+        replica = connections[db_router.REPLICA].settings_dict["NAME"]
+        connections.close_all()
+        for path in (primary, replica):
+            if os.path.exists(path):
+                os.remove(path)
+
+        call_command("migrate", verbosity=0)
+        writer = DashboardUser.objects.create(
+            username="replica-check-a", password_hash=hash_password("x"), allowed_routes=["estoque", "itens"]
+        )
+        reader = DashboardUser.objects.create(
+            username="replica-check-b", password_hash=hash_password("x"), allowed_routes=["estoque", "itens"]
+        )
+        item = Item.objects.create(sku=1, nome="Item de teste", preco="10.00", categoria="Teste", estoque_inicial=10)
+        as_writer = {"HTTP_AUTHORIZATION": f"Bearer {create_token(writer).key}"}
+        as_reader = {"HTTP_AUTHORIZATION": f"Bearer {create_token(reader).key}"}
+        get_redis_client().delete(db_router.sticky_key(writer.pk), db_router.sticky_key(reader.pk))
+        connections.close_all()
+        shutil.copy(primary, replica)  # "replicação"
+
+        client = Client()
+        self.failures = []
+
+        def stock_of(response):
+            for categoria in response.json()["categorias"]:
+                for it in categoria["itens"]:
+                    if it["id"] == item.pk:
+                        return it["estoque_inicial"]
+
+        with override_settings(DB_REPLICA_MAX_LAG_S=0, DB_REPLICA_STICKY_S=2):
+            # o cardápio também sobe o snapshot de categorias, que o cache_bus lê do primário
+            response, on_primary, on_replica = self.request(client, "get", "/api/items/", {})
+            self.verify("cardápio dos clientes lê do primário", response.status_code == 200 and on_primary and not on_replica)
+
+            response, on_primary, on_replica = self.request(client, "get", "/api/items/stock", as_reader)
+            self.verify("relatório lê da réplica", response.status_code == 200 and on_replica and not on_primary)
+
+            response, _, on_replica = self.request(
+                client, "post", "/api/items/bulk-stock", as_writer,
+                data={"changes": [{"id": item.pk, "estoque_inicial": 42}]}, content_type="application/json",
+            )
+            self.verify("escrita vai para o primário", response.status_code == 200 and not on_replica)
+
+            response, on_primary, on_replica = self.request(client, "get", "/api/items/stock", as_writer)
+            self.verify(
+                "quem escreveu lê o que escreveu (primário)",
+                on_primary and not on_replica and stock_of(response) == 42,
+            )
+            response, _, on_replica = self.request(client, "get", "/api/items/stock", as_reader)
+            self.verify(
+                "outro usuário segue na réplica (valor antigo)", on_replica and stock_of(response) == 10
+            )
+
+            time.sleep(settings.DB_REPLICA_STICKY_S + 0.2)
+            _, on_primary, on_replica = self.request(client, "get", "/api/items/stock", as_writer)
+            self.verify("stickiness expira", on_replica and not on_primary)
+
+        with override_settings(DB_REPLICA_MAX_LAG_S=30):
+            versions.bump(versions.CATALOG)
+            response, on_primary, on_replica = self.request(client, "get", "/api/items/stock", as_reader)
+            self.verify(
+                "versão recém-trocada é montada no primário",
+                on_primary and not on_replica and stock_of(response) == 42,
+            )
+
+        # réplica inalcançável: diretório que não existe
+        connections.close_all()
+        settings_dict = connections[db_router.REPLICA].settings_dict
+        settings_dict["NAME"] = os.path.join(settings.DB_SQLITE_DIR, "fora-do-ar", "replica.sqlite3")
+        db_router._replica_down_until = 0.0
+        try:
+            with override_settings(DB_REPLICA_MAX_LAG_S=0):
+                response, on_primary, _ = self.request(client, "get", "/api/items/stock", as_reader)
+            self.verify("réplica fora do ar: lê do primário", response.status_code == 200 and on_primary)
+        finally:
+            connections.close_all()
+            settings_dict["NAME"] = replica
+            db_router._replica_down_until = 0.0
+
+        if self.failures:
+            raise CommandError(f"{len(self.failures)} verificação(ões) falharam: {', '.join(self.failures)}")
+        self.stdout.write(self.style.SUCCESS("Roteamento para a réplica ok."))
+
+    def request(self, client, method, path, headers, **kwargs):
+        """(resposta, consultou o primário?, consultou a réplica?) — só consultas na tabela de itens."""
+        touched = {"default": False, db_router.REPLICA: False}
+
+        def watch(alias):
+            def wrapper(execute, sql, params, many, context):
+                touched[alias] = touched[alias] or "orders_item" in sql
+                return execute(sql, params, many, context)
+            return wrapper
+
+        # execute_wrapper não abre conexão (CaptureQueriesContext abriria a réplica fora do ar)
+        with connections["default"].execute_wrapper(watch("default")), \
+                connections[db_router.REPLICA].execute_wrapper(watch(db_router.REPLICA)):
+            response = getattr(client, method)(path, **headers, **kwargs)
+        return response, touched["default"], touched[db_router.REPLICA]
+
+    def verify(self, label, ok):
+        self.stdout.write(f"{'ok   ' if ok else 'FALHA'} {label}")
+        if not ok:
+            self.failures.append(label)
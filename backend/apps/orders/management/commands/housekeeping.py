@@ -0,0 +1,44 @@
+"""Limpeza periódica: tokens vencidos, presence:samples e arquivamento de eventos.
+
+    python manage.py housekeeping                 # uma rodada
+    python manage.py housekeeping --loop          # serviço worker (HOUSEKEEPING_INTERVAL s)
+"""
+import time
+import traceback
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ... import housekeeping
+
+
+class Command(BaseCommand):
+    help = "Apaga tokens vencidos, compacta presence:samples e arquiva eventos encerrados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Tokens por DELETE (TOKEN_PURGE_BATCH)")
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=None, help="Segundos entre rodadas (HOUSEKEEPING_INTERVAL)")
+        parser.add_argument("--skip-archive", action="store_true", help="Não arquiva pedidos de eventos encerrados")
+
+    def handle(self, *args, **opts):
+        interval = opts["interval"] or settings.HOUSEKEEPING_INTERVAL
+        while True:
+            try:
+                report = housekeeping.run(opts["batch_size"], archive=not opts["skip_archive"])
+            except Exception:
+                if not opts["loop"]:
+                    raise
+                # o serviço segue: banco ou Redis fora numa rodada não derruba o worker
+                self.stderr.write(f"rodada falhou:\n{traceback.format_exc()}")
+            else:
+                self.stdout.write(
+                    f"tokens apagados {report['tokens_deleted']} (restam {report['tokens_remaining']}) | "
+                    f"amostras removidas {report['samples_removed']} | "
+                    f"pedidos arquivados {report.get('orders_archived', '-')} | {report['duration_ms']} ms"
+                )
+            if not opts["loop"]:
+                return
+            close_old_connections()
+            time.sleep(interval)
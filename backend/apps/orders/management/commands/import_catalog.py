@@ -0,0 +1,56 @@
+"""Importa o cardápio de um arquivo CSV ou JSON, com upsert por sku (catalog_import).
+
+    python manage.py import_catalog cardapio.csv
+    python manage.py import_catalog cardapio.json --deactivate-missing
+    python manage.py import_catalog cardapio.csv --dry-run
+
+CSV: cabeçalho com `sku` e as colunas a gravar (nome, descricao, preco,
+categoria, imagem_url, ativo, estoque_inicial); separador `,`, `;` ou tab.
+JSON: lista de objetos com as mesmas chaves (ou {"items": [...]}).
+"""
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import catalog_import
+
+
+class Command(BaseCommand):
+    help = "Cria/atualiza itens do cardápio em lote a partir de CSV ou JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Arquivo .csv ou .json (- lê da entrada padrão)")
+        parser.add_argument("--format", choices=["csv", "json"], help="Padrão: pela extensão do arquivo")
+        parser.add_argument("--deactivate-missing", action="store_true", help="Desativa itens que não estão no arquivo")
+        parser.add_argument("--dry-run", action="store_true", help="Só valida e mostra o que mudaria")
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        fmt = opts["format"] or ("json" if path.lower().endswith(".json") else "csv")
+        try:
+            if path == "-":
+                text = sys.stdin.read()
+            else:
+                with open(path, encoding="utf-8-sig") as fh:
+                    text = fh.read()
+        except OSError as exc:
+            raise CommandError(f"Não foi possível ler {path}: {exc}")
+        try:
+            rows = catalog_import.parse_json(text) if fmt == "json" else catalog_import.parse_csv(text)
+            result = catalog_import.import_rows(
+                rows, deactivate_missing=opts["deactivate_missing"], dry_run=opts["dry_run"]
+            )
+        except catalog_import.CatalogImportError as exc:
+            raise CommandError(str(exc))
+        for error in result["errors"]:
+            sku = f" sku {error['sku']}" if "sku" in error else ""
+            self.stderr.write(f"linha {error['linha']}{sku}: {error['campo']}: {error['erro']}")
+        if result["errors"]:
+            raise CommandError(f"{len(result['errors'])} erro(s); nada foi gravado.")
+        prefix = "[dry-run] " if opts["dry_run"] else ""
+        self.stdout.write(
+            f"{prefix}{len(result['created'])} criados, {len(result['updated'])} atualizados, "
+            f"{len(result['unchanged'])} sem mudança, {len(result['deactivated'])} desativados "
+            f"({os.path.basename(path)})"
+        )
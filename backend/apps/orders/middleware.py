@@ -0,0 +1,211 @@
+import gzip
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from . import db_router, profiling, rate_limit
+from .auth_utils import authenticate_dashboard
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip
+    brotli = None
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+_accepts_br = re.compile(r"\bbr\b")
+_accepts_gzip = re.compile(r"\bgzip\b")
+
+
+class RequestMetricsMiddleware:
+    """Mede cada requisição (tempo total, banco, Redis, Mercado Pago e tamanho)
+    e adiciona o cabeçalho Server-Timing na resposta."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+
+        stats, token = profiling.begin_request()
+        profiler = profiling.start_profiler()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            wall = time.perf_counter() - start
+            profiling.end_request(token)
+            route = profiling.route_name(request)
+            profiling.finish_profiler(profiler, route, wall)
+        return self.finish(route, response, stats, wall)
+
+    async def __acall__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return await self.get_response(request)
+
+        stats, token = profiling.begin_request()
+        profiler = profiling.start_profiler()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            wall = time.perf_counter() - start
+            profiling.end_request(token)
+            route = profiling.route_name(request)
+            profiling.finish_profiler(profiler, route, wall)
+        return self.finish(route, response, stats, wall)
+
+    def finish(self, route, response, stats, wall):
+        profiling.record(route, stats, wall, profiling.response_size(response))
+        if settings.PROFILING_SERVER_TIMING:
+            response["Server-Timing"] = profiling.server_timing_header(stats, wall)
+        return response
+
+
+class RateLimitMiddleware:
+    """Aplica rate_limit às rotas públicas do cliente; a equipe autenticada passa direto."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        rule = rate_limit.match_rule(request) if settings.RATE_LIMIT_ENABLED else None
+        if rule is None or (rate_limit.has_bearer(request) and authenticate_dashboard(request)):
+            return self.get_response(request)
+        retry_after = rate_limit.check(request, rule)
+        if retry_after:
+            return self.rejected(retry_after)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        rule = rate_limit.match_rule(request) if settings.RATE_LIMIT_ENABLED else None
+        # o usuário fica em cache no request: a view não consulta o token de novo
+        if rule is None or (rate_limit.has_bearer(request) and await sync_to_async(authenticate_dashboard)(request)):
+            return await self.get_response(request)
+        retry_after = await rate_limit.acheck(request, rule)
+        if retry_after:
+            return self.rejected(retry_after)
+        return await self.get_response(request)
+
+    def rejected(self, retry_after):
+        response = JsonResponse(
+            {"detail": "Muitas requisições. Tente novamente em instantes.", "retry_after": retry_after},
+            status=429,
+        )
+        response["Retry-After"] = str(retry_after)
+        return response
+
+
+
+class ReplicaRoutingMiddleware:
+    """Leituras das rotas de DB_REPLICA_ROUTES na réplica (db_router), exceto
+    para quem da equipe escreveu há pouco; escritas da equipe marcam a stickiness."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not db_router.replica_enabled():
+            return self.get_response(request)
+        if request.method in SAFE_METHODS:
+            if not db_router.match_route(request):
+                return self.get_response(request)
+            user = authenticate_dashboard(request) if rate_limit.has_bearer(request) else None
+            if user and db_router.is_sticky(user.pk):
+                return self.get_response(request)
+            with db_router.use_replica():
+                return self.get_response(request)
+        response = self.get_response(request)
+        if response.status_code < 400 and rate_limit.has_bearer(request):
+            user = authenticate_dashboard(request)
+            if user:
+                db_router.mark_write(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        if not db_router.replica_enabled():
+            return await self.get_response(request)
+        if request.method in SAFE_METHODS:
+            if not db_router.match_route(request):
+                return await self.get_response(request)
+            user = await sync_to_async(authenticate_dashboard)(request) if rate_limit.has_bearer(request) else None
+            if user and await db_router.ais_sticky(user.pk):
+                return await self.get_response(request)
+            with db_router.use_replica():
+                return await self.get_response(request)
+        response = await self.get_response(request)
+        if response.status_code < 400 and rate_limit.has_bearer(request):
+            user = await sync_to_async(authenticate_dashboard)(request)
+            if user:
+                await db_router.amark_write(user.pk)
+        return response
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Comprime respostas GET grandes em brotli (se instalado e aceito) ou gzip.
+
+    Restrito a GET/HEAD para não comprimir respostas que ecoam segredos
+    (login/token) junto com entrada do usuário (BREACH).
+    """
+
+    def process_response(self, request, response):
+        if not settings.RESPONSE_COMPRESSION or request.method not in ("GET", "HEAD"):
+            return response
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if response.status_code != 200 or len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        content_type = response.get("Content-Type", "")
+        if not content_type.startswith(("application/json", "text/")):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if brotli is not None and _accepts_br.search(accept):
+            encoding = "br"
+            compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        elif _accepts_gzip.search(accept):
+            encoding = "gzip"
+            compressed = gzip.compress(response.content, compresslevel=settings.GZIP_LEVEL, mtime=0)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # o corpo mudou: ETag forte vira fraco (mesmo comportamento do GZipMiddleware)
+            response["ETag"] = "W/" + etag
+        return response
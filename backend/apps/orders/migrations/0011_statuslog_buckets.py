@@ -0,0 +1,33 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0010_pedido_antecipado"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="statuslog",
+            name="quando",
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name="StatusDurationBucket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hora", models.DateTimeField()),
+                ("etapa", models.CharField(max_length=32)),
+                ("faixa", models.PositiveSmallIntegerField()),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("soma_segundos", models.FloatField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("hora", "etapa", "faixa"), name="status_duration_bucket_unique"),
+                ],
+            },
+        ),
+    ]
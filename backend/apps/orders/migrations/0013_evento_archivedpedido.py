@@ -0,0 +1,75 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def assign_initial_event(apps, schema_editor):
+    Evento = apps.get_model("orders", "Evento")
+    Pedido = apps.get_model("orders", "Pedido")
+    evento = Evento.objects.create(nome="Evento inicial", ativo=True)
+    Pedido.objects.filter(evento__isnull=True).update(evento=evento)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0012_itemsalesshard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Evento",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("nome", models.CharField(max_length=120)),
+                ("ativo", models.BooleanField(db_index=True, default=True)),
+                ("aberto_em", models.DateTimeField(default=django.utils.timezone.now)),
+                ("encerrado_em", models.DateTimeField(blank=True, null=True)),
+                ("arquivado_em", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="pedido",
+            name="evento",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="pedidos",
+                to="orders.evento",
+            ),
+        ),
+        migrations.RunPython(assign_initial_event, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="ArchivedPedido",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("cliente_nome", models.CharField(max_length=120)),
+                ("cliente_waid", models.CharField(blank=True, max_length=20)),
+                ("valor_total", models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ("status", models.CharField(max_length=32)),
+                ("meio_pagamento", models.CharField(blank=True, max_length=60)),
+                ("provider_payment_id", models.CharField(blank=True, max_length=120)),
+                ("observacoes", models.TextField(blank=True)),
+                ("precisa_embalagem", models.BooleanField(default=False)),
+                ("antecipado", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField()),
+                ("paid_at", models.DateTimeField(blank=True, null=True)),
+                ("itens", models.JSONField(default=list)),
+                ("pagamento", models.JSONField(blank=True, null=True)),
+                ("historico", models.JSONField(default=list)),
+                ("archived_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "evento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="pedidos_arquivados",
+                        to="orders.evento",
+                    ),
+                ),
+            ],
+        ),
+    ]
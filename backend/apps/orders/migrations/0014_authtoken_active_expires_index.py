@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0013_evento_archivedpedido"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="authtoken",
+            index=models.Index(fields=["is_active", "expires_at"], name="orders_auth_token_active_exp"),
+        ),
+    ]
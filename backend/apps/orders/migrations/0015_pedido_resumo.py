@@ -0,0 +1,46 @@
+from django.db import migrations, models, transaction
+
+from apps.orders import order_snapshot
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_resumo(apps, schema_editor):
+    Pedido = apps.get_model("orders", "Pedido")
+    PedidoItem = apps.get_model("orders", "PedidoItem")
+    db = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        # lotes por id, cada um na sua transação: não segura a tabela inteira durante o evento
+        with transaction.atomic(using=db):
+            pedidos = list(
+                Pedido.objects.using(db).filter(id__gt=last_id).order_by("id").only("id")[:BACKFILL_BATCH_SIZE]
+            )
+            if not pedidos:
+                return
+            linhas = {p.id: [] for p in pedidos}
+            for pi in PedidoItem.objects.using(db).filter(pedido_id__in=linhas).order_by("id"):
+                linhas[pi.pedido_id].append((pi.item_id, pi.nome, pi.preco, pi.qtd))
+            for pedido in pedidos:
+                pedido.resumo = order_snapshot.build(linhas[pedido.id])
+            Pedido.objects.using(db).bulk_update(pedidos, ["resumo"])
+        last_id = pedidos[-1].id
+
+
+class Migration(migrations.Migration):
+    # o backfill confirma lote a lote
+    atomic = False
+
+    dependencies = [
+        ("orders", "0014_authtoken_active_expires_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pedido",
+            name="resumo",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_resumo, migrations.RunPython.noop),
+    ]
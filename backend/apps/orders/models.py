@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Item(models.Model):
     sku = models.PositiveIntegerField(unique=True)
@@ -17,6 +18,22 @@ class Item(models.Model):
         return max(self.estoque_inicial - self.vendidos, 0)
 
 
+class ItemSalesShard(models.Model):
+    """Parcela do contador de vendas de um item (apps.orders.sales).
+
+    Cada aprovação soma em uma parcela sorteada em vez de travar a linha do
+    Item; o total vendido é Item.vendidos + soma das parcelas.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="sales_shards")
+    shard = models.PositiveSmallIntegerField()
+    vendidos = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "shard"], name="item_sales_shard_unique"),
+        ]
+
+
 class CategoryOrder(models.Model):
     nome = models.CharField(max_length=120, unique=True)
     ordem = models.IntegerField(default=100)
@@ -27,6 +44,23 @@ class CategoryOrder(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.ordem})"
 
+class Evento(models.Model):
+    """Edição/sessão de vendas. Só um evento fica ativo; as consultas do dia a dia
+    olham apenas para os pedidos dele e eventos encerrados vão para o arquivo."""
+    nome = models.CharField(max_length=120)
+    ativo = models.BooleanField(default=True, db_index=True)
+    aberto_em = models.DateTimeField(default=timezone.now)
+    encerrado_em = models.DateTimeField(null=True, blank=True)
+    # preenchido quando todos os pedidos já foram para ArchivedPedido
+    arquivado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return self.nome
+
+
 class Pedido(models.Model):
     STATUS = [
         ("aguardando pagamento","aguardando pagamento"),
@@ -49,6 +83,9 @@ class Pedido(models.Model):
     antecipado = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     paid_at = models.DateTimeField(null=True, blank=True)
+    evento = models.ForeignKey(Evento, null=True, blank=True, on_delete=models.PROTECT, related_name="pedidos")
+    # itens e totais gravados na criação (order_snapshot.py); leituras não juntam PedidoItem
+    resumo = models.JSONField(default=dict, blank=True)
 
 class PedidoItem(models.Model):
     pedido = models.ForeignKey(Pedido, related_name="itens", on_delete=models.CASCADE)
@@ -61,7 +98,23 @@ class StatusLog(models.Model):
     pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE)
     de = models.CharField(max_length=32, blank=True)
     para = models.CharField(max_length=32)
-    quando = models.DateTimeField(auto_now_add=True)
+    # gravado em lote (status_log.py): o instante vem da transição, não do insert
+    quando = models.DateTimeField(default=timezone.now, db_index=True)
+
+
+class StatusDurationBucket(models.Model):
+    """Histograma por hora do tempo que os pedidos passam em cada status."""
+    hora = models.DateTimeField()
+    etapa = models.CharField(max_length=32)
+    # índice da faixa em status_log.DURATION_BUCKETS_S
+    faixa = models.PositiveSmallIntegerField()
+    total = models.PositiveIntegerField(default=0)
+    soma_segundos = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["hora", "etapa", "faixa"], name="status_duration_bucket_unique"),
+        ]
 
 class Pagamento(models.Model):
     pedido = models.OneToOneField(Pedido, on_delete=models.CASCADE)
@@ -99,7 +152,32 @@ class AuthToken(models.Model):
     ip_address = models.CharField(max_length=64, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["key", "is_active"])]
+        indexes = [
+            models.Index(fields=["key", "is_active"]),
+            # contagens de sessões ativas em admin_metrics varrem só os tokens válidos
+            models.Index(fields=["is_active", "expires_at"], name="orders_auth_token_active_exp"),
+        ]
 
     def __str__(self):
         return f"token:{self.user.username}:{self.key[:6]}"
+
+
+class ArchivedPedido(models.Model):
+    """Pedido de evento encerrado, com itens, pagamento e histórico desnormalizados."""
+    id = models.BigIntegerField(primary_key=True)
+    evento = models.ForeignKey(Evento, on_delete=models.PROTECT, related_name="pedidos_arquivados")
+    cliente_nome = models.CharField(max_length=120)
+    cliente_waid = models.CharField(max_length=20, blank=True)
+    valor_total = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    status = models.CharField(max_length=32)
+    meio_pagamento = models.CharField(max_length=60, blank=True)
+    provider_payment_id = models.CharField(max_length=120, blank=True)
+    observacoes = models.TextField(blank=True)
+    precisa_embalagem = models.BooleanField(default=False)
+    antecipado = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    paid_at = models.DateTimeField(null=True, blank=True)
+    itens = models.JSONField(default=list)
+    pagamento = models.JSONField(null=True, blank=True)
+    historico = models.JSONField(default=list)
+    archived_at = models.DateTimeField(default=timezone.now)
@@ -0,0 +1,33 @@
+"""Resumo desnormalizado do pedido (`Pedido.resumo`).
+
+As linhas de PedidoItem já copiam nome/preço na criação e não mudam depois,
+então o pedido guarda, uma vez, a lista pronta para a API (mesmo formato do
+PedidoItemSerializer) e os totais. Listagem e detalhe servem o resumo sem
+consultar PedidoItem; pedido sem resumo (criado antes da migração ou por
+bulk_create) cai para as linhas.
+
+Este módulo não importa os models: a migração de backfill usa `build` com os
+models históricos.
+"""
+from decimal import Decimal
+
+
+CENTS = Decimal("0.01")
+
+
+def build(lines) -> dict:
+    """Resumo a partir de (item_id, nome, preco, qtd) na ordem de criação das linhas."""
+    itens = []
+    total = Decimal("0.00")
+    unidades = 0
+    for item_id, nome, preco, qtd in lines:
+        preco = Decimal(str(preco)).quantize(CENTS)
+        itens.append({"item": item_id, "nome": nome, "preco": str(preco), "qtd": qtd})
+        total += preco * qtd
+        unidades += qtd
+    return {"itens": itens, "total": str(total.quantize(CENTS)), "unidades": unidades}
+
+
+def from_pedido(pedido) -> dict:
+    """Resumo montado das linhas já gravadas (usa o prefetch de `itens`, se houver)."""
+    return build((pi.item_id, pi.nome, pi.preco, pi.qtd) for pi in pedido.itens.all())
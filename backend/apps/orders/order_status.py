@@ -0,0 +1,251 @@
+"""Status resumido por pedido para quem espera (Status.tsx, CheckoutModal).
+
+Em vez de buscar o pedido inteiro (PedidoSerializer com itens) a cada 4 s, o
+cliente chama GET /api/orders/<id>/watch?since=<v>, que só responde quando o
+status mudar ou depois de ORDER_STATUS_WAIT_S s:
+
+- o estado fica no hash `orders:state:<id>` (status, paid_at, pagamento),
+  gravado depois do commit pelos signals de Pedido/Pagamento e pelo
+  bulk-status; sem o hash (pedido antigo, TTL), é montado uma vez do banco;
+- cada escrita publica o id no canal `orders:status`; cada processo tem uma
+  única assinatura (`OrderStatusHub`) que acorda só os clientes daquele pedido;
+- `v` é um hash do conteúdo, então qualquer worker calcula o mesmo valor.
+
+Sem Redis, a view lê do banco e segura a resposta por ORDER_STATUS_FALLBACK_S s.
+"""
+import asyncio
+import hashlib
+
+from asgiref.sync import sync_to_async
+
+from .models import Pedido
+from .redis_client import get_async_redis_client, get_redis_client
+from .versions import ORDER_TTL
+
+
+CHANNEL = "orders:status"
+FIELDS = ("status", "paid_at", "pagamento")
+
+
+def state_key(pk) -> str:
+    return f"orders:state:{pk}"
+
+
+def _encode(fields: dict) -> dict:
+    encoded = {}
+    for name, value in fields.items():
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        encoded[name] = "" if value is None else str(value)
+    return encoded
+
+
+def publish(pk, **fields):
+    """Grava os campos conhecidos do pedido e avisa quem espera (chamar após o commit)."""
+    publish_many({pk: fields})
+
+
+def publish_many(changes: dict):
+    """{pk: {campo: valor}} em uma ida ao Redis."""
+    if not changes:
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for pk, fields in changes.items():
+            pipe.hset(state_key(pk), mapping=_encode(fields))
+            pipe.expire(state_key(pk), ORDER_TTL)
+            pipe.publish(CHANNEL, str(pk))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def forget(pk):
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.delete(state_key(pk))
+        pipe.publish(CHANNEL, str(pk))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def load(pk):
+    """Campos do pedido direto do banco (uma consulta, sem itens); None se não existir."""
+    row = Pedido.objects.filter(pk=pk).values("status", "paid_at", "pagamento__status").first()
+    if row is None:
+        return None
+    return _encode({"status": row["status"], "paid_at": row["paid_at"], "pagamento": row["pagamento__status"]})
+
+
+def payload(pk, state: dict) -> dict:
+    version = hashlib.sha1("|".join(state.get(name, "") for name in FIELDS).encode()).hexdigest()[:12]
+    return {
+        "id": int(pk),
+        "status": state.get("status"),
+        "paid_at": state.get("paid_at") or None,
+        "pagamento": state.get("pagamento") or None,
+        "v": version,
+    }
+
+
+async def aread(pk):
+    """Estado atual do pedido (do Redis, completando pelo banco) ou None se não existir.
+    Propaga erros do Redis para a view decidir o fallback."""
+    client = get_async_redis_client()
+    raw = await client.hgetall(state_key(pk))
+    state = {k.decode(): v.decode() for k, v in raw.items()}
+    if all(name in state for name in FIELDS):
+        return state
+    loaded = await sync_to_async(load)(pk)
+    if loaded is None:
+        return None
+    # HSETNX: um signal que escreveu depois da leitura do banco não é sobrescrito
+    pipe = client.pipeline(transaction=False)
+    for name, value in loaded.items():
+        pipe.hsetnx(state_key(pk), name, value)
+    pipe.expire(state_key(pk), ORDER_TTL)
+    await pipe.execute()
+    return {**loaded, **state}
+
+
+class OrderStatusHub:
+    """Uma assinatura de `orders:status` por event loop, repartida entre os clientes em espera.
+
+    A cada aviso, o estado do pedido é lido uma vez e entregue a todos os que
+    esperam por ele; a leitura inicial de quem chega junto também é dividida.
+    Assim o número de idas ao Redis não cresce com o de clientes esperando
+    (o pool async tem 100 conexões).
+    """
+
+    def __init__(self):
+        self.waiters = {}
+        self.inflight = {}
+        self.reading = set()
+        self.dirty = set()
+        self.subscribed = asyncio.Event()
+        self.task = None
+
+    def watch(self, pk) -> asyncio.Future:
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._listen())
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(str(pk), set()).add(future)
+        return future
+
+    def unwatch(self, pk, future):
+        waiting = self.waiters.get(str(pk))
+        if waiting is not None:
+            waiting.discard(future)
+            if not waiting:
+                del self.waiters[str(pk)]
+
+    def _read(self, pk):
+        """Leitura compartilhada pelos que chegam ao mesmo tempo para o mesmo pedido."""
+        task = self.inflight.get(pk)
+        if task is None:
+            task = self.inflight[pk] = asyncio.ensure_future(aread(pk))
+
+            def done(_):
+                if self.inflight.get(pk) is task:
+                    del self.inflight[pk]
+            task.add_done_callback(done)
+        return asyncio.shield(task)
+
+    def _changed(self, pk):
+        # leitura iniciada antes do aviso não serve para quem chegar depois dele
+        self.inflight.pop(pk, None)
+        if pk not in self.waiters:
+            return
+        if pk in self.reading:
+            # leitura em andamento pode ter pego o estado anterior: lê de novo ao terminar
+            self.dirty.add(pk)
+            return
+        self.reading.add(pk)
+        asyncio.ensure_future(self._refresh(pk))
+
+    async def _refresh(self, pk):
+        try:
+            while True:
+                self.dirty.discard(pk)
+                try:
+                    result = await aread(pk)
+                except Exception as exc:
+                    result = exc
+                for future in self.waiters.pop(pk, ()):
+                    if not future.done():
+                        if isinstance(result, Exception):
+                            future.set_exception(result)
+                        else:
+                            future.set_result(result)
+                if pk not in self.dirty:
+                    return
+        finally:
+            self.reading.discard(pk)
+
+    async def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_async_redis_client().pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(CHANNEL)
+                self.subscribed.set()
+                # avisos perdidos enquanto desconectado: todos recebem o estado atual
+                for pk in list(self.waiters):
+                    self._changed(pk)
+                while True:
+                    message = await pubsub.get_message(timeout=15.0)
+                    if message is None:
+                        # conexão morta sem erro não entrega avisos: o PING força a falha
+                        await pubsub.ping()
+                    elif message.get("type") == "message":
+                        self._changed(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.subscribed.clear()
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    async def wait(self, pk, since, timeout):
+        """Estado do pedido assim que o `v` for diferente de `since` (ou no timeout)."""
+        future = self.watch(pk)
+        try:
+            # espera a assinatura antes de ler: mudança entre a leitura e o aviso não se perde
+            try:
+                await asyncio.wait_for(self.subscribed.wait(), 1)
+            except asyncio.TimeoutError:
+                raise ConnectionError("assinatura de orders:status indisponível")
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            state = await self._read(str(pk))
+            while state is not None and payload(pk, state)["v"] == since:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    state = await asyncio.wait_for(asyncio.shield(future), remaining)
+                except asyncio.TimeoutError:
+                    break
+                # entregue pelo _refresh; a próxima espera precisa de outro future
+                future = self.watch(pk)
+            return state
+        finally:
+            self.unwatch(pk, future)
+
+
+_hub = None
+
+
+def get_hub() -> OrderStatusHub:
+    """Hub do event loop corrente (a assinatura fica presa ao loop, como o cliente async)."""
+    global _hub
+    loop = asyncio.get_running_loop()
+    if _hub is None or _hub[0] is not loop:
+        _hub = (loop, OrderStatusHub())
+    return _hub[1]
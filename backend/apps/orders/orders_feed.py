@@ -0,0 +1,160 @@
+"""Distribuição dos eventos de pedidos (grupo "orders") aos sockets de ws/orders.
+
+As views continuam com `group_send("orders", {"type": "orders.event", ...})`.
+Do lado dos sockets, cada processo tem um único `OrdersFeed`, inscrito uma vez
+no grupo; o evento chega uma vez, é codificado uma vez em JSON compacto e o
+texto pronto vai para cada OrdersConsumer local.
+
+Cada socket tem sua fila de pendentes, com contrapressão: enquanto o envio
+anterior não terminou (TV em Wi-Fi ruim, aba em segundo plano), os eventos
+novos são juntados, um por pedido com os campos mais recentes, e saem numa
+só mensagem `orders_updated`. Com mais de ORDERS_WS_MAX_PENDING pedidos
+pendentes, a fila vira um único `{"event": "resync"}`; as telas recarregam o
+quadro a cada mensagem de qualquer forma.
+"""
+import asyncio
+import json
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+
+GROUP = "orders"
+RESYNC = {"event": "resync"}
+
+
+def encode(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class Subscriber:
+    """Fila de um socket: o último evento inteiro (texto já codificado) ou os pedidos juntados."""
+
+    def __init__(self, send_text, stats):
+        self.send_text = send_text
+        self.stats = stats
+        self.single = None      # (dados, texto) do único evento pendente
+        self.orders = {}        # id -> campos, quando há mais de um pendente
+        self.resync = False
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run())
+
+    def push(self, data, text):
+        if self.resync:
+            self.stats["coalesced"] += 1
+        elif self.single is None and not self.orders:
+            self.single = (data, text)
+        else:
+            if self.single is not None:
+                self._merge(self.single[0])
+                self.single = None
+            self._merge(data)
+            self.stats["coalesced"] += 1
+            if len(self.orders) > settings.ORDERS_WS_MAX_PENDING:
+                self.orders.clear()
+                self.resync = True
+                self.stats["resyncs"] += 1
+        self.wakeup.set()
+
+    def _merge(self, data):
+        entries = data.get("orders")
+        if entries is None:
+            entries = [data] if "id" in data else None
+        if entries is None:
+            # evento sem pedido (orders_reset): tudo o que estava pendente perde o sentido
+            self.orders.clear()
+            self.resync = True
+            return
+        for entry in entries:
+            fields = {k: v for k, v in entry.items() if k != "event"}
+            self.orders.setdefault(fields.get("id"), {}).update(fields)
+
+    def _take(self):
+        if self.resync:
+            self.resync = False
+            return encode(RESYNC)
+        if self.single is not None:
+            text, self.single = self.single[1], None
+            return text
+        if self.orders:
+            orders, self.orders = list(self.orders.values()), {}
+            return encode({"event": "orders_updated", "orders": orders})
+        return None
+
+    async def _run(self):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            text = self._take()
+            if text is not None:
+                # socket lento segura aqui; o que chegar enquanto isso é juntado em push()
+                await self.send_text(text)
+                self.stats["sent"] += 1
+                if self.single is not None or self.orders or self.resync:
+                    self.wakeup.set()
+
+    def close(self):
+        self.task.cancel()
+
+
+class OrdersFeed:
+    """Inscrição do processo no grupo "orders", repartida entre os sockets locais."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+        self.stats = {"events": 0, "sent": 0, "coalesced": 0, "resyncs": 0}
+
+    def subscribe(self, send_text) -> Subscriber:
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._receive())
+        subscriber = Subscriber(send_text, self.stats)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        subscriber.close()
+
+    async def _receive(self):
+        layer = get_channel_layer()
+        while True:
+            channel = None
+            try:
+                channel = await layer.new_channel()
+                await layer.group_add(GROUP, channel)
+                while True:
+                    message = await layer.receive(channel)
+                    if message.get("type") != "orders.event":
+                        continue
+                    data = message.get("data", {})
+                    text = encode(data)
+                    self.stats["events"] += 1
+                    for subscriber in list(self.subscribers):
+                        subscriber.push(data, text)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Redis fora: eventos desse intervalo se perdem; as telas também recarregam por timer
+                await asyncio.sleep(1)
+            finally:
+                if channel is not None:
+                    try:
+                        await layer.group_discard(GROUP, channel)
+                    except Exception:
+                        pass
+
+    def snapshot(self) -> dict:
+        return {"sockets": len(self.subscribers), **self.stats}
+
+
+_feed = None
+
+
+def get_feed() -> OrdersFeed:
+    """Feed do event loop corrente (a inscrição no channel layer é por loop)."""
+    global _feed
+    loop = asyncio.get_running_loop()
+    if _feed is None or _feed[0] is not loop:
+        _feed = (loop, OrdersFeed())
+    return _feed[1]
@@ -0,0 +1,189 @@
+"""Presença de clientes e da equipe, por WebSocket com o heartbeat HTTP de reserva.
+
+- WebSocket `ws/presence` (PresenceConsumer): cada processo guarda as sessões
+  conectadas a ele no hash `presence:ws:<processo>:<tipo>`, escrito só quando
+  a sessão entra (primeira aba naquele processo) ou sai (última aba). Os pings
+  do cliente só mantêm a conexão viva nos proxies e não tocam no Redis.
+- O processo renova o lease `presence:proc:<processo>` a cada terço de
+  PRESENCE_PROCESS_TTL; se o worker morrer sem desconectar ninguém, o lease
+  expira e os leitores descartam as sessões dele. A renovação também regrava
+  o hash se ele não bater com as conexões abertas (Redis reiniciado, falha
+  num join/leave).
+- Heartbeat HTTP (POST /api/presence), para quem não conectar o WebSocket:
+  `presence:<tipo>:<sessão>` com TTL, como antes.
+
+As métricas contam a união das duas fontes, sem repetir a mesma sessão.
+"""
+import asyncio
+import json
+import os
+import socket
+
+from django.conf import settings
+from django.utils import timezone
+
+from .redis_client import get_async_redis_client, get_redis_client
+
+
+PROCS_KEY = "presence:procs"
+KINDS = ("client", "admin")
+
+
+def process_id() -> str:
+    # calculado a cada uso: o pid muda depois do fork dos workers
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def http_key(kind, session_id) -> str:
+    return f"presence:{kind}:{session_id}"
+
+
+def socket_key(proc, kind) -> str:
+    return f"presence:ws:{proc}:{kind}"
+
+
+def lease_key(proc) -> str:
+    return f"presence:proc:{proc}"
+
+
+def parse_presence_request(data):
+    """Valida session_id/source/ttl do heartbeat; None se o session_id for inválido."""
+    session_id = (data.get("session_id") or "").strip()
+    source = (data.get("source") or "client").strip().lower()
+    if source not in {"client", "admin"}:
+        source = "client"
+
+    if not session_id or len(session_id) > 128:
+        return None
+
+    ttl_request = data.get("ttl")
+    try:
+        ttl = int(ttl_request)
+    except (TypeError, ValueError):
+        ttl = 90
+    ttl = max(30, min(300, ttl))
+    return source, session_id, ttl
+
+
+class SocketPresence:
+    """Conexões de presença abertas neste processo: (tipo, sessão) -> abas."""
+
+    def __init__(self):
+        self.connections = {}
+        self.payloads = {}
+        self._lease = None
+
+    def _ensure_lease(self):
+        loop = asyncio.get_running_loop()
+        if self._lease is None or self._lease[0] is not loop or self._lease[1].done():
+            self._lease = (loop, asyncio.ensure_future(self._renew_forever()))
+
+    async def join(self, kind, session_id, payload):
+        key = (kind, session_id)
+        self._ensure_lease()
+        opened = self.connections.get(key, 0)
+        self.connections[key] = opened + 1
+        if opened:
+            return
+        self.payloads[key] = payload
+        try:
+            client = get_async_redis_client()
+            pipe = client.pipeline(transaction=False)
+            pipe.hset(socket_key(process_id(), kind), session_id, json.dumps(payload))
+            pipe.set(lease_key(process_id()), 1, ex=settings.PRESENCE_PROCESS_TTL)
+            pipe.sadd(PROCS_KEY, process_id())
+            await pipe.execute()
+        except Exception:
+            # a próxima renovação do lease corrige o hash
+            pass
+
+    async def leave(self, kind, session_id):
+        key = (kind, session_id)
+        remaining = self.connections.get(key, 0) - 1
+        if remaining > 0:
+            self.connections[key] = remaining
+            return
+        self.connections.pop(key, None)
+        self.payloads.pop(key, None)
+        try:
+            await get_async_redis_client().hdel(socket_key(process_id(), kind), session_id)
+        except Exception:
+            pass
+
+    async def renew(self):
+        client = get_async_redis_client()
+        proc = process_id()
+        pipe = client.pipeline(transaction=False)
+        pipe.set(lease_key(proc), 1, ex=settings.PRESENCE_PROCESS_TTL)
+        pipe.sadd(PROCS_KEY, proc)
+        for kind in KINDS:
+            pipe.hlen(socket_key(proc, kind))
+        _, _, *stored = await pipe.execute()
+        for kind, count in zip(KINDS, stored):
+            sessions = {sid: self.payloads[(k, sid)] for k, sid in self.connections if k == kind}
+            if count == len(sessions):
+                continue
+            pipe = client.pipeline(transaction=True)
+            pipe.delete(socket_key(proc, kind))
+            if sessions:
+                pipe.hset(socket_key(proc, kind), mapping={sid: json.dumps(p) for sid, p in sessions.items()})
+            await pipe.execute()
+
+    async def _renew_forever(self):
+        while True:
+            try:
+                await self.renew()
+            except Exception:
+                pass
+            await asyncio.sleep(settings.PRESENCE_PROCESS_TTL / 3)
+
+
+tracker = SocketPresence()
+
+
+def socket_sessions(kind) -> dict:
+    """{sessão: payload} das conexões WebSocket em todos os processos vivos."""
+    client = get_redis_client()
+    procs = sorted(p.decode() for p in client.smembers(PROCS_KEY))
+    if not procs:
+        return {}
+    pipe = client.pipeline(transaction=False)
+    for proc in procs:
+        pipe.exists(lease_key(proc))
+    alive = [proc for proc, exists in zip(procs, pipe.execute()) if exists]
+    dead = [proc for proc in procs if proc not in alive]
+    if dead:
+        # worker morto sem desconectar: as sessões dele saem junto com o registro
+        pipe = client.pipeline(transaction=False)
+        for proc in dead:
+            pipe.delete(*(socket_key(proc, k) for k in KINDS))
+        pipe.srem(PROCS_KEY, *dead)
+        pipe.execute()
+    pipe = client.pipeline(transaction=False)
+    for proc in alive:
+        pipe.hgetall(socket_key(proc, kind))
+    sessions = {}
+    for raw in pipe.execute():
+        for sid, data in raw.items():
+            try:
+                payload = json.loads(data)
+            except (ValueError, TypeError):
+                payload = {}
+            sid = sid.decode()
+            # mesma sessão em dois workers (abas diferentes): vale a entrada mais antiga
+            if sid not in sessions or payload.get("first_seen", "") < sessions[sid].get("first_seen", ""):
+                sessions[sid] = payload
+    return sessions
+
+
+def socket_payload(scope, source) -> dict:
+    headers = dict(scope.get("headers") or [])
+    now = timezone.now().isoformat()
+    return {
+        "source": source,
+        "ip": (scope.get("client") or [""])[0],
+        "user_agent": headers.get(b"user-agent", b"").decode("latin-1")[:255],
+        "first_seen": now,
+        "timestamp": now,
+        "transport": "ws",
+    }
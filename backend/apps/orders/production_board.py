@@ -0,0 +1,237 @@
+"""Quadro de produção da cozinha materializado no Redis.
+
+Para cada pedido em aberto guarda o JSON do card (`board:orders`), uma fila
+ordenada por criação por status (`board:queue:<status>`) e, para os status
+que ainda precisam ir para a chapa, o total de unidades por item
+(`board:units:<status>`). Cada save de Pedido (signals.py) sincroniza só
+aquele pedido: a contribuição antiga (lida do próprio JSON guardado) sai e a
+nova entra, então reaplicar o mesmo pedido não duplica contagem.
+
+A tela da cozinha lê tudo em um único pipeline, sem tocar na tabela de
+pedidos. Se o quadro não existir (Redis reiniciado, reset de vendas) ele é
+reconstruído a partir do banco; a cada REBUILD_INTERVAL também, por segurança.
+"""
+import json
+
+import redis
+from django.db.models import Prefetch
+
+from .models import Pedido, PedidoItem
+from .redis_client import get_redis_client
+from .serializers import PedidoSerializer
+
+
+OPEN_STATUSES = ("pago", "a preparar", "em produção", "pronto")
+# status cujos itens ainda precisam ser produzidos
+PREPARE_STATUSES = ("pago", "a preparar", "em produção")
+# campos de Pedido exibidos no card; saves só de outros campos não mexem no quadro
+BOARD_FIELDS = {"status", "cliente_nome", "observacoes", "precisa_embalagem", "antecipado", "paid_at"}
+REBUILD_INTERVAL = 300
+
+ORDERS_KEY = "board:orders"
+ITEMS_KEY = "board:items"
+BUILT_KEY = "board:built"
+
+
+def queue_key(status: str) -> str:
+    return f"board:queue:{status}"
+
+
+def units_key(status: str) -> str:
+    return f"board:units:{status}"
+
+
+ALL_KEYS = (
+    ORDERS_KEY,
+    ITEMS_KEY,
+    BUILT_KEY,
+    *(queue_key(s) for s in OPEN_STATUSES),
+    *(units_key(s) for s in PREPARE_STATUSES),
+)
+
+
+def _orders_queryset():
+    # só o evento ativo: pedidos de eventos encerrados saem do quadro
+    return Pedido.objects.filter(evento__ativo=True).prefetch_related(
+        Prefetch("itens", queryset=PedidoItem.objects.select_related("item").order_by("id"))
+    )
+
+
+def order_entry(pedido) -> dict:
+    """Card do pedido: mesmo formato do PedidoSerializer, com a categoria em cada item."""
+    data = PedidoSerializer(pedido).data
+    # cópias: os itens podem ser os dicts do próprio Pedido.resumo
+    data["itens"] = [
+        {**item_data, "categoria": pi.item.categoria or "Outros"}
+        for item_data, pi in zip(data["itens"], pedido.itens.all())
+    ]
+    data["score"] = pedido.created_at.timestamp() if pedido.created_at else 0
+    return data
+
+
+def _write_entry(pipe, entry, sign: int):
+    """Soma (sign=1) ou remove (sign=-1) a contribuição de `entry` no quadro."""
+    status = entry["status"]
+    pk = entry["id"]
+    if sign > 0:
+        pipe.hset(ORDERS_KEY, pk, json.dumps(entry))
+        pipe.zadd(queue_key(status), {pk: entry["score"]})
+    else:
+        pipe.zrem(queue_key(status), pk)
+    if status in PREPARE_STATUSES:
+        for it in entry["itens"]:
+            pipe.hincrby(units_key(status), it["item"], sign * int(it["qtd"]))
+            if sign > 0:
+                pipe.hset(ITEMS_KEY, it["item"], json.dumps({"nome": it["nome"], "categoria": it["categoria"]}))
+
+
+def sync_order(pk):
+    """Leva o quadro ao estado atual do pedido `pk` no banco (chamar após o commit)."""
+    sync_orders([pk])
+
+
+def sync_orders(pks):
+    """Mesmo que sync_order para vários pedidos, com uma consulta e uma transação no Redis."""
+    pks = list(dict.fromkeys(int(pk) for pk in pks))
+    if not pks:
+        return
+    try:
+        client = get_redis_client()
+        with client.pipeline() as pipe:
+            for _ in range(5):
+                try:
+                    pipe.watch(ORDERS_KEY)
+                    # lido depois do WATCH: um sync concorrente que grave no meio faz este
+                    # refazer a leitura, e um estado mais velho do banco não sobrescreve o novo
+                    pedidos = _orders_queryset().filter(pk__in=pks, status__in=OPEN_STATUSES)
+                    new_entries = {p.pk: order_entry(p) for p in pedidos}
+                    raws = pipe.hmget(ORDERS_KEY, pks)
+                    pipe.multi()
+                    changed = False
+                    for pk, raw in zip(pks, raws):
+                        new = new_entries.get(pk)
+                        if raw is None and new is None:
+                            continue
+                        changed = True
+                        if raw is not None:
+                            _write_entry(pipe, json.loads(raw), -1)
+                        if new is not None:
+                            _write_entry(pipe, new, 1)
+                        else:
+                            pipe.hdel(ORDERS_KEY, pk)
+                    if changed:
+                        pipe.execute()
+                    else:
+                        pipe.reset()
+                    return
+                except redis.WatchError:
+                    continue
+            # disputa persistente: força reconstrução na próxima leitura
+            client.delete(BUILT_KEY)
+    except Exception:
+        pass
+
+
+def invalidate():
+    try:
+        get_redis_client().delete(*ALL_KEYS)
+    except Exception:
+        pass
+
+
+def _collect(entries) -> dict:
+    """Monta o quadro (filas + totais) a partir dos cards, já na ordem das filas."""
+    queues = {s: [] for s in OPEN_STATUSES}
+    units = {}
+    for entry in entries:
+        status = entry["status"]
+        queues[status].append(entry)
+        if status not in PREPARE_STATUSES:
+            continue
+        for it in entry["itens"]:
+            row = units.setdefault(it["item"], {"nome": it["nome"], "categoria": it["categoria"]})
+            row[status] = row.get(status, 0) + int(it["qtd"])
+    return {"queues": queues, "units": units}
+
+
+def _rebuild(client) -> None:
+    with client.pipeline() as pipe:
+        for _ in range(3):
+            try:
+                pipe.watch(ORDERS_KEY)
+                pedidos = _orders_queryset().filter(status__in=OPEN_STATUSES).order_by("created_at", "id")
+                entries = [order_entry(p) for p in pedidos]
+                pipe.multi()
+                pipe.delete(*ALL_KEYS)
+                for entry in entries:
+                    _write_entry(pipe, entry, 1)
+                pipe.set(BUILT_KEY, 1, ex=REBUILD_INTERVAL)
+                pipe.execute()
+                return
+            except redis.WatchError:
+                continue
+
+
+def _read(client):
+    pipe = client.pipeline(transaction=False)
+    pipe.exists(BUILT_KEY)
+    pipe.hgetall(ORDERS_KEY)
+    pipe.hgetall(ITEMS_KEY)
+    for status in OPEN_STATUSES:
+        pipe.zrange(queue_key(status), 0, -1)
+    for status in PREPARE_STATUSES:
+        pipe.hgetall(units_key(status))
+    built, orders, items, *rest = pipe.execute()
+    if not built:
+        return None
+    queues = dict(zip(OPEN_STATUSES, rest[: len(OPEN_STATUSES)]))
+    tallies = dict(zip(PREPARE_STATUSES, rest[len(OPEN_STATUSES):]))
+
+    result = {"queues": {}, "units": {}}
+    for status, ids in queues.items():
+        result["queues"][status] = [json.loads(orders[pk]) for pk in ids if pk in orders]
+    for status, tally in tallies.items():
+        for item_id, qtd in tally.items():
+            qtd = int(qtd)
+            if qtd <= 0:
+                continue
+            meta = json.loads(items.get(item_id) or "{}")
+            row = result["units"].setdefault(int(item_id), {"nome": meta.get("nome"), "categoria": meta.get("categoria")})
+            row[status] = qtd
+    return result
+
+
+def _present(board: dict, source: str) -> dict:
+    units = []
+    for item_id, row in board["units"].items():
+        counts = {s: row.get(s, 0) for s in PREPARE_STATUSES}
+        units.append({"item": int(item_id), "nome": row["nome"], "categoria": row["categoria"], **counts,
+                      "total": sum(counts.values())})
+    units.sort(key=lambda r: (r["nome"] or "").lower())
+    queues = {
+        status: [{k: v for k, v in entry.items() if k != "score"} for entry in entries]
+        for status, entries in board["queues"].items()
+    }
+    return {
+        "queues": queues,
+        "counts": {status: len(entries) for status, entries in queues.items()},
+        "units": units,
+        "units_total": sum(r["total"] for r in units),
+        "source": source,
+    }
+
+
+def board() -> dict:
+    """Quadro atual: lido do Redis, reconstruído se ausente, ou do banco se o Redis estiver fora."""
+    try:
+        client = get_redis_client()
+        data = _read(client)
+        if data is None:
+            _rebuild(client)
+            data = _read(client)
+        if data is not None:
+            return _present(data, "redis")
+    except Exception:
+        pass
+    pedidos = _orders_queryset().filter(status__in=OPEN_STATUSES).order_by("created_at", "id")
+    return _present(_collect(order_entry(p) for p in pedidos), "database")
@@ -0,0 +1,274 @@
+"""Instrumentação por requisição: tempo total, banco, Redis e Mercado Pago.
+
+As métricas da requisição corrente ficam em um ContextVar (funciona tanto no
+caminho sync quanto no async do ASGI). Cada worker guarda um histórico
+rolante por rota em memória, exposto em /api/admin/profiling.
+"""
+import contextvars
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import redis
+import redis.asyncio
+import redis.asyncio.client
+import redis.client
+from django.conf import settings
+
+
+# Limites (ms) das faixas do histograma de tempo total
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = contextvars.ContextVar("orders_request_stats", default=None)
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+class RequestStats:
+    __slots__ = ("db_count", "db_time", "redis_count", "redis_time", "mp_count", "mp_time")
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.redis_count = 0
+        self.redis_time = 0.0
+        self.mp_count = 0
+        self.mp_time = 0.0
+
+    def add(self, kind: str, elapsed: float):
+        setattr(self, f"{kind}_count", getattr(self, f"{kind}_count") + 1)
+        setattr(self, f"{kind}_time", getattr(self, f"{kind}_time") + elapsed)
+
+
+def begin_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+@contextmanager
+def track(kind: str):
+    """Contabiliza o bloco como uma chamada `kind` (db/redis/mp) da requisição atual."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(kind, time.perf_counter() - start)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add("db", time.perf_counter() - start)
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    # Conectado ao sinal connection_created: vale para qualquer thread/conexão
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+class InstrumentedPipeline(redis.client.Pipeline):
+    def execute(self, raise_on_error=True):
+        with track("redis"):
+            return super().execute(raise_on_error)
+
+
+class InstrumentedRedis(redis.Redis):
+    def execute_command(self, *args, **options):
+        with track("redis"):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class InstrumentedAsyncPipeline(redis.asyncio.client.Pipeline):
+    async def execute(self, raise_on_error=True):
+        with track("redis"):
+            return await super().execute(raise_on_error)
+
+
+class InstrumentedAsyncRedis(redis.asyncio.Redis):
+    async def execute_command(self, *args, **options):
+        with track("redis"):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedAsyncPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def route_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    func = match.func
+    # Views de async_views repassam alguns métodos para a view DRF síncrona
+    sync_view = getattr(func, "sync_view", None)
+    if sync_view is not None and request.method not in func.async_methods:
+        func = sync_view
+    cls = getattr(func, "cls", None)
+    if cls is None:
+        return getattr(func, "__name__", match.view_name or "unknown")
+    actions = getattr(func, "actions", None)
+    if actions:
+        action = actions.get(request.method.lower())
+        if action:
+            return f"{cls.__name__}.{action}"
+    return cls.__name__
+
+
+def response_size(response) -> int:
+    if getattr(response, "streaming", False):
+        try:
+            return int(response.get("Content-Length") or 0)
+        except (TypeError, ValueError):
+            return 0
+    return len(response.content)
+
+
+def server_timing_header(stats: RequestStats, wall: float) -> str:
+    parts = [
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_count} queries"',
+        f'redis;dur={stats.redis_time * 1000:.1f};desc="{stats.redis_count} calls"',
+    ]
+    if stats.mp_count:
+        parts.append(f'mp;dur={stats.mp_time * 1000:.1f};desc="{stats.mp_count} calls"')
+    parts.append(f"total;dur={wall * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def record(route: str, stats: RequestStats, wall: float, size: int):
+    sample = (
+        time.time(),
+        wall * 1000,
+        stats.db_count,
+        stats.db_time * 1000,
+        stats.redis_count,
+        stats.redis_time * 1000,
+        stats.mp_time * 1000,
+        size,
+    )
+    with _routes_lock:
+        samples = _routes.get(route)
+        if samples is None:
+            samples = _routes[route] = deque(maxlen=settings.PROFILING_WINDOW)
+        samples.append(sample)
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def snapshot():
+    cutoff = time.time() - settings.PROFILING_WINDOW_SECONDS
+    with _routes_lock:
+        routes = {name: [s for s in samples if s[0] >= cutoff] for name, samples in _routes.items()}
+
+    result = {}
+    for name, samples in routes.items():
+        if not samples:
+            continue
+        n = len(samples)
+        walls = sorted(s[1] for s in samples)
+        histogram = {f"le_{bound}": 0 for bound in HISTOGRAM_BUCKETS_MS}
+        histogram["gt_max"] = 0
+        for wall in walls:
+            for bound in HISTOGRAM_BUCKETS_MS:
+                if wall <= bound:
+                    histogram[f"le_{bound}"] += 1
+                    break
+            else:
+                histogram["gt_max"] += 1
+        result[name] = {
+            "count": n,
+            "wall_ms": {
+                "p50": round(_percentile(walls, 50), 2),
+                "p95": round(_percentile(walls, 95), 2),
+                "p99": round(_percentile(walls, 99), 2),
+                "max": round(walls[-1], 2),
+            },
+            "db_queries_avg": round(sum(s[2] for s in samples) / n, 2),
+            "db_ms_avg": round(sum(s[3] for s in samples) / n, 2),
+            "redis_calls_avg": round(sum(s[4] for s in samples) / n, 2),
+            "redis_ms_avg": round(sum(s[5] for s in samples) / n, 2),
+            "mp_ms_avg": round(sum(s[6] for s in samples) / n, 2),
+            "response_bytes_avg": int(sum(s[7] for s in samples) / n),
+            "histogram_ms": histogram,
+        }
+    return result
+
+
+def reset():
+    with _routes_lock:
+        _routes.clear()
+
+
+def start_profiler():
+    """Liga o profiler para uma fração das requisições (PROFILING_SAMPLE_RATE)."""
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate <= 0 or random.random() >= rate:
+        return None
+    if settings.PROFILING_ENGINE == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            Profiler = None
+        if Profiler is not None:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # outro profiler já ativo nesta thread
+        return None
+    return profiler
+
+
+def finish_profiler(profiler, route: str, wall: float):
+    """Para o profiler e grava o dump apenas se a requisição foi lenta."""
+    if profiler is None:
+        return
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+    wall_ms = wall * 1000
+    if wall_ms < settings.PROFILING_SLOW_MS:
+        return
+    try:
+        os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{route}-{int(wall_ms)}ms-{os.getpid()}"
+        path = os.path.join(settings.PROFILING_DUMP_DIR, name)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(f"{path}.prof")
+        else:
+            with open(f"{path}.html", "w", encoding="utf-8") as fh:
+                fh.write(profiler.output_html())
+    except OSError:
+        pass
@@ -0,0 +1,185 @@
+"""Limite de taxa (token bucket no Redis) das rotas públicas do cliente.
+
+Cada requisição anônima em uma rota de RATE_LIMIT_RULES consome uma ficha de
+três baldes, checados e debitados juntos em um script Lua:
+
+- sessão (`X-Session-Id`, o mesmo id do heartbeat de presença), quando enviado;
+- IP do cliente, com a cota da regra × RATE_LIMIT_IP_MULTIPLIER (várias
+  pessoas dividem o Wi-Fi do evento);
+- global dos clientes (RATE_LIMIT_CUSTOMER_RPS): o que sobra da capacidade
+  dos workers fica reservado para a equipe.
+
+Requisições com token válido do painel (authenticate_dashboard) não passam
+pelos baldes. Rejeições respondem 429 com Retry-After sem tocar no banco e são
+contadas em `ratelimit:rejects` (total) e `ratelimit:rejects:<minuto>`.
+Sem Redis, tudo passa.
+"""
+import math
+import re
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .redis_client import get_async_redis_client, get_redis_client
+
+
+REJECTS_KEY = "ratelimit:rejects"
+REJECTS_TTL = 3600
+
+# KEYS: baldes..., contador total e contador do minuto de rejeições.
+# ARGV: taxa e capacidade de cada balde, o nome de cada balde e a regra.
+# Só debita se todos os baldes tiverem ficha.
+_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local n = #KEYS - 2
+local levels = {}
+local wait = 0
+local blocked = nil
+for i = 1, n do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local burst = tonumber(ARGV[2 * i])
+  local state = redis.call('HMGET', KEYS[i], 't', 'ts')
+  local tokens = tonumber(state[1]) or burst
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+  levels[i] = tokens
+  if tokens < 1 and (1 - tokens) / rate > wait then
+    wait = (1 - tokens) / rate
+    blocked = ARGV[2 * n + i]
+  end
+end
+if blocked then
+  local field = ARGV[3 * n + 1] .. ':' .. blocked
+  redis.call('HINCRBY', KEYS[n + 1], field, 1)
+  redis.call('HINCRBY', KEYS[n + 2], field, 1)
+  redis.call('EXPIRE', KEYS[n + 2], %d)
+  return {0, tostring(wait)}
+end
+for i = 1, n do
+  redis.call('HSET', KEYS[i], 't', tostring(levels[i] - 1), 'ts', tostring(now))
+  redis.call('EXPIRE', KEYS[i], math.ceil(tonumber(ARGV[2 * i]) / tonumber(ARGV[2 * i - 1])) + 1)
+end
+return {1, '0'}
+""" % REJECTS_TTL
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    methods: tuple
+    pattern: re.Pattern
+    rate: float
+    burst: int
+
+
+def _rules():
+    return [
+        Rule(name, tuple(methods), re.compile(pattern), float(rate), int(burst))
+        for name, methods, pattern, rate, burst in settings.RATE_LIMIT_RULES
+    ]
+
+
+_cached_rules = None
+
+
+def match_rule(request):
+    global _cached_rules
+    if _cached_rules is None:
+        _cached_rules = _rules()
+    for rule in _cached_rules:
+        if request.method in rule.methods and rule.pattern.match(request.path):
+            return rule
+    return None
+
+
+def client_ip(request) -> str:
+    """IP do cliente atrás de RATE_LIMIT_TRUSTED_PROXIES proxies (Caddy, nginx)."""
+    forwarded = [part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if part.strip()]
+    chain = forwarded + [request.META.get("REMOTE_ADDR", "")]
+    # só os saltos dos proxies confiáveis contam; o que vem antes pode ser forjado
+    index = max(len(chain) - 1 - settings.RATE_LIMIT_TRUSTED_PROXIES, 0)
+    return chain[index]
+
+
+def has_bearer(request) -> bool:
+    return request.META.get("HTTP_AUTHORIZATION", "").startswith("Bearer ")
+
+
+def _buckets(request, rule):
+    """[(chave, taxa, capacidade, nome)] dos baldes que a requisição consome."""
+    buckets = []
+    session = request.META.get("HTTP_X_SESSION_ID", "").strip()
+    if session and len(session) <= 128:
+        buckets.append((f"ratelimit:{rule.name}:s:{session}", rule.rate, rule.burst, "session"))
+    multiplier = settings.RATE_LIMIT_IP_MULTIPLIER
+    buckets.append((f"ratelimit:{rule.name}:ip:{client_ip(request)}", rule.rate * multiplier, rule.burst * multiplier, "ip"))
+    if settings.RATE_LIMIT_CUSTOMER_RPS > 0:
+        buckets.append(
+            ("ratelimit:customers", settings.RATE_LIMIT_CUSTOMER_RPS, settings.RATE_LIMIT_CUSTOMER_BURST, "global")
+        )
+    return buckets
+
+
+def _script_args(rule, buckets):
+    keys = [key for key, _, _, _ in buckets]
+    keys += [REJECTS_KEY, f"{REJECTS_KEY}:{int(time.time() // 60)}"]
+    args = []
+    for _, rate, burst, _ in buckets:
+        args += [rate, burst]
+    args += [name for _, _, _, name in buckets]
+    args.append(rule.name)
+    return keys, args
+
+
+def _result(reply):
+    allowed, wait = reply
+    if int(allowed):
+        return None
+    if isinstance(wait, bytes):
+        wait = wait.decode()
+    return max(1, math.ceil(float(wait)))
+
+
+_sync_script = None
+
+
+def check(request, rule):
+    """None se a requisição pode seguir; senão, os segundos do Retry-After."""
+    global _sync_script
+    keys, args = _script_args(rule, _buckets(request, rule))
+    try:
+        if _sync_script is None:
+            _sync_script = get_redis_client().register_script(_SCRIPT)
+        return _result(_sync_script(keys=keys, args=args))
+    except Exception:
+        return None
+
+
+async def acheck(request, rule):
+    keys, args = _script_args(rule, _buckets(request, rule))
+    try:
+        client = get_async_redis_client()
+        return _result(await client.register_script(_SCRIPT)(keys=keys, args=args))
+    except Exception:
+        return None
+
+
+def reject_stats() -> dict:
+    """Rejeições por `regra:balde`: total acumulado, minuto atual e anterior."""
+    try:
+        client = get_redis_client()
+        minute = int(time.time() // 60)
+        pipe = client.pipeline(transaction=False)
+        pipe.hgetall(REJECTS_KEY)
+        pipe.hgetall(f"{REJECTS_KEY}:{minute}")
+        pipe.hgetall(f"{REJECTS_KEY}:{minute - 1}")
+        total, current, previous = pipe.execute()
+    except Exception:
+        return {}
+
+    def decode(raw):
+        return {k.decode(): int(v) for k, v in raw.items()}
+
+    return {"total": decode(total), "current_minute": decode(current), "previous_minute": decode(previous)}
@@ -0,0 +1,31 @@
+import asyncio
+import os
+
+from .profiling import InstrumentedAsyncRedis, InstrumentedRedis
+
+
+def _redis_address():
+    return os.getenv("REDIS_HOST", "redis"), int(os.getenv("REDIS_PORT", "6379"))
+
+
+def get_redis_client():
+    host, port = _redis_address()
+    return InstrumentedRedis(host=host, port=port, db=0, socket_connect_timeout=1, socket_timeout=1)
+
+
+_async_client = None
+
+
+def get_async_redis_client():
+    """Cliente redis.asyncio compartilhado pelo event loop corrente.
+
+    As conexões do pool ficam presas ao loop em que foram abertas, então um
+    novo cliente é criado se o loop mudar (ex.: testes com async_to_sync).
+    """
+    global _async_client
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client[0] is not loop:
+        host, port = _redis_address()
+        client = InstrumentedAsyncRedis(host=host, port=port, db=0, socket_connect_timeout=1, socket_timeout=1)
+        _async_client = (loop, client)
+    return _async_client[1]
@@ -1,6 +1,8 @@
 from django.urls import path
-from .consumers import OrdersConsumer
+from .consumers import OrdersConsumer, PresenceConsumer, WaitingRoomConsumer
 
 websocket_urlpatterns = [
     path("ws/orders", OrdersConsumer.as_asgi()),
+    path("ws/waiting-room/<str:ticket>", WaitingRoomConsumer.as_asgi()),
+    path("ws/presence", PresenceConsumer.as_asgi()),
 ]
@@ -0,0 +1,93 @@
+"""Contador de vendas por item sem disputa pela linha do Item.
+
+Antes, cada aprovação fazia select_for_update nos Items do pedido e salvava
+`vendidos`; com quase todo pedido levando o mesmo lanche, todas as aprovações
+esperavam pela mesma trava. Agora a venda é somada com um UPDATE ... + n em
+uma de SALES_COUNTER_SHARDS parcelas (ItemSalesShard) sorteada, e o total é
+Item.vendidos + soma das parcelas. fold() consolida as parcelas de volta em
+Item.vendidos de tempos em tempos (um UPDATE com CASE).
+"""
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Item, ItemSalesShard, PedidoItem
+
+
+def sold_quantities(pedido_ids) -> dict:
+    """{item_id: unidades} somando os itens dos pedidos informados (uma consulta)."""
+    return dict(
+        PedidoItem.objects.filter(pedido_id__in=pedido_ids)
+        .values("item_id").annotate(total=Sum("qtd")).values_list("item_id", "total")
+    )
+
+
+def add_sales(quantities: dict):
+    """Soma as vendas {item_id: unidades}; deve rodar dentro da transação da aprovação."""
+    shards = settings.SALES_COUNTER_SHARDS
+    # ordem fixa de item_id: duas aprovações nunca travam parcelas em ordem inversa
+    for item_id in sorted(quantities):
+        qtd = int(quantities[item_id] or 0)
+        if not qtd:
+            continue
+        shard = random.randrange(shards)
+        rows = ItemSalesShard.objects.filter(item_id=item_id, shard=shard)
+        if not rows.update(vendidos=F("vendidos") + qtd):
+            ItemSalesShard.objects.bulk_create(
+                [ItemSalesShard(item_id=item_id, shard=shard, vendidos=0)], ignore_conflicts=True
+            )
+            rows.update(vendidos=F("vendidos") + qtd)
+
+
+def vendidos_total():
+    """Expressão para annotate(): Item.vendidos + parcelas ainda não consolidadas."""
+    pending = (
+        ItemSalesShard.objects.filter(item=OuterRef("pk"))
+        .values("item").annotate(total=Sum("vendidos")).values("total")
+    )
+    return F("vendidos") + Coalesce(Subquery(pending, output_field=IntegerField()), Value(0))
+
+
+def pending_sales(item_ids=None) -> dict:
+    qs = ItemSalesShard.objects.all()
+    if item_ids is not None:
+        qs = qs.filter(item_id__in=item_ids)
+    return dict(qs.values("item_id").annotate(total=Sum("vendidos")).values_list("item_id", "total"))
+
+
+def current_vendidos(item) -> int:
+    return item.vendidos + pending_sales([item.pk]).get(item.pk, 0)
+
+
+def clear_pending(item):
+    """Zera as parcelas do item (ajuste manual: o valor digitado vira o total)."""
+    ItemSalesShard.objects.filter(item=item).delete()
+
+
+def fold() -> int:
+    """Consolida as parcelas em Item.vendidos. Devolve quantos itens foram atualizados."""
+    with transaction.atomic():
+        rows = list(
+            ItemSalesShard.objects.select_for_update().exclude(vendidos=0).values_list("id", "item_id", "vendidos")
+        )
+        if not rows:
+            return 0
+        totals = {}
+        for _, item_id, vendidos in rows:
+            totals[item_id] = totals.get(item_id, 0) + vendidos
+        Item.objects.filter(id__in=totals).update(
+            vendidos=F("vendidos") + Case(
+                *[When(id=item_id, then=Value(total)) for item_id, total in totals.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+        ItemSalesShard.objects.filter(id__in=[row[0] for row in rows]).update(vendidos=0)
+    return len(totals)
+
+
+def reset():
+    ItemSalesShard.objects.all().delete()
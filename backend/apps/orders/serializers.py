@@ -1,6 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Item, Pedido, PedidoItem, CategoryOrder, DashboardUser
 from .auth_utils import hash_password
+from . import sales
 
 class ItemSerializer(serializers.ModelSerializer):
     estoque_disponivel = serializers.SerializerMethodField()
@@ -9,6 +11,25 @@ class ItemSerializer(serializers.ModelSerializer):
         model = Item
         fields = "__all__"
 
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        # total com as parcelas de sales.py, quando o queryset já anotou
+        total = getattr(obj, "vendidos_total", None)
+        if total is not None:
+            data["vendidos"] = total
+        return data
+
+    def update(self, instance, validated_data):
+        if "vendidos" in validated_data:
+            if validated_data["vendidos"] == sales.current_vendidos(instance):
+                # formulário reenviando o valor exibido: não é ajuste
+                validated_data.pop("vendidos")
+            else:
+                with transaction.atomic():
+                    sales.clear_pending(instance)
+                    return super().update(instance, validated_data)
+        return super().update(instance, validated_data)
+
     def get_estoque_disponivel(self, obj):
         if hasattr(obj, "estoque_disponivel_calc"):
             try:
@@ -32,7 +53,7 @@ class PedidoItemSerializer(serializers.ModelSerializer):
         fields = ["item","nome","preco","qtd"]
 
 class PedidoSerializer(serializers.ModelSerializer):
-    itens = PedidoItemSerializer(many=True, read_only=True)
+    itens = serializers.SerializerMethodField()
     precisa_embalagem = serializers.SerializerMethodField()
 
     class Meta:
@@ -44,6 +65,13 @@ class PedidoSerializer(serializers.ModelSerializer):
             "created_at","paid_at","itens"
         ]
 
+    def get_itens(self, obj):
+        # resumo gravado na criação (order_snapshot.py); pedido sem ele lê as linhas
+        resumo = getattr(obj, "resumo", None) or {}
+        if "itens" in resumo:
+            return resumo["itens"]
+        return PedidoItemSerializer(obj.itens.all(), many=True).data
+
     def get_precisa_embalagem(self, obj):
         value = getattr(obj, "precisa_embalagem", False)
         if isinstance(value, str):
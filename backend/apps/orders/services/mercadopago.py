@@ -1,13 +1,39 @@
-import mercadopago
+import threading
+
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal
-from ..models import Pedido, Pagamento, PedidoItem, Item
+from ..models import Pedido, Pagamento
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from ..profiling import track
+from .. import sales, status_log
+
+
+_sdk = None
+_sdk_lock = threading.Lock()
+
+
+def get_sdk():
+    """SDK do MP criado no primeiro uso: importar as views não carrega o pacote
+    (nem monta a sessão HTTP) em quem nunca fala com o Mercado Pago."""
+    global _sdk
+    if _sdk is None:
+        with _sdk_lock:
+            if _sdk is None:
+                import mercadopago
+                from mercadopago.http import HttpClient
 
-sdk = mercadopago.SDK(settings.MP_ACCESS_TOKEN)
+                class TimedHttpClient(HttpClient):
+                    """HttpClient do SDK que contabiliza o tempo gasto na API do MP por requisição."""
+
+                    def request(self, method, url, maxretries=None, **kwargs):
+                        with track("mp"):
+                            return super().request(method, url, maxretries=maxretries, **kwargs)
+
+                _sdk = mercadopago.SDK(settings.MP_ACCESS_TOKEN, http_client=TimedHttpClient())
+    return _sdk
 
 def criar_preferencia(pedido_id: int):
     pedido = Pedido.objects.get(pk=pedido_id)
@@ -45,7 +71,7 @@ def criar_preferencia(pedido_id: int):
         # URL pública para receber webhook (configure BACKEND_URL no .env)
         "notification_url": f"{settings.BACKEND_URL}/api/payments/webhook",
     }
-    resp = sdk.preference().create(pref)
+    resp = get_sdk().preference().create(pref)
     if resp["status"] not in (200, 201):
         raise RuntimeError(resp)
     data = resp["response"]
@@ -77,14 +103,14 @@ def _fetch_merchant_order_by_pref_or_ref(preference_id: str, external_reference:
     # Tenta buscar pelo preference_id via search, depois por external_reference
     try:
         q = {"preference_id": preference_id}
-        res = sdk.merchant_order().search(q)
+        res = get_sdk().merchant_order().search(q)
         if res and res.get("status") in (200, 201) and res.get("response", {}).get("elements"):
             return res["response"]["elements"][0]
     except Exception:
         pass
     if external_reference:
         try:
-            res = sdk.merchant_order().search({"external_reference": external_reference})
+            res = get_sdk().merchant_order().search({"external_reference": external_reference})
             if res and res.get("status") in (200, 201) and res.get("response", {}).get("elements"):
                 return res["response"]["elements"][0]
         except Exception:
@@ -133,7 +159,7 @@ def processar_webhook(payload: dict):
     # Se veio um payment_id, confira explicitamente o pagamento
     if payment_id:
         try:
-            res = sdk.payment().get(payment_id)
+            res = get_sdk().payment().get(payment_id)
             if res and res.get("status") in (200, 201):
                 presp = res.get("response") or {}
                 if presp.get("status") == "approved":
@@ -169,7 +195,7 @@ def processar_webhook(payload: dict):
         pag.save(update_fields=["raw", "status_detail", "updated_at"])
         return {"ok": True, "paid": False}
 
-    # Aplicar aprovação de forma transacional e atualizar vendidos
+    # Aplicar aprovação de forma transacional e somar as vendas
     with transaction.atomic():
         # Recarrega com lock das linhas de itens
         pag = (
@@ -180,22 +206,8 @@ def processar_webhook(payload: dict):
         if pag.status == "approved" or pag.pedido.status == "pago":
             return {"ok": True, "idempotent": True}
 
-        itens = (
-            PedidoItem.objects.select_related("item")
-            .filter(pedido=pag.pedido)
-        )
-        # Lock nos itens para ajustar vendidos
-        item_ids = [pi.item_id for pi in itens]
-        items_locked = list(Item.objects.select_for_update().filter(id__in=item_ids))
-        map_items = {it.id: it for it in items_locked}
-
-        for pi in itens:
-            it = map_items.get(pi.item_id)
-            if not it:
-                continue
-            # Atualiza vendidos sempre; cálculo de disponível usa max(estoque_inicial - vendidos, 0)
-            it.vendidos = it.vendidos + pi.qtd
-            it.save(update_fields=["vendidos"])
+        # Soma as vendas em parcelas do contador (sales.py), sem travar as linhas dos itens
+        sales.add_sales(sales.sold_quantities([pag.pedido_id]))
 
         pag.status = "approved"
         pag.status_detail = "approved"
@@ -205,10 +217,13 @@ def processar_webhook(payload: dict):
         if mo is not None:
             final_raw["merchant_order"] = mo
         pag.raw = final_raw
+        de = pag.pedido.status
         pag.pedido.status = "pago"
         if not pag.pedido.paid_at:
             pag.pedido.paid_at = timezone.now()
-        pag.pedido.save(update_fields=["status", "paid_at"]) 
+        pag.pedido.save(update_fields=["status", "paid_at"])
+        pedido_id, quando = pag.pedido.id, timezone.now()
+        transaction.on_commit(lambda: status_log.record(pedido_id, de, "pago", quando))
         pag.save(update_fields=["status", "status_detail", "raw", "updated_at"])
 
     # Broadcast atualização do pedido
@@ -239,7 +254,7 @@ def criar_pagamento_pix(pedido_id: int, payer: dict | None = None):
         "notification_url": f"{settings.BACKEND_URL}/api/payments/webhook",
         "payer": payer or {"email": f"cliente{pedido.id}@example.com"},
     }
-    resp = sdk.payment().create(pag_data)
+    resp = get_sdk().payment().create(pag_data)
     if resp.get("status") not in (200, 201):
         raise RuntimeError(resp)
     data = resp["response"]
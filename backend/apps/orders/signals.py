@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import order_status, production_board, versions
+from .auth_utils import invalidate_auth_cache
+from .catalog_cache import invalidate_catalog
+from .models import CategoryOrder, DashboardUser, Item, Pagamento, Pedido
+
+
+def on_commit_once(func):
+    """transaction.on_commit sem repetir `func` já agendada no mesmo atomic()
+    (ex.: delete em massa disparando post_delete para cada pedido)."""
+    conn = transaction.get_connection()
+    if conn.in_atomic_block and any(entry[1] is func for entry in conn.run_on_commit):
+        return
+    transaction.on_commit(func)
+
+
+def bump_orders():
+    versions.bump(versions.ORDERS)
+
+
+# Campos de Item que mudam a cada venda e não afetam o catálogo
+SALES_ONLY_FIELDS = {"vendidos"}
+
+
+@receiver(post_save, sender=Item, dispatch_uid="orders_item_saved")
+def item_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= SALES_ONLY_FIELDS:
+        return
+    on_commit_once(invalidate_catalog)
+
+
+@receiver(post_delete, sender=Item, dispatch_uid="orders_item_deleted")
+@receiver(post_save, sender=CategoryOrder, dispatch_uid="orders_category_order_saved")
+@receiver(post_delete, sender=CategoryOrder, dispatch_uid="orders_category_order_deleted")
+def catalog_changed(sender, **kwargs):
+    # Só invalida após o commit para outro worker não recompilar com dados antigos
+    on_commit_once(invalidate_catalog)
+
+
+@receiver(post_save, sender=Pedido, dispatch_uid="orders_pedido_saved")
+def pedido_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    pk = instance.pk
+    # pedido novo ainda aguarda pagamento, não entra no quadro da cozinha
+    on_board = not created and (update_fields is None or set(update_fields) & production_board.BOARD_FIELDS)
+    state = {"status": instance.status, "paid_at": instance.paid_at}
+
+    def after_commit():
+        # quadro antes da versão: quem revalidar pelo ETag já lê o quadro novo
+        if on_board:
+            production_board.sync_order(pk)
+        versions.bump_order(pk)
+        order_status.publish(pk, **state)
+
+    transaction.on_commit(after_commit)
+
+
+@receiver(post_delete, sender=Pedido, dispatch_uid="orders_pedido_deleted")
+def pedido_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    on_commit_once(production_board.invalidate)
+    on_commit_once(bump_orders)
+    transaction.on_commit(lambda: order_status.forget(pk))
+
+
+@receiver(post_save, sender=Pagamento, dispatch_uid="orders_pagamento_saved")
+def pagamento_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and "status" not in update_fields:
+        return
+    pedido_id, pagamento = instance.pedido_id, instance.status
+    transaction.on_commit(lambda: order_status.publish(pedido_id, pagamento=pagamento))
+
+
+@receiver(post_save, sender=DashboardUser, dispatch_uid="orders_dashboard_user_saved")
+@receiver(post_delete, sender=DashboardUser, dispatch_uid="orders_dashboard_user_deleted")
+def dashboard_user_changed(sender, **kwargs):
+    # rotas/ativo do usuário ficam junto do token no cache de autenticação
+    on_commit_once(invalidate_auth_cache)
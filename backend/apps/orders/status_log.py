@@ -0,0 +1,273 @@
+"""Histórico de transições de status (StatusLog) gravado em lote.
+
+record() só faz um RPUSH no Redis (`statuslog:buffer`); quando o buffer passa
+de STATUS_LOG_BATCH entradas ou a mais antiga tem STATUS_LOG_MAX_DELAY
+segundos, acorda a thread `status-log` do processo, que drena o buffer com um
+bulk_create fora da requisição (e o housekeeping drena o que sobrar quando o
+movimento para). Um flush por vez no cluster: a trava no Redis leva um token
+e só quem a pegou a solta. Cada lote passa para
+`statuslog:processing` e só sai de lá depois do commit: se a gravação
+falhar, o próximo flush tenta o mesmo lote de novo. No mesmo flush o
+tempo que cada pedido passou no status anterior entra em um histograma por
+hora (StatusDurationBucket), e é desse histograma que saem os percentis do
+endpoint de análise, sem varrer o StatusLog. Sem Redis, grava direto.
+"""
+import json
+import os
+import secrets
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Pedido, StatusDurationBucket, StatusLog
+from .redis_client import get_redis_client
+
+
+BUFFER_KEY = "statuslog:buffer"
+SINCE_KEY = "statuslog:since"
+PROCESSING_KEY = "statuslog:processing"
+LOCK_KEY = "statuslog:flush-lock"
+LOCK_TTL = 30
+
+# move até ARGV[1] entradas do buffer para a lista em processamento, atomicamente
+_TAKE = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+  redis.call('LTRIM', KEYS[1], #items, -1)
+  redis.call('RPUSH', KEYS[2], unpack(items))
+end
+redis.call('DEL', KEYS[3])
+return items
+"""
+
+# solta a trava só se ela ainda for deste flush (pode ter expirado e sido pega por outro)
+_UNLOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Limites superiores (s) das faixas do histograma; a última faixa é aberta
+DURATION_BUCKETS_S = (30, 60, 120, 180, 300, 450, 600, 900, 1200, 1800, 2700, 3600, 5400, 7200)
+# Etapas medidas, na ordem do fluxo da cozinha (tempo gasto em cada status)
+STAGES = ("aguardando pagamento", "pago", "a preparar", "em produção", "pronto")
+
+
+def _faixa(seconds: float) -> int:
+    for index, bound in enumerate(DURATION_BUCKETS_S):
+        if seconds <= bound:
+            return index
+    return len(DURATION_BUCKETS_S)
+
+
+def record(pedido_id, de, para, quando=None):
+    """Registra a transição `de` -> `para` do pedido (chamar após o commit).
+
+    Nunca levanta: o pedido já foi gravado e o histórico não pode virar erro
+    para quem chamou."""
+    record_many([(pedido_id, de, para)], quando)
+
+
+def record_many(transitions, quando=None):
+    """record() para várias transições [(pedido_id, de, para)] com um só RPUSH."""
+    quando = (quando or timezone.now()).isoformat()
+    entries = [
+        {"pedido": int(pk), "de": de or "", "para": para, "quando": quando}
+        for pk, de, para in transitions if de != para
+    ]
+    if not entries:
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.rpush(BUFFER_KEY, *(json.dumps(e) for e in entries))
+        pipe.set(SINCE_KEY, quando, nx=True)
+        pipe.get(SINCE_KEY)
+        size, _, since = pipe.execute()
+    except Exception:
+        try:
+            write_entries(entries)
+        except Exception:
+            pass
+        return
+    since = datetime.fromisoformat(since.decode()) if since else None
+    overdue = since is not None and (timezone.now() - since).total_seconds() >= settings.STATUS_LOG_MAX_DELAY
+    if size >= settings.STATUS_LOG_BATCH or overdue:
+        _wake_flusher()
+
+
+_wake = threading.Event()
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _wake_flusher():
+    """Pede um flush à thread do processo; a requisição não espera a gravação."""
+    global _flusher_pid
+    # depois do fork (gunicorn --preload) a thread do processo pai não existe no filho
+    if _flusher_pid != os.getpid():
+        with _flusher_lock:
+            if _flusher_pid != os.getpid():
+                _flusher_pid = os.getpid()
+                threading.Thread(target=_flush_loop, name="status-log", daemon=True).start()
+    _wake.set()
+
+
+def _flush_loop():
+    while True:
+        _wake.wait()
+        _wake.clear()
+        try:
+            flush()
+        except Exception:
+            # as entradas continuam no Redis para o próximo flush
+            pass
+        finally:
+            connections.close_all()
+
+
+def flush() -> int:
+    """Drena o buffer do Redis para o banco. Devolve quantas transições gravou.
+
+    Se a gravação falhar a exceção sobe e o lote fica em PROCESSING_KEY."""
+    token = secrets.token_hex(16)
+    try:
+        client = get_redis_client()
+        if not client.set(LOCK_KEY, token, nx=True, ex=LOCK_TTL):
+            # outro worker está drenando; as entradas novas ficam para o próximo flush
+            return 0
+    except Exception:
+        return 0
+    written = 0
+    try:
+        while True:
+            # primeiro o lote de um flush que falhou, depois o buffer
+            raws = client.lrange(PROCESSING_KEY, 0, -1) or client.eval(
+                _TAKE, 3, BUFFER_KEY, PROCESSING_KEY, SINCE_KEY, settings.STATUS_LOG_BATCH * 10
+            )
+            if not raws:
+                break
+            entries = []
+            for raw in raws:
+                try:
+                    entries.append(json.loads(raw))
+                except ValueError:
+                    continue
+            write_entries(entries)
+            client.delete(PROCESSING_KEY)
+            written += len(entries)
+    finally:
+        try:
+            client.eval(_UNLOCK, 1, LOCK_KEY, token)
+        except Exception:
+            # a trava expira sozinha em LOCK_TTL
+            pass
+    return written
+
+
+def write_entries(entries):
+    """bulk_create das transições + atualização dos histogramas por hora."""
+    logs = [
+        StatusLog(pedido_id=e["pedido"], de=e["de"], para=e["para"], quando=datetime.fromisoformat(e["quando"]))
+        for e in entries
+    ]
+    if not logs:
+        return
+    pks = {log.pedido_id for log in logs}
+    with transaction.atomic():
+        # entradas anteriores desses pedidos, para saber quando entraram no status que deixaram
+        previous = {}
+        for pedido_id, para, quando in (
+            StatusLog.objects.filter(pedido_id__in=pks).order_by("quando", "id").values_list("pedido_id", "para", "quando")
+        ):
+            previous[pedido_id] = (para, quando)
+
+        buckets = {}
+        for log in sorted(logs, key=lambda log: log.quando):
+            prev = previous.get(log.pedido_id)
+            previous[log.pedido_id] = (log.para, log.quando)
+            if prev is None or prev[0] != log.de or log.de not in STAGES:
+                continue
+            seconds = (log.quando - prev[1]).total_seconds()
+            if seconds < 0:
+                continue
+            hora = log.quando.replace(minute=0, second=0, microsecond=0)
+            key = (hora, log.de, _faixa(seconds))
+            total, soma = buckets.get(key, (0, 0.0))
+            buckets[key] = (total + 1, soma + seconds)
+
+        # pedidos apagados no meio do caminho (reset de vendas) não têm como ser gravados
+        existing = set(Pedido.objects.filter(pk__in=pks).values_list("pk", flat=True))
+        StatusLog.objects.bulk_create([log for log in logs if log.pedido_id in existing])
+
+        if buckets:
+            StatusDurationBucket.objects.bulk_create(
+                [StatusDurationBucket(hora=h, etapa=e, faixa=f) for h, e, f in buckets],
+                ignore_conflicts=True,
+            )
+            for (hora, etapa, faixa), (total, soma) in buckets.items():
+                StatusDurationBucket.objects.filter(hora=hora, etapa=etapa, faixa=faixa).update(
+                    total=F("total") + total, soma_segundos=F("soma_segundos") + soma
+                )
+
+
+def reset():
+    StatusDurationBucket.objects.all().delete()
+    try:
+        get_redis_client().delete(BUFFER_KEY, SINCE_KEY, PROCESSING_KEY)
+    except Exception:
+        pass
+
+
+def _percentile(histogram, total, pct):
+    """Percentil aproximado por interpolação linear dentro da faixa."""
+    target = pct / 100 * total
+    seen = 0
+    for faixa in sorted(histogram):
+        count = histogram[faixa]
+        if seen + count >= target:
+            lower = DURATION_BUCKETS_S[faixa - 1] if faixa > 0 else 0
+            if faixa >= len(DURATION_BUCKETS_S):
+                # faixa aberta: reporta o limite inferior
+                return float(lower)
+            upper = DURATION_BUCKETS_S[faixa]
+            return lower + (upper - lower) * ((target - seen) / count if count else 0)
+        seen += count
+    return float(DURATION_BUCKETS_S[-1])
+
+
+def _summary(histogram, soma):
+    total = sum(histogram.values())
+    return {
+        "count": total,
+        "avg_s": round(soma / total, 1) if total else None,
+        "p50_s": round(_percentile(histogram, total, 50), 1) if total else None,
+        "p90_s": round(_percentile(histogram, total, 90), 1) if total else None,
+        "p95_s": round(_percentile(histogram, total, 95), 1) if total else None,
+    }
+
+
+def stage_durations(since):
+    """Percentis por hora e por etapa a partir de `since`, mais o consolidado do período."""
+    hours = {}
+    overall = {}
+    rows = StatusDurationBucket.objects.filter(hora__gte=since).values_list("hora", "etapa", "faixa", "total", "soma_segundos")
+    for hora, etapa, faixa, total, soma in rows:
+        for target in (hours.setdefault(hora, {}), overall):
+            histogram, acc = target.get(etapa, ({}, 0.0))
+            histogram[faixa] = histogram.get(faixa, 0) + total
+            target[etapa] = (histogram, acc + soma)
+
+    def present(stages):
+        return {etapa: _summary(*stages[etapa]) for etapa in STAGES if etapa in stages}
+
+    return {
+        "stages": list(STAGES),
+        "buckets_s": list(DURATION_BUCKETS_S),
+        "overall": present(overall),
+        "hours": [{"hour": hora.isoformat(), "stages": present(hours[hora])} for hora in sorted(hours)],
+    }
@@ -0,0 +1,89 @@
+"""Resumo de estoque por item e categoria (tela Estoque do painel).
+
+Antes a tela baixava todos os itens e os últimos 1.000 pedidos e refazia as
+contas no navegador. Aqui sai uma consulta só: `vendidos` vem do contador em
+parcelas (sales.py, o mesmo que o checkout usa para validar estoque) e
+`pendentes` soma as unidades dos pedidos aguardando pagamento do evento
+ativo. Os totais por categoria seguem a ordem do cardápio (catalog_cache).
+"""
+from django.db import transaction
+from django.db.models import IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import sales
+from .catalog_cache import category_snapshot, invalidate_catalog, sort_categories
+from .models import Item
+
+
+FIGURES = ("estoque_inicial", "vendidos", "pendentes", "disponivel")
+BULK_STOCK_MAX = 500
+
+
+def item_rows():
+    pendentes = Coalesce(
+        Sum(
+            "pedidoitem__qtd",
+            filter=Q(pedidoitem__pedido__status="aguardando pagamento", pedidoitem__pedido__evento__ativo=True),
+        ),
+        Value(0, output_field=IntegerField()),
+    )
+    rows = (
+        Item.objects.annotate(vendidos_total=sales.vendidos_total(), pendentes=pendentes)
+        .order_by("nome", "id")
+        .values("id", "sku", "nome", "categoria", "ativo", "estoque_inicial", "vendidos_total", "pendentes")
+    )
+    for row in rows:
+        row["vendidos"] = row.pop("vendidos_total")
+        row["disponivel"] = max(row["estoque_inicial"] - row["vendidos"], 0)
+        yield row
+
+
+def overview() -> dict:
+    """{"categorias": [{nome, totais..., itens}], "totais": {...}} de todos os itens."""
+    by_category = {}
+    for row in item_rows():
+        by_category.setdefault(row["categoria"] or "Outros", []).append(row)
+    totais = dict.fromkeys(FIGURES, 0)
+    categorias = []
+    for nome in sort_categories(list(by_category), category_snapshot().order_map):
+        itens = by_category[nome]
+        entry = {"nome": nome, **{f: sum(it[f] for it in itens) for f in FIGURES}, "itens": itens}
+        for f in FIGURES:
+            totais[f] += entry[f]
+        categorias.append(entry)
+    return {"categorias": categorias, "totais": totais}
+
+
+def parse_changes(data):
+    """{"changes": [{"id", "estoque_inicial"}, ...]} -> {id: estoque}; None se inválido."""
+    changes = data.get("changes")
+    if not isinstance(changes, list):
+        return None
+    parsed = {}
+    for change in changes:
+        if not isinstance(change, dict):
+            return None
+        try:
+            pk = int(change.get("id"))
+            estoque = int(change.get("estoque_inicial"))
+        except (TypeError, ValueError):
+            return None
+        if estoque < 0:
+            return None
+        # último valor vence se o mesmo item vier repetido
+        parsed[pk] = estoque
+    return parsed
+
+
+def set_initial(changes: dict) -> list:
+    """Grava `estoque_inicial` de vários itens com um bulk_update. Devolve os ids alterados."""
+    with transaction.atomic():
+        items = list(Item.objects.select_for_update().filter(pk__in=changes).only("id", "estoque_inicial"))
+        changed = [it for it in items if it.estoque_inicial != changes[it.pk]]
+        for it in changed:
+            it.estoque_inicial = changes[it.pk]
+        if changed:
+            Item.objects.bulk_update(changed, ["estoque_inicial"])
+            # bulk_update não dispara post_save: invalida o catálogo como o signal de Item faria
+            transaction.on_commit(invalidate_catalog)
+    return [it.pk for it in changed]
@@ -0,0 +1,123 @@
+"""Versões de mudança no Redis, compartilhadas por todos os workers.
+
+Cada escrita grava um token novo (hex de time.time_ns()) na chave da área
+alterada; leitores comparam o token com o que tinham (cache local, ETag do
+cliente) e, como o token carrega o instante da mudança, ele também serve
+de Last-Modified.
+"""
+import time
+
+from .redis_client import get_async_redis_client, get_redis_client
+
+
+CATALOG = "catalog:version"
+ORDERS = "orders:version"
+# versão individual por pedido (Status/Checkout consultam um pedido só)
+ORDER_TTL = 12 * 3600
+
+
+def order_key(pk) -> str:
+    return f"orders:version:{pk}"
+
+
+def new_token() -> bytes:
+    return f"{time.time_ns():x}".encode()
+
+
+def token_time(token):
+    """Instante (epoch, s) codificado no token; None para tokens legados/ausentes."""
+    try:
+        return int(token, 16) / 1e9
+    except (TypeError, ValueError):
+        return None
+
+
+def bump(*keys, ttl=None):
+    token = new_token()
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, token, ex=ttl)
+        pipe.execute()
+    except Exception:
+        pass
+    return token
+
+
+def bump_order(*pks):
+    """Troca a versão global da lista de pedidos e a de cada pedido em `pks`."""
+    token = new_token()
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.set(ORDERS, token)
+        for pk in pks:
+            pipe.set(order_key(pk), token, ex=ORDER_TTL)
+        pipe.execute()
+    except Exception:
+        pass
+    return token
+
+
+def _seed_args(keys, tokens, seed):
+    seed = keys if seed is None else seed
+    return [key for key, token in zip(keys, tokens) if token is None and key in seed]
+
+
+def _seeded(keys, tokens, missing, results):
+    # SET NX + GET: quem chegar primeiro define o token; concorrentes leem o mesmo
+    stored = dict(zip(missing, results[1::2]))
+    return [token if token is not None else stored.get(key) for key, token in zip(keys, tokens)]
+
+
+def read(*keys, seed=None):
+    """Lista de tokens ou None se o Redis estiver fora.
+
+    Chave ausente (Redis reiniciado, evicção) ganha um token novo em vez de
+    ficar None: uma ETag montada sem versão se repetiria entre períodos sem a
+    chave e daria 304 para dados que mudaram. `seed` limita quais chaves
+    ausentes são criadas (padrão: todas); as outras voltam None."""
+    try:
+        client = get_redis_client()
+        tokens = client.mget(keys)
+        missing = _seed_args(keys, tokens, seed)
+        if not missing:
+            return tokens
+        pipe = client.pipeline(transaction=False)
+        for key in missing:
+            pipe.set(key, new_token(), nx=True)
+            pipe.get(key)
+        return _seeded(keys, tokens, missing, pipe.execute())
+    except Exception:
+        return None
+
+
+async def aread(*keys, seed=None):
+    try:
+        client = get_async_redis_client()
+        tokens = await client.mget(keys)
+        missing = _seed_args(keys, tokens, seed)
+        if not missing:
+            return tokens
+        pipe = client.pipeline(transaction=False)
+        for key in missing:
+            pipe.set(key, new_token(), nx=True)
+            pipe.get(key)
+        return _seeded(keys, tokens, missing, await pipe.execute())
+    except Exception:
+        return None
+
+
+def _order_tokens(tokens):
+    # sem versão individual (expirada/nunca gravada) usa a global, que é mais conservadora
+    if tokens is None:
+        return None
+    return [tokens[0] or tokens[1]]
+
+
+def order_tokens(pk):
+    # a versão individual não é criada (não teria TTL); sem ela vale a global
+    return _order_tokens(read(order_key(pk), ORDERS, seed=(ORDERS,)))
+
+
+async def aorder_tokens(pk):
+    return _order_tokens(await aread(order_key(pk), ORDERS, seed=(ORDERS,)))
@@ -8,27 +8,25 @@ from rest_framework.exceptions import AuthenticationFailed
 from django.utils import timezone
 from django.db import transaction, connection
 from decimal import Decimal
-from django.db.models import Q, Sum, F, Value, IntegerField, Case, When
+from django.db.models import Q, Sum, F, Value, IntegerField, Case, When, Count, OuterRef, Subquery
 from django.db.models.functions import Coalesce, Greatest
 from django.conf import settings
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 import os
-import psutil
-import redis
 from django.utils.dateparse import parse_datetime
 from django.views.decorators.csrf import csrf_exempt
-from django.core.management.color import no_style
 
 from .models import (
     Item,
     Pedido,
     PedidoItem,
     Pagamento,
-    StatusLog,
     CategoryOrder,
     DashboardUser,
     AuthToken,
+    Evento,
+    ArchivedPedido,
 )
 from .serializers import (
     ItemSerializer,
@@ -39,23 +37,33 @@ from .serializers import (
 from .services.mercadopago import criar_preferencia, processar_webhook, criar_pagamento_pix
 from .auth_utils import (
     authenticate_dashboard,
+    current_token,
     require_dashboard_user,
     verify_password,
     create_token,
     invalidate_token,
 )
+from .redis_client import get_redis_client
+from .db_pool.pool import pool_stats
+from .catalog_cache import category_snapshot
+from .http_cache import conditional_response, etag_matches, set_validators
+from .presence import parse_presence_request
+from . import catalog_import, catalog_search, events, housekeeping, order_snapshot, order_status, presence, production_board, rate_limit, sales, status_log, stock, versions, waiting_room
+from . import profiling
 
 
-def get_redis_client():
-    host = os.getenv("REDIS_HOST", "redis")
-    port = int(os.getenv("REDIS_PORT", "6379"))
-    return redis.Redis(host=host, port=port, db=0, socket_connect_timeout=1, socket_timeout=1)
+def http_presence_keys(client, kind: str):
+    return list(client.scan_iter(match=f"presence:{kind}:*", count=500))
 
 
 def count_presence(kind: str) -> int:
+    """Sessões presentes pelo WebSocket ou pelo heartbeat HTTP, sem repetir."""
     try:
         client = get_redis_client()
-        return sum(1 for _ in client.scan_iter(match=f"presence:{kind}:*", count=500))
+        prefix = len(f"presence:{kind}:")
+        sessions = {key.decode()[prefix:] for key in http_presence_keys(client, kind)}
+        sessions.update(presence.socket_sessions(kind))
+        return len(sessions)
     except Exception:
         return 0
 
@@ -63,16 +71,15 @@ def count_presence(kind: str) -> int:
 def fetch_presence_windows(kind: str):
     try:
         client = get_redis_client()
+        keys = http_presence_keys(client, kind)
+        socket_sessions = presence.socket_sessions(kind)
     except Exception:
         return []
 
-    keys = list(client.scan_iter(match=f"presence:{kind}:*", count=500))
-    if not keys:
-        return []
-
-    values = client.mget(keys)
-    windows = []
-    for raw in values:
+    windows = {}
+    prefix = len(f"presence:{kind}:")
+    values = client.mget(keys) if keys else []
+    for key, raw in zip(keys, values):
         if not raw:
             continue
         try:
@@ -89,8 +96,16 @@ def fetch_presence_windows(kind: str):
                 expires_dt = None
         if not start_dt or not expires_dt:
             continue
-        windows.append((start_dt, expires_dt))
-    return windows
+        windows[key.decode()[prefix:]] = (start_dt, expires_dt)
+
+    # conexão aberta: presente desde o connect até agora
+    still_open = timezone.now() + timedelta(minutes=1)
+    for session_id, data in socket_sessions.items():
+        start_dt = parse_to_aware(data.get("first_seen"))
+        if start_dt:
+            previous = windows.get(session_id)
+            windows[session_id] = (min(start_dt, previous[0]) if previous else start_dt, still_open)
+    return list(windows.values())
 
 
 def parse_to_aware(value):
@@ -131,60 +146,100 @@ def store_presence_sample(timestamp, admins: int, clients: int, tokens: int):
     except Exception:
         pass
 
+def item_queryset(params, only_active=True, category_orders=None, search_index=None):
+    """Queryset do cardápio (filtros, estoque calculado e ordem das categorias).
+    Compartilhado entre ItemView e a versão async em async_views, que passa
+    `category_orders` ([(nome, ordem)] do snapshot) e `search_index` já
+    carregados para não consultar o banco/Redis de forma síncrona."""
+    qs = Item.objects.all()
+    if only_active:
+        qs = qs.filter(ativo=True)
+    q = (params.get("q") or "").strip()
+    tiers = None
+    # q só com pontuação ("-", "!!") não tem termo para buscar: cardápio sem filtro
+    if catalog_search.tokenize(q):
+        # busca no índice em memória (catalog_search); o banco só recebe os ids
+        index = catalog_search.search_index() if search_index is None else search_index
+        tiers = index.tiers(q, only_active=only_active)
+        qs = qs.filter(pk__in=[pk for tier in tiers for pk in tier])
+    cat = (params.get("category") or "").strip()
+    if cat:
+        qs = qs.filter(categoria=cat)
+    vendas_confirmadas = Coalesce(
+        Sum(
+            "pedidoitem__qtd",
+            filter=Q(pedidoitem__pedido__paid_at__isnull=False, pedidoitem__pedido__evento__ativo=True)
+        ),
+        Value(0, output_field=IntegerField()),
+    )
+    qs = qs.annotate(
+        vendidos_confirmados=vendas_confirmadas,
+        vendidos_total=sales.vendidos_total(),
+    ).annotate(
+        estoque_disponivel_calc=Greatest(
+            Value(0, output_field=IntegerField()),
+            F("estoque_inicial") - F("vendidos_confirmados"),
+        )
+    )
+
+    if tiers:
+        # com busca, a ordem é a relevância: uma faixa por nota, empates por nome
+        search_rank = Case(
+            *(When(pk__in=tier, then=Value(rank)) for rank, tier in enumerate(tiers[:-1])),
+            default=Value(len(tiers) - 1),
+            output_field=IntegerField(),
+        )
+        return qs.annotate(search_rank=search_rank).order_by("search_rank", "nome", "id")
+
+    orders = category_snapshot().category_orders if category_orders is None else category_orders
+    if orders:
+        whens = [
+            When(categoria__iexact=nome, then=Value(ordem))
+            for nome, ordem in orders
+        ]
+        categoria_ordem = Case(
+            *whens,
+            default=Value(999, output_field=IntegerField()),
+            output_field=IntegerField(),
+        )
+        qs = qs.annotate(categoria_ordem=categoria_ordem).order_by("categoria_ordem", "categoria", "nome")
+    else:
+        qs = qs.order_by("categoria", "nome")
+    return qs
+
+
+def annotated_item(pk):
+    """Item com as mesmas anotações da listagem (vendidos com as parcelas de sales.py, estoque)."""
+    return item_queryset({}, only_active=False, category_orders=[]).get(pk=pk)
+
+
 class ItemView(viewsets.ModelViewSet):
     serializer_class = ItemSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
-        qs = Item.objects.all()
-        all_param = self.request.query_params.get("all")
         # Para operações de detalhe/alteração, não filtrar por ativo;
         # filtra apenas na listagem quando 'all' não foi informado.
-        if self.action == "list" and not all_param:
-            qs = qs.filter(ativo=True)
-        q = (self.request.query_params.get("q") or "").strip()
-        if q:
-            qs = qs.filter(Q(nome__icontains=q) | Q(descricao__icontains=q) | Q(categoria__icontains=q))
-        cat = (self.request.query_params.get("category") or "").strip()
-        if cat:
-            qs = qs.filter(categoria=cat)
-        vendas_confirmadas = Coalesce(
-            Sum(
-                "pedidoitem__qtd",
-                filter=Q(pedidoitem__pedido__paid_at__isnull=False)
-            ),
-            Value(0, output_field=IntegerField()),
-        )
-        qs = qs.annotate(
-            vendidos_confirmados=vendas_confirmadas,
-        ).annotate(
-            estoque_disponivel_calc=Greatest(
-                Value(0, output_field=IntegerField()),
-                F("estoque_inicial") - F("vendidos_confirmados"),
-            )
-        )
+        only_active = self.action == "list" and not self.request.query_params.get("all")
+        return item_queryset(self.request.query_params, only_active=only_active)
 
-        orders = list(CategoryOrder.objects.all())
-        if orders:
-            whens = [
-                When(categoria__iexact=cat.nome, then=Value(cat.ordem))
-                for cat in orders
-            ]
-            categoria_ordem = Case(
-                *whens,
-                default=Value(999, output_field=IntegerField()),
-                output_field=IntegerField(),
-            )
-            qs = qs.annotate(categoria_ordem=categoria_ordem).order_by("categoria_ordem", "categoria", "nome")
-        else:
-            qs = qs.order_by("categoria", "nome")
-        return qs
+    def list(self, request, *args, **kwargs):
+        # estoque disponível depende dos pedidos pagos, então a versão de pedidos entra no ETag
+        tokens = versions.read(versions.CATALOG, versions.ORDERS)
+        return conditional_response(
+            request, tokens, lambda: super(ItemView, self).list(request, *args, **kwargs), request.get_full_path()
+        )
 
     def get_object(self):
         # Para operações de detalhe (retrieve/update/partial_update/destroy)
         # não aplicamos filtros de 'ativo' ou de busca; buscamos direto por PK
-        from .models import Item
-        return Item.objects.get(pk=self.kwargs.get(self.lookup_field or 'pk'))
+        return annotated_item(self.kwargs.get(self.lookup_field or 'pk'))
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        # vendidos/estoque recalculados depois da gravação (ajuste manual zera as parcelas)
+        response.data = ItemSerializer(annotated_item(self.kwargs.get(self.lookup_field or 'pk'))).data
+        return response
 
     # Endpoints auxiliares para contornar ambientes onde o detalhe pode falhar por filtros/roteamento
     @action(detail=False, methods=["post"], url_path="toggle_active")
@@ -200,7 +255,7 @@ class ItemView(viewsets.ModelViewSet):
             return Response({"detail": "Item não encontrado"}, status=status.HTTP_404_NOT_FOUND)
         it.ativo = bool(request.data.get("ativo"))
         it.save(update_fields=["ativo"])
-        return Response(ItemSerializer(it).data)
+        return Response(ItemSerializer(annotated_item(it.pk)).data)
 
     @action(detail=False, methods=["patch"], url_path="update_item")
     def update_item(self, request):
@@ -216,7 +271,7 @@ class ItemView(viewsets.ModelViewSet):
         ser = ItemSerializer(it, data=request.data, partial=True)
         ser.is_valid(raise_exception=True)
         ser.save()
-        return Response(ser.data)
+        return Response(ItemSerializer(annotated_item(it.pk)).data)
 
 class PedidoView(viewsets.ModelViewSet):
     queryset = Pedido.objects.all().order_by("-id")
@@ -231,11 +286,28 @@ class PedidoView(viewsets.ModelViewSet):
         if self.request.method == "GET" and self.action == "list":
             require_dashboard_user(self.request, routes=["vendas", "cozinha", "tv", "pagamentos", "dashboard", "estoque"])
         qs = super().get_queryset()
+        if self.action == "list":
+            # listagem fica no evento ativo; ?evento=<id> consulta um encerrado ainda não arquivado
+            evento_q = self.request.query_params.get("evento")
+            qs = qs.filter(evento_id=evento_q) if evento_q and evento_q.isdigit() else qs.filter(evento__ativo=True)
         status_q = self.request.query_params.get("status")
         if status_q:
             qs = qs.filter(status=status_q)
         return qs
 
+    def list(self, request, *args, **kwargs):
+        require_dashboard_user(request, routes=["vendas", "cozinha", "tv", "pagamentos", "dashboard", "estoque"])
+        tokens = versions.read(versions.ORDERS)
+        return conditional_response(
+            request, tokens, lambda: super(PedidoView, self).list(request, *args, **kwargs), request.get_full_path()
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs.get("pk")
+        return conditional_response(
+            request, versions.order_tokens(pk), lambda: super(PedidoView, self).retrieve(request, *args, **kwargs), str(pk)
+        )
+
     def create(self, request, *args, **kwargs):
         data = request.data
         itens_in = data.get("itens", [])
@@ -256,7 +328,7 @@ class PedidoView(viewsets.ModelViewSet):
         antecipado_flag = to_bool(data.get("antecipado", False))
 
         # Carregar itens por sku ou id e validar estoque
-        items_map_by_sku = {it.sku: it for it in Item.objects.all()}
+        items_map_by_sku = {it.sku: it for it in Item.objects.annotate(vendidos_total=sales.vendidos_total())}
 
         pedido_itens = []
         total = Decimal("0.00")
@@ -270,7 +342,7 @@ class PedidoView(viewsets.ModelViewSet):
                 return Response({"detail": f"SKU {sku} inválido"}, status=status.HTTP_400_BAD_REQUEST)
             # valida estoque
             if item.estoque_inicial is not None:
-                disponivel = max(item.estoque_inicial - item.vendidos, 0)
+                disponivel = max(item.estoque_inicial - item.vendidos_total, 0)
                 if qtd > disponivel:
                     return Response({"detail": f"SKU {sku} sem estoque suficiente"}, status=status.HTTP_400_BAD_REQUEST)
             preco = Decimal(str(item.preco))
@@ -282,26 +354,47 @@ class PedidoView(viewsets.ModelViewSet):
                 "qtd": qtd,
             })
 
-        with transaction.atomic():
-            pedido = Pedido.objects.create(
-                cliente_nome=nome,
-                cliente_waid=waid,
-                valor_total=total,
-                status="aguardando pagamento",
-                meio_pagamento=(data.get("meio_pagamento") or "Mercado Pago"),
-                observacoes=(data.get("observacoes") or ""),
-                precisa_embalagem=precisa_embalagem,
-                antecipado=antecipado_flag,
-            )
-            from .models import PedidoItem as PI
-            for it in pedido_itens:
-                PI.objects.create(
-                    pedido=pedido,
-                    item=it["item"],
-                    nome=it["nome"],
-                    preco=it["preco"],
-                    qtd=it["qtd"],
+        # sala de espera: cliente só cria o pedido com a senha liberada (a equipe passa direto)
+        ticket = admission = None
+        if waiting_room.enabled() and not authenticate_dashboard(request):
+            ticket = request.META.get("HTTP_X_WAITING_TICKET") or data.get("waiting_ticket")
+            admission = waiting_room.consume(ticket)
+            if not admission:
+                return Response(
+                    {"detail": "Aguarde sua vez na fila para finalizar o pedido.", "waiting_room": True},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+
+        try:
+            evento = events.current_event()
+            resumo = order_snapshot.build((it["item"].id, it["nome"], it["preco"], it["qtd"]) for it in pedido_itens)
+            with transaction.atomic():
+                pedido = Pedido.objects.create(
+                    evento=evento,
+                    cliente_nome=nome,
+                    cliente_waid=waid,
+                    valor_total=total,
+                    status="aguardando pagamento",
+                    meio_pagamento=(data.get("meio_pagamento") or "Mercado Pago"),
+                    observacoes=(data.get("observacoes") or ""),
+                    precisa_embalagem=precisa_embalagem,
+                    antecipado=antecipado_flag,
+                    resumo=resumo,
                 )
+                for it in pedido_itens:
+                    PedidoItem.objects.create(
+                        pedido=pedido,
+                        item=it["item"],
+                        nome=it["nome"],
+                        preco=it["preco"],
+                        qtd=it["qtd"],
+                    )
+        except Exception:
+            # pedido não gravado: a senha não perde a vez
+            if admission:
+                waiting_room.give_back(ticket, admission)
+            raise
+        status_log.record(pedido.id, "", pedido.status, pedido.created_at)
         ser = PedidoSerializer(pedido)
         return Response(ser.data, status=status.HTTP_201_CREATED)
 
@@ -317,20 +410,13 @@ class PedidoView(viewsets.ModelViewSet):
             pedido.status = novo
             aprovando = (de != "pago" and novo == "pago" and not pedido.paid_at)
             if aprovando:
-                # marca pago e atualiza vendidos/estoque
+                # marca pago e soma as vendas (contador em parcelas, sem travar a linha do Item)
                 pedido.paid_at = timezone.now()
-                from .models import PedidoItem, Item
-                itens = PedidoItem.objects.select_related("item").filter(pedido=pedido)
-                # lock itens de estoque
-                item_ids = [pi.item_id for pi in itens]
-                items_locked = list(Item.objects.select_for_update().filter(id__in=item_ids))
-                map_items = {it.id: it for it in items_locked}
-                for pi in itens:
-                    it = map_items.get(pi.item_id)
-                    if not it: continue
-                    it.vendidos = it.vendidos + pi.qtd
-                    it.save(update_fields=["vendidos"])
+                sales.add_sales(sales.sold_quantities([pedido.pk]))
             pedido.save()
+            if de != novo:
+                quando = timezone.now()
+                transaction.on_commit(lambda: status_log.record(pedido.id, de, novo, quando))
         # broadcast
         try:
             layer = get_channel_layer()
@@ -366,6 +452,184 @@ class PedidoView(viewsets.ModelViewSet):
         return Response({"ok": True, "antecipado": pedido.antecipado})
 
 
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def production_board_view(request):
+    """Quadro da cozinha (filas por status + unidades a produzir) lido do Redis."""
+    require_dashboard_user(request, routes=["cozinha", "tv", "vendas"])
+    tokens = versions.read(versions.ORDERS)
+    return conditional_response(request, tokens, lambda: Response(production_board.board()), "board")
+
+
+VALID_STATUSES = {value for value, _ in Pedido.STATUS}
+BULK_STATUS_MAX = 200
+
+
+def parse_bulk_status_changes(data):
+    """Aceita {"changes": [{"id", "status"}, ...]} ou {"ids": [...], "status": "..."}."""
+    changes = data.get("changes")
+    if changes is None:
+        ids = data.get("ids")
+        if not isinstance(ids, list):
+            return None
+        changes = [{"id": pk, "status": data.get("status")} for pk in ids]
+    if not isinstance(changes, list):
+        return None
+    parsed = []
+    for change in changes:
+        if not isinstance(change, dict):
+            return None
+        try:
+            pk = int(change.get("id"))
+        except (TypeError, ValueError):
+            return None
+        parsed.append((pk, change.get("status")))
+    return parsed
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def bulk_status_view(request):
+    """Aplica várias transições de status em uma transação, com um único evento no WebSocket."""
+    require_dashboard_user(request, routes=["vendas", "cozinha"])
+    changes = parse_bulk_status_changes(request.data)
+    if changes is None:
+        return Response({"detail": "Envie 'changes' (lista de {id, status}) ou 'ids' + 'status'."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(changes) > BULK_STATUS_MAX:
+        return Response({"detail": f"Máximo de {BULK_STATUS_MAX} pedidos por requisição."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    # último status vence se o mesmo pedido vier repetido
+    targets = dict(changes)
+    results = {}
+    with transaction.atomic():
+        rows = Pedido.objects.select_for_update().filter(pk__in=targets).values_list("id", "status", "paid_at")
+        current = {pk: de for pk, de, _ in rows}
+        paid_at_missing = {pk for pk, _, paid_at in rows if paid_at is None}
+        by_status = {}
+        newly_paid = []
+        for pk, novo in targets.items():
+            de = current.get(pk)
+            if de is None:
+                results[pk] = {"id": pk, "ok": False, "detail": "Pedido não encontrado"}
+            elif novo not in VALID_STATUSES:
+                results[pk] = {"id": pk, "ok": False, "detail": "Status inválido"}
+            elif novo == de:
+                results[pk] = {"id": pk, "ok": True, "de": de, "para": novo, "changed": False}
+            else:
+                results[pk] = {"id": pk, "ok": True, "de": de, "para": novo, "changed": True}
+                if novo == "pago" and pk in paid_at_missing:
+                    newly_paid.append(pk)
+                else:
+                    by_status.setdefault(novo, []).append(pk)
+
+        # um UPDATE por status de destino
+        for novo, pks in by_status.items():
+            Pedido.objects.filter(pk__in=pks).update(status=novo)
+        paid_at = timezone.now()
+        if newly_paid:
+            Pedido.objects.filter(pk__in=newly_paid).update(status="pago", paid_at=paid_at)
+            # vendas de todos os pedidos recém-pagos agrupadas por item
+            sales.add_sales(sales.sold_quantities(newly_paid))
+
+        changed = [pk for pk, r in results.items() if r.get("changed")]
+        if changed:
+            # .update() não dispara post_save: quadro e versões são atualizados aqui
+            quando = timezone.now()
+
+            def after_commit():
+                production_board.sync_orders(changed)
+                versions.bump_order(*changed)
+                status_log.record_many([(pk, results[pk]["de"], results[pk]["para"]) for pk in changed], quando)
+                order_status.publish_many({
+                    pk: {"status": results[pk]["para"], **({"paid_at": paid_at} if pk in newly_paid else {})}
+                    for pk in changed
+                })
+            transaction.on_commit(after_commit)
+
+    if changed:
+        try:
+            layer = get_channel_layer()
+            async_to_sync(layer.group_send)(
+                "orders",
+                {"type": "orders.event", "data": {
+                    "event": "orders_updated",
+                    "orders": [{"id": pk, "status": results[pk]["para"]} for pk in changed],
+                }},
+            )
+        except Exception:
+            pass
+
+    return Response({
+        "ok": all(r["ok"] for r in results.values()),
+        "changed": len(changed),
+        "results": [results[pk] for pk in targets],
+    })
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def stock_overview_view(request):
+    """Estoque por item (inicial, vendido, aguardando pagamento, disponível) e totais por categoria."""
+    require_dashboard_user(request, routes=["estoque", "itens"])
+    # vendidos e pendentes mudam com os pedidos; o resto com o catálogo
+    tokens = versions.read(versions.CATALOG, versions.ORDERS)
+    return conditional_response(request, tokens, lambda: Response(stock.overview()), "stock")
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def bulk_stock_view(request):
+    """Ajusta `estoque_inicial` de vários itens com um único bulk_update."""
+    require_dashboard_user(request, routes=["estoque", "itens"])
+    changes = stock.parse_changes(request.data)
+    if changes is None:
+        return Response({"detail": "Envie 'changes' (lista de {id, estoque_inicial} com estoque >= 0)."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(changes) > stock.BULK_STOCK_MAX:
+        return Response({"detail": f"Máximo de {stock.BULK_STOCK_MAX} itens por requisição."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    changed = stock.set_initial(changes)
+    return Response({"ok": True, "changed": len(changed), "ids": changed})
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def catalog_import_view(request):
+    """Importa itens em lote (CSV ou JSON), com upsert por sku; `dry_run` só valida."""
+    require_dashboard_user(request, routes=["itens"])
+    options = request.query_params.dict()
+
+    def flag(name):
+        return str(options.get(name, "")).strip().lower() in catalog_import.TRUE_VALUES
+
+    try:
+        if "csv" in (request.content_type or ""):
+            # text/csv não passa pelos parsers do DRF: lê o corpo cru
+            rows = catalog_import.parse_csv(request.body.decode("utf-8-sig"))
+        elif request.FILES.get("file") is not None:
+            upload = request.FILES["file"]
+            text = upload.read().decode("utf-8-sig")
+            is_json = (upload.name or "").lower().endswith(".json")
+            rows = catalog_import.parse_json(text) if is_json else catalog_import.parse_csv(text)
+        else:
+            if isinstance(request.data, dict):
+                options.update({k: request.data[k] for k in ("dry_run", "deactivate_missing") if k in request.data})
+            rows = catalog_import.parse_json(request.data)
+        result = catalog_import.import_rows(rows, deactivate_missing=flag("deactivate_missing"), dry_run=flag("dry_run"))
+    except UnicodeDecodeError:
+        return Response({"detail": "O arquivo precisa estar em UTF-8."}, status=status.HTTP_400_BAD_REQUEST)
+    except catalog_import.CatalogImportError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result, status=status.HTTP_200_OK if result["ok"] else status.HTTP_400_BAD_REQUEST)
+
+
 class CategoryOrderView(viewsets.ModelViewSet):
     queryset = CategoryOrder.objects.all().order_by("ordem", "nome")
     serializer_class = CategoryOrderSerializer
@@ -416,6 +680,44 @@ def criar_preference_view(request):
         return Response({"detail": "Valor do pedido inválido"}, status=status.HTTP_400_BAD_REQUEST)
     return Response(criar_preferencia(pedido_id))
 
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def waiting_room_enter(request):
+    """Pega uma senha da sala de espera; com a sala desligada, libera direto."""
+    if not waiting_room.enabled():
+        return Response({"enabled": False, "ticket": None, "status": waiting_room.ADMITTED})
+    try:
+        return Response({"enabled": True, **waiting_room.enter()})
+    except Exception:
+        # sem Redis não há fila: segue sem senha (consume deixa passar)
+        return Response({"enabled": False, "ticket": None, "status": waiting_room.ADMITTED})
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def waiting_room_status(request, ticket):
+    """Posição da senha (alternativa ao WebSocket ws/waiting-room/<senha>); conta como heartbeat."""
+    try:
+        return Response(waiting_room.tick(ticket))
+    except Exception:
+        return Response({"status": waiting_room.ADMITTED})
+
+
+@api_view(["GET", "POST"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def admin_waiting_room(request):
+    require_dashboard_user(request, routes=["config", "vendas"])
+    try:
+        if request.method == "POST":
+            waiting_room.set_enabled(bool(request.data.get("enabled")))
+        return Response(waiting_room.stats())
+    except Exception as exc:
+        return Response({"detail": f"Redis indisponível: {exc}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
 def webhook_mp(request):
@@ -469,17 +771,10 @@ def create_pix_payment(request):
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def categories_view(request):
-    cats = list(Item.objects.filter(ativo=True).values_list("categoria", flat=True).distinct())
-    cats = [c or "Outros" for c in cats]
-    order_map = {c.nome.lower(): c.ordem for c in CategoryOrder.objects.all()}
-    fallback = {"hamburguer": 0, "drink": 1, "bebidas": 2}
-
-    def score(cat: str):
-        key = (cat or "").lower()
-        return order_map.get(key, fallback.get(key, 999))
-
-    cats.sort(key=lambda c: (score(c), c.lower()))
-    return Response(cats)
+    snap = category_snapshot()
+    if etag_matches(request, snap.etag):
+        return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), snap.etag)
+    return set_validators(Response(snap.categories), snap.etag)
 
 
 ROUTE_OPTIONS = [
@@ -545,6 +840,8 @@ def admin_metrics(request):
     active_clients = count_presence("client") if redis_online else 0
     active_total = active_admins + active_clients
 
+    import psutil  # só as métricas usam; fica fora do import das views
+
     cpu_percent = psutil.cpu_percent(interval=0.1)
     virtual = psutil.virtual_memory()
     disk = psutil.disk_usage("/")
@@ -579,6 +876,9 @@ def admin_metrics(request):
             "active_total": active_total,
         },
         "instance": instance,
+        "database_pool": pool_stats(),
+        "housekeeping": housekeeping.last_report(),
+        "rate_limit_rejects": rate_limit.reject_stats(),
     })
 
 
@@ -682,6 +982,38 @@ def admin_metrics_history(request):
     )
 
 
+@api_view(["GET", "POST"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def admin_profiling(request):
+    require_dashboard_user(request, routes=["config"])
+    if request.method == "POST":
+        profiling.reset()
+    return Response({
+        "pid": os.getpid(),
+        "window_seconds": settings.PROFILING_WINDOW_SECONDS,
+        "buckets_ms": profiling.HISTOGRAM_BUCKETS_MS,
+        "routes": profiling.snapshot(),
+        "database_pool": pool_stats(),
+    })
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def admin_stage_analytics(request):
+    """Percentis do tempo em cada status por hora, a partir dos histogramas de status_log."""
+    require_dashboard_user(request, routes=["dashboard", "config"])
+    try:
+        hours = min(max(int(request.query_params.get("hours", 24)), 1), 24 * 30)
+    except (TypeError, ValueError):
+        return Response({"detail": "hours inválido"}, status=status.HTTP_400_BAD_REQUEST)
+    # transições ainda no buffer entram antes de consultar
+    status_log.flush()
+    since = (timezone.now() - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+    return Response({"since": since.isoformat(), **status_log.stage_durations(since)})
+
+
 @api_view(["POST"])
 @authentication_classes([])
 @permission_classes([permissions.AllowAny])
@@ -695,24 +1027,16 @@ def admin_reset_sales(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    orders_count = Pedido.objects.count()
-    payments_count = Pagamento.objects.count()
-    status_count = StatusLog.objects.count()
-    items_with_sales = Item.objects.filter(vendidos__gt=0).count()
+    items_with_sales = Item.objects.annotate(vendidos_total=sales.vendidos_total()).filter(vendidos_total__gt=0).count()
 
+    # encerrar o evento é só trocar o ativo: os pedidos dele somem das consultas
+    # quentes na hora e são arquivados depois pelo comando archive_events
     with transaction.atomic():
-        Pedido.objects.all().delete()
-        Pagamento.objects.all().delete()
-        StatusLog.objects.all().delete()
+        encerrado, novo = events.close_current_event(request.data.get("nome"))
+        sales.reset()
         Item.objects.update(vendidos=0)
-
-        if connection.features.supports_sequence_reset:
-            models_to_reset = [Pedido, PedidoItem, Pagamento, StatusLog]
-            sql_statements = connection.ops.sequence_reset_sql(no_style(), models_to_reset)
-            if sql_statements:
-                with connection.cursor() as cursor:
-                    for sql in sql_statements:
-                        cursor.execute(sql)
+    production_board.invalidate()
+    versions.bump(versions.ORDERS)
 
     try:
         layer = get_channel_layer()
@@ -727,63 +1051,89 @@ def admin_reset_sales(request):
     return Response(
         {
             "ok": True,
-            "orders_deleted": orders_count,
-            "payments_deleted": payments_count,
-            "status_logs_deleted": status_count,
+            "closed_event": encerrado and {"id": encerrado.id, "nome": encerrado.nome},
+            "new_event": {"id": novo.id, "nome": novo.nome},
+            "orders_to_archive": Pedido.objects.filter(evento=encerrado).count() if encerrado else 0,
             "items_reset": items_with_sales,
         }
     )
 
 
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def admin_events(request):
+    """Eventos com a contagem de pedidos ainda nas tabelas quentes e já arquivados."""
+    require_dashboard_user(request, routes=["config", "dashboard"])
+    # uma subconsulta por contagem: dois Count() juntariam pedidos × arquivados por evento
+    def count_of(model):
+        return Subquery(
+            model.objects.filter(evento=OuterRef("pk")).order_by().values("evento")
+            .annotate(total=Count("id")).values("total")[:1],
+            output_field=IntegerField(),
+        )
+
+    rows = Evento.objects.annotate(
+        pedidos_count=Coalesce(count_of(Pedido), 0),
+        arquivados_count=Coalesce(count_of(ArchivedPedido), 0),
+    )[:50]
+    return Response([
+        {
+            "id": ev.id,
+            "nome": ev.nome,
+            "ativo": ev.ativo,
+            "aberto_em": ev.aberto_em,
+            "encerrado_em": ev.encerrado_em,
+            "arquivado_em": ev.arquivado_em,
+            "pedidos": ev.pedidos_count,
+            "arquivados": ev.arquivados_count,
+        }
+        for ev in rows
+    ])
+
+
 @api_view(["POST"])
 @authentication_classes([])
 @permission_classes([permissions.AllowAny])
 @csrf_exempt
 def register_presence(request):
-    session_id = (request.data.get("session_id") or "").strip()
-    source = (request.data.get("source") or "client").strip().lower()
-    if source not in {"client", "admin"}:
-        source = "client"
-
-    if not session_id or len(session_id) > 128:
+    parsed = parse_presence_request(request.data)
+    if parsed is None:
         return Response({"detail": "session_id inválido."}, status=status.HTTP_400_BAD_REQUEST)
+    source, session_id, ttl = parsed
+    key = f"presence:{source}:{session_id}"
+    payload = presence_payload(request, source, ttl)
 
-    ttl_request = request.data.get("ttl")
     try:
-        ttl = int(ttl_request)
-    except (TypeError, ValueError):
-        ttl = 90
-    ttl = max(30, min(300, ttl))
+        client = get_redis_client()
+        payload["first_seen"] = presence_first_seen(client.get(key), payload["timestamp"])
+        client.setex(key, ttl, json.dumps(payload))
+    except Exception as exc:
+        return Response({"detail": f"Erro ao registrar presença: {exc}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-    now_dt = timezone.now()
-    now_iso = now_dt.isoformat()
+    return Response({"ok": True, "expires_in": ttl})
 
-    payload = {
+
+def presence_payload(request, source: str, ttl: int):
+    now_dt = timezone.now()
+    return {
         "source": source,
         "ip": request.META.get("REMOTE_ADDR", ""),
         "user_agent": request.META.get("HTTP_USER_AGENT", "")[:255],
-        "timestamp": now_iso,
+        "timestamp": now_dt.isoformat(),
         "expires_at": (now_dt + timedelta(seconds=ttl)).isoformat(),
         "ttl": ttl,
     }
 
-    try:
-        client = get_redis_client()
-        existing_raw = client.get(f"presence:{source}:{session_id}")
-        if existing_raw:
-            try:
-                existing = json.loads(existing_raw)
-                payload["first_seen"] = existing.get("first_seen") or existing.get("timestamp") or now_iso
-            except (ValueError, TypeError):
-                payload["first_seen"] = now_iso
-        else:
-            payload["first_seen"] = now_iso
-
-        client.setex(f"presence:{source}:{session_id}", ttl, json.dumps(payload))
-    except Exception as exc:
-        return Response({"detail": f"Erro ao registrar presença: {exc}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-    return Response({"ok": True, "expires_in": ttl})
+def presence_first_seen(existing_raw, now_iso: str) -> str:
+    if not existing_raw:
+        return now_iso
+    try:
+        existing = json.loads(existing_raw)
+        return existing.get("first_seen") or existing.get("timestamp") or now_iso
+    except (ValueError, TypeError):
+        return now_iso
 
 
 @api_view(["POST"])
@@ -814,10 +1164,7 @@ def admin_login(request):
 @permission_classes([permissions.AllowAny])
 @csrf_exempt
 def admin_logout(request):
-    token = getattr(request, "_cached_dashboard_token", None)
-    if not token:
-        auth = authenticate_dashboard(request)
-        token = getattr(request, "_cached_dashboard_token", None) if auth else None
+    token = current_token(request)
     if token:
         invalidate_token(token)
     return Response({"ok": True})
@@ -828,6 +1175,10 @@ def admin_logout(request):
 @permission_classes([permissions.AllowAny])
 def admin_me(request):
     user = require_dashboard_user(request)
+    # o usuário autenticado vem do cache só com id e rotas
+    user = DashboardUser.objects.filter(pk=user.pk, is_active=True).first()
+    if not user:
+        raise AuthenticationFailed("Autenticação necessária")
     return Response({"user": DashboardUserSerializer(user).data})
 
 
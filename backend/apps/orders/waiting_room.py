@@ -0,0 +1,198 @@
+"""Sala de espera do checkout para os picos.
+
+Com a sala ligada (WAITING_ROOM_ENABLED ou POST /api/admin/waiting-room), o
+cliente pega uma senha (`enter`) antes de criar o pedido e espera a vez numa
+fila FIFO no Redis. A liberação é feita por um script Lua (`_TICK`) que roda
+no máximo uma vez por WAITING_ROOM_TICK_MS, em qualquer consulta de posição:
+
+- descarta senhas sem heartbeat há WAITING_ROOM_STALE_S (aba fechada);
+- libera da frente da fila até WAITING_ROOM_RATE senhas/s (token bucket),
+  sem passar de WAITING_ROOM_MAX_ACTIVE liberadas ao mesmo tempo;
+- cada liberação vale WAITING_ROOM_ADMIT_TTL s e é gasta em PedidoView.create
+  (`consume`), abrindo vaga para o próximo; se o pedido não chega a ser
+  gravado, ela volta para a senha (`give_back`).
+
+A posição chega ao cliente pelo WebSocket `ws/waiting-room/<senha>`
+(WaitingRoomConsumer) ou por GET /api/waiting-room/<senha>. Pedidos da
+equipe (token do painel) não passam pela sala. Sem Redis, todos entram.
+"""
+import math
+import secrets
+
+from django.conf import settings
+
+from .redis_client import get_async_redis_client, get_redis_client
+
+
+QUEUE_KEY = "wr:queue"      # zset senha -> ordem de chegada
+SEEN_KEY = "wr:seen"        # zset senha -> último heartbeat
+ACTIVE_KEY = "wr:active"    # zset senha -> validade da liberação
+BUCKET_KEY = "wr:bucket"
+TICK_KEY = "wr:tick"
+SEQ_KEY = "wr:seq"
+ENABLED_KEY = "wr:enabled"  # sobrescreve WAITING_ROOM_ENABLED (admin)
+KEYS = [QUEUE_KEY, SEEN_KEY, ACTIVE_KEY, BUCKET_KEY, TICK_KEY]
+
+ADMITTED = "admitted"
+WAITING = "waiting"
+UNKNOWN = "unknown"
+
+# ARGV: senha (ou ""), taxa/s, capacidade do balde, máximo liberado,
+# validade da liberação (s), tempo sem heartbeat (s), intervalo do tick (ms).
+# Devolve {1, segundos restantes} liberada, {2, posição} esperando, {0, 0} desconhecida.
+_TICK = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local ticket = ARGV[1]
+local rate, burst = tonumber(ARGV[2]), tonumber(ARGV[3])
+local max_active, admit_ttl = tonumber(ARGV[4]), tonumber(ARGV[5])
+local stale, tick_ms = tonumber(ARGV[6]), tonumber(ARGV[7])
+
+if ticket ~= '' and redis.call('ZSCORE', KEYS[1], ticket) then
+  redis.call('ZADD', KEYS[2], now, ticket)
+end
+
+if redis.call('SET', KEYS[5], 1, 'NX', 'PX', tick_ms) then
+  redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+  local gone = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - stale, 'LIMIT', 0, 500)
+  if #gone > 0 then
+    redis.call('ZREM', KEYS[1], unpack(gone))
+    redis.call('ZREM', KEYS[2], unpack(gone))
+  end
+  local state = redis.call('HMGET', KEYS[4], 't', 'ts')
+  local tokens = tonumber(state[1]) or burst
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+  local slots = max_active - redis.call('ZCARD', KEYS[3])
+  local n = math.min(math.floor(tokens), slots)
+  if n > 0 then
+    local heads = redis.call('ZRANGE', KEYS[1], 0, n - 1)
+    for _, head in ipairs(heads) do
+      redis.call('ZADD', KEYS[3], now + admit_ttl, head)
+    end
+    if #heads > 0 then
+      redis.call('ZREM', KEYS[1], unpack(heads))
+      redis.call('ZREM', KEYS[2], unpack(heads))
+    end
+    tokens = tokens - #heads
+  end
+  redis.call('HSET', KEYS[4], 't', tostring(tokens), 'ts', tostring(now))
+end
+
+if ticket == '' then
+  return {0, 0}
+end
+local expires = redis.call('ZSCORE', KEYS[3], ticket)
+if expires then
+  return {1, math.max(0, math.floor(tonumber(expires) - now))}
+end
+local rank = redis.call('ZRANK', KEYS[1], ticket)
+if rank then
+  return {2, rank + 1}
+end
+return {0, 0}
+"""
+
+
+def enabled() -> bool:
+    try:
+        value = get_redis_client().get(ENABLED_KEY)
+    except Exception:
+        return False
+    if value is None:
+        return settings.WAITING_ROOM_ENABLED
+    return value == b"1"
+
+
+def set_enabled(value: bool):
+    get_redis_client().set(ENABLED_KEY, "1" if value else "0")
+
+
+def _args(ticket):
+    return [
+        ticket or "",
+        settings.WAITING_ROOM_RATE,
+        max(1, int(settings.WAITING_ROOM_RATE * settings.WAITING_ROOM_BURST_S)),
+        settings.WAITING_ROOM_MAX_ACTIVE,
+        settings.WAITING_ROOM_ADMIT_TTL,
+        settings.WAITING_ROOM_STALE_S,
+        settings.WAITING_ROOM_TICK_MS,
+    ]
+
+
+def _state(reply) -> dict:
+    code, value = int(reply[0]), int(reply[1])
+    if code == 1:
+        return {"status": ADMITTED, "expires_in": value}
+    if code == 2:
+        return {"status": WAITING, "position": value}
+    return {"status": UNKNOWN}
+
+
+def tick(ticket=None) -> dict:
+    """Roda a liberação (se for a vez) e devolve o estado da senha."""
+    client = get_redis_client()
+    return _state(client.register_script(_TICK)(keys=KEYS, args=_args(ticket)))
+
+
+async def atick(ticket=None) -> dict:
+    client = get_async_redis_client()
+    return _state(await client.register_script(_TICK)(keys=KEYS, args=_args(ticket)))
+
+
+def enter() -> dict:
+    """Entra na fila; devolve a senha com a posição (ou já liberada)."""
+    ticket = secrets.token_urlsafe(16)
+    client = get_redis_client()
+    seq = client.incr(SEQ_KEY)
+    seconds, micros = client.time()
+    pipe = client.pipeline()
+    # heartbeat com o relógio do Redis, o mesmo que o tick usa para descartar senhas
+    pipe.zadd(SEEN_KEY, {ticket: seconds + micros / 1_000_000})
+    pipe.zadd(QUEUE_KEY, {ticket: seq})
+    pipe.execute()
+    return {"ticket": ticket, **tick(ticket)}
+
+
+def consume(ticket):
+    """Gasta a liberação da senha (uma vez) e devolve a validade dela (epoch),
+    para `give_back`; None se a senha não estava liberada. Sem Redis, deixa passar."""
+    if not ticket:
+        return None
+    try:
+        client = get_redis_client()
+        pipe = client.pipeline()
+        pipe.time()
+        pipe.zscore(ACTIVE_KEY, ticket)
+        pipe.zrem(ACTIVE_KEY, ticket)
+        (seconds, micros), expires, removed = pipe.execute()
+    except Exception:
+        return math.inf
+    if removed and expires is not None and expires > seconds + micros / 1_000_000:
+        return expires
+    return None
+
+
+def give_back(ticket, expires):
+    """Devolve a liberação gasta por `consume` (o pedido não foi criado), com a mesma validade."""
+    if not ticket or not math.isfinite(expires):
+        return
+    try:
+        get_redis_client().zadd(ACTIVE_KEY, {ticket: expires})
+    except Exception:
+        pass
+
+
+def stats() -> dict:
+    client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    pipe.zcard(QUEUE_KEY)
+    pipe.zcard(ACTIVE_KEY)
+    waiting, active = pipe.execute()
+    return {
+        "enabled": enabled(),
+        "waiting": waiting,
+        "admitted": active,
+        "rate": settings.WAITING_ROOM_RATE,
+        "max_active": settings.WAITING_ROOM_MAX_ACTIVE,
+    }
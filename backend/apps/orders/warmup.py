@@ -0,0 +1,184 @@
+"""Aquecimento de cada worker antes do primeiro cliente, e o estado lido por /readyz.
+
+Roda no `lifespan.startup` do ASGI (core/asgi.py), no event loop do worker e
+antes de ele aceitar conexões:
+
+- db: abre WARMUP_DB_CONNECTIONS conexões no pool (db_pool) do primário e
+  guarda os dados do servidor consultados na primeira conexão; db_replica faz
+  o mesmo na réplica, se houver, mas não conta para a prontidão;
+- redis: ping no cliente síncrono e no async do loop (abre o pool dele);
+- catalog: snapshot das categorias e índice de busca do cardápio no LRU local
+  (a primeira leitura também sobe a assinatura de invalidação do cache_bus);
+- mercadopago: importa o pacote e monta o SDK (get_sdk), sem chamar a API.
+
+`/healthz` continua só dizendo que o processo responde. `/readyz` responde 200
+quando o aquecimento terminou e os passos obrigatórios (db, catalog) deram
+certo; senão 503 com os detalhes. Um passo que falhou é tentado de novo pela
+própria /readyz (no máximo a cada WARMUP_RETRY_S), que também cobre servidores
+sem lifespan (daphne, runserver). Se o aquecimento passar de WARMUP_TIMEOUT_S o worker
+começa a atender mesmo assim e /readyz fica 503 até ele terminar.
+"""
+import asyncio
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+REQUIRED = ("db", "catalog")
+
+state = {"ready": False, "running": False, "attempts": 0, "started_at": None, "duration_ms": None, "steps": {}}
+_task = None
+
+
+def _warm_alias(alias):
+    from django.db import connections
+
+    connection = connections[alias]
+    connection.ensure_connection()
+    get_pool = getattr(connection, "get_pool", None)
+    if get_pool is not None:
+        # mysql_server_data fica no pool: a 1ª requisição não paga a consulta
+        connection.mysql_server_data
+        pool = get_pool()
+        extra = [pool.acquire() for _ in range(min(settings.WARMUP_DB_CONNECTIONS, pool.max_size) - 1)]
+        for raw in extra:
+            pool.release(raw)
+    # na mesma thread que abriu: devolve a conexão ao pool
+    connection.close()
+
+
+def warm_db():
+    _warm_alias("default")
+
+
+def warm_db_replica():
+    # opcional: réplica fora do ar não tira o worker do ar (db_router volta ao primário)
+    from .db_router import REPLICA, replica_enabled
+
+    if replica_enabled():
+        _warm_alias(REPLICA)
+
+
+def warm_redis():
+    from .redis_client import get_redis_client
+
+    get_redis_client().ping()
+
+
+def warm_catalog():
+    from .catalog_cache import category_snapshot
+    from .catalog_search import search_index
+
+    try:
+        category_snapshot()
+        search_index()
+    finally:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def warm_mercadopago():
+    from .services.mercadopago import get_sdk
+
+    get_sdk()
+
+
+async def awarm_redis():
+    from .redis_client import get_async_redis_client
+
+    await get_async_redis_client().ping()
+
+
+SYNC_STEPS = (
+    ("db", warm_db),
+    ("db_replica", warm_db_replica),
+    ("redis", warm_redis),
+    ("catalog", warm_catalog),
+    ("mercadopago", warm_mercadopago),
+)
+
+
+def _record(name, started, error=None):
+    state["steps"][name] = {
+        "ok": error is None,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        **({"error": f"{type(error).__name__}: {error}"} if error is not None else {}),
+    }
+
+
+def _run_sync(names):
+    for name, step in SYNC_STEPS:
+        if name not in names:
+            continue
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            _record(name, started, exc)
+        else:
+            _record(name, started)
+
+
+async def _run():
+    # só refaz o que ainda não deu certo
+    pending = {name for name, _ in SYNC_STEPS if not state["steps"].get(name, {}).get("ok")}
+    state.update(running=True, attempts=state["attempts"] + 1, started_at=time.time())
+    started = time.perf_counter()
+    try:
+        await sync_to_async(_run_sync, thread_sensitive=False)(pending)
+        step_started = time.perf_counter()
+        try:
+            await awarm_redis()
+        except Exception as exc:
+            _record("redis_async", step_started, exc)
+        else:
+            _record("redis_async", step_started)
+    finally:
+        state["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        state["ready"] = all(state["steps"].get(name, {}).get("ok") for name in REQUIRED)
+        state["running"] = False
+
+
+def start():
+    """Dispara o aquecimento (uma vez por vez) e devolve a task."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run())
+    return _task
+
+
+async def startup():
+    if not settings.WARMUP_ENABLED:
+        state["ready"] = True
+        return
+    try:
+        await asyncio.wait_for(asyncio.shield(start()), settings.WARMUP_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        # segue aquecendo em segundo plano; /readyz fica 503 até terminar
+        pass
+
+
+async def areadiness() -> dict:
+    if not state["ready"] and not state["running"] and settings.WARMUP_ENABLED:
+        last = state["started_at"]
+        if last is None or time.time() - last >= settings.WARMUP_RETRY_S:
+            try:
+                await asyncio.wait_for(asyncio.shield(start()), settings.WARMUP_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                pass
+    return {"pid": os.getpid(), **state}
+
+
+async def lifespan(scope, receive, send):
+    """App ASGI do protocolo lifespan (uvicorn): aquece no startup."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await startup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -3,6 +3,7 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from apps.orders.routing import websocket_urlpatterns
+from apps.orders import warmup
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
@@ -13,4 +14,6 @@ application = ProtocolTypeRouter({
     "websocket": AuthMiddlewareStack(
         URLRouter(websocket_urlpatterns)
     ),
+    # uvicorn: aquece o worker antes de aceitar conexões (warmup.py)
+    "lifespan": warmup.lifespan,
 })
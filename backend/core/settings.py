@@ -27,6 +27,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.orders.middleware.RequestMetricsMiddleware",
+    "apps.orders.middleware.RateLimitMiddleware",
+    "apps.orders.middleware.ReplicaRoutingMiddleware",
+    "apps.orders.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -53,18 +57,72 @@ TEMPLATES = [{
 WSGI_APPLICATION = "core.wsgi.application"
 ASGI_APPLICATION = "core.asgi.application"
 
+# Pool de conexões por processo (apps.orders.db_pool). Sob ASGI cada requisição
+# usa uma thread nova, então CONN_MAX_AGE sozinho não reaproveita conexões.
+DB_POOL = os.getenv("DB_POOL", "True") == "True"
+
 DATABASES = {
   "default": {
-    "ENGINE": "django.db.backends.mysql",
+    "ENGINE": "apps.orders.db_pool" if DB_POOL else "django.db.backends.mysql",
     "NAME": os.getenv("MYSQL_DATABASE"),
     "USER": os.getenv("MYSQL_USER"),
     "PASSWORD": os.getenv("MYSQL_PASSWORD"),
     "HOST": "db",
     "PORT": 3306,
     "OPTIONS": {"charset": "utf8mb4"},
+    # com pool a conexão volta para ele ao fim de cada requisição
+    "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "60")),
+    "CONN_HEALTH_CHECKS": True,
+    "POOL": {
+      "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+      "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+      "RECYCLE": float(os.getenv("DB_POOL_RECYCLE", "3600")),
+      "PING_AFTER": float(os.getenv("DB_POOL_PING_AFTER", "10")),
+    },
   }
 }
 
+# Réplica de leitura para relatórios e painéis (apps.orders.db_router). Sem
+# DB_REPLICA_HOST não há alias "replica" e tudo vai para o primário.
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST", "")
+if DB_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": DB_REPLICA_HOST,
+        "PORT": int(os.getenv("DB_REPLICA_PORT", "3306")),
+        "USER": os.getenv("DB_REPLICA_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.getenv("DB_REPLICA_PASSWORD", DATABASES["default"]["PASSWORD"]),
+        # nos testes a réplica é o próprio banco de teste do primário
+        "TEST": {"MIRROR": "default"},
+    }
+# Verificação local sem MySQL (comando check_replica_routing): DB_SQLITE_DIR usa
+# <dir>/primary.sqlite3 como "default" e <dir>/replica.sqlite3 como "replica"
+DB_SQLITE_DIR = os.getenv("DB_SQLITE_DIR", "")
+if DB_SQLITE_DIR:
+    DATABASES = {
+        alias: {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.path.join(DB_SQLITE_DIR, f"{name}.sqlite3"),
+            **({"TEST": {"MIRROR": "default"}} if alias == "replica" else {}),
+        }
+        for alias, name in (("default", "primary"), ("replica", "replica"))
+    }
+DATABASE_ROUTERS = ["apps.orders.db_router.ReplicaRouter"]
+# (métodos, regex sobre caminho + query string) lidos da réplica
+DB_REPLICA_ROUTES = [
+    (("GET", "HEAD"), r"^/api/orders/(\?|$)"),  # listas de pedidos (relatório, TV, pagamentos)
+    (("GET", "HEAD"), r"^/api/items/\?(.*&)?all=1"),  # cardápio completo do painel (não o dos clientes)
+    (("GET", "HEAD"), r"^/api/items/stock"),
+    (("GET", "HEAD"), r"^/api/admin/metrics"),  # métricas e histórico
+    (("GET", "HEAD"), r"^/api/admin/analytics/"),
+]
+# depois de uma escrita, a equipe lê do primário por N s (read-your-writes)
+DB_REPLICA_STICKY_S = int(os.getenv("DB_REPLICA_STICKY_S", "10"))
+# versão trocada há menos de N s: a resposta com ETag é montada no primário
+DB_REPLICA_MAX_LAG_S = float(os.getenv("DB_REPLICA_MAX_LAG_S", "3"))
+# réplica que não conecta: as leituras voltam ao primário e o processo tenta de novo após N s
+DB_REPLICA_RETRY_S = float(os.getenv("DB_REPLICA_RETRY_S", "10"))
+
 LANGUAGE_CODE = "pt-br"
 TIME_ZONE = "America/Sao_Paulo"
 USE_I18N = True
@@ -82,15 +140,108 @@ BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 20,
+    # orjson (apps.orders.renderers); sem o pacote instalado usa o JSON do DRF
+    "DEFAULT_RENDERER_CLASSES": [
+        "apps.orders.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.orders.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# Compressão de respostas GET (apps.orders.middleware.CompressionMiddleware)
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "True") == "True"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Endpoints de leitura quentes servidos por views async (apps.orders.async_views)
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "True") == "True"
+
 # Channels / Redis
+# Pub/sub: um PUBLISH por group_send (msgpack), em vez de uma cópia por canal inscrito
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
         "CONFIG": {"hosts": [(os.getenv("REDIS_HOST", "redis"), int(os.getenv("REDIS_PORT", "6379")))]},
     }
 }
+# Pedidos pendentes por socket de ws/orders antes de virar um único "resync" (apps.orders.orders_feed)
+ORDERS_WS_MAX_PENDING = int(os.getenv("ORDERS_WS_MAX_PENDING", "50"))
+
+# Instrumentação por requisição (apps.orders.middleware.RequestMetricsMiddleware)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "True") == "True"
+PROFILING_SERVER_TIMING = os.getenv("PROFILING_SERVER_TIMING", "True") == "True"
+PROFILING_WINDOW = int(os.getenv("PROFILING_WINDOW", "500"))  # amostras por rota
+PROFILING_WINDOW_SECONDS = int(os.getenv("PROFILING_WINDOW_SECONDS", "900"))
+# Profiler amostrado: 0 desliga; dumps só são gravados acima de PROFILING_SLOW_MS
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", "500"))
+PROFILING_ENGINE = os.getenv("PROFILING_ENGINE", "cprofile")  # cprofile | pyinstrument
+PROFILING_DUMP_DIR = os.getenv("PROFILING_DUMP_DIR", "/tmp/umadsede-profiles")
+
+# StatusLog gravado em lote (apps.orders.status_log)
+STATUS_LOG_BATCH = int(os.getenv("STATUS_LOG_BATCH", "50"))
+STATUS_LOG_MAX_DELAY = float(os.getenv("STATUS_LOG_MAX_DELAY", "5"))  # segundos
+
+# Parcelas do contador de vendas por item (apps.orders.sales)
+SALES_COUNTER_SHARDS = int(os.getenv("SALES_COUNTER_SHARDS", "8"))
+
+# Cache local + Redis coerente entre workers (apps.orders.cache_bus)
+CACHE_LOCAL_MAXSIZE = int(os.getenv("CACHE_LOCAL_MAXSIZE", "512"))
+# teto de desatualização do LRU local se um aviso de invalidação se perder
+CACHE_LOCAL_MAX_AGE = float(os.getenv("CACHE_LOCAL_MAX_AGE", "30"))
+CACHE_REDIS_TTL = int(os.getenv("CACHE_REDIS_TTL", "300"))
+
+# Limite de taxa das rotas públicas (apps.orders.rate_limit)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True") == "True"
+# (nome, métodos, regex do path, fichas/s por sessão, capacidade do balde)
+RATE_LIMIT_RULES = [
+    ("items", ("GET",), r"^/api/items/", 2, 20),
+    ("orders_create", ("POST",), r"^/api/orders/$", 0.2, 5),
+    ("payments_sync", ("POST",), r"^/api/payments/sync$", 0.5, 6),
+    ("presence", ("POST",), r"^/api/presence$", 0.2, 4),
+    ("waiting_room", ("GET", "POST"), r"^/api/waiting-room", 0.5, 6),
+]
+# o balde por IP recebe a cota da regra multiplicada (celulares no mesmo Wi-Fi/NAT)
+RATE_LIMIT_IP_MULTIPLIER = int(os.getenv("RATE_LIMIT_IP_MULTIPLIER", "25"))
+# teto somado de todos os clientes; o restante dos workers fica para a equipe
+RATE_LIMIT_CUSTOMER_RPS = float(os.getenv("RATE_LIMIT_CUSTOMER_RPS", "150"))
+RATE_LIMIT_CUSTOMER_BURST = int(os.getenv("RATE_LIMIT_CUSTOMER_BURST", "300"))
+# Caddy -> nginx -> backend
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "2"))
+
+# Sala de espera do checkout (apps.orders.waiting_room); liga/desliga também pelo painel
+WAITING_ROOM_ENABLED = os.getenv("WAITING_ROOM_ENABLED", "False") == "True"
+WAITING_ROOM_RATE = float(os.getenv("WAITING_ROOM_RATE", "3"))  # liberações por segundo
+WAITING_ROOM_BURST_S = float(os.getenv("WAITING_ROOM_BURST_S", "2"))  # rajada = taxa × segundos
+WAITING_ROOM_MAX_ACTIVE = int(os.getenv("WAITING_ROOM_MAX_ACTIVE", "30"))  # liberadas sem pedido ainda
+WAITING_ROOM_ADMIT_TTL = int(os.getenv("WAITING_ROOM_ADMIT_TTL", "120"))  # segundos para usar a liberação
+WAITING_ROOM_STALE_S = int(os.getenv("WAITING_ROOM_STALE_S", "30"))  # sem heartbeat: sai da fila
+WAITING_ROOM_TICK_MS = int(os.getenv("WAITING_ROOM_TICK_MS", "500"))
+WAITING_ROOM_PUSH_INTERVAL = float(os.getenv("WAITING_ROOM_PUSH_INTERVAL", "2"))
+
+# Presença por WebSocket (apps.orders.presence): lease de cada processo com sessões conectadas
+PRESENCE_PROCESS_TTL = int(os.getenv("PRESENCE_PROCESS_TTL", "60"))
+
+# Long-poll do status do pedido (GET /api/orders/<id>/watch); abaixo do proxy_read_timeout do nginx (60 s)
+ORDER_STATUS_WAIT_S = float(os.getenv("ORDER_STATUS_WAIT_S", "25"))
+ORDER_STATUS_FALLBACK_S = float(os.getenv("ORDER_STATUS_FALLBACK_S", "4"))
+
+# Limpeza periódica (apps.orders.housekeeping, comando housekeeping)
+TOKEN_PURGE_BATCH = int(os.getenv("TOKEN_PURGE_BATCH", "500"))
+# tokens expirados continuam até saírem da janela do histórico de métricas (12 h)
+TOKEN_PURGE_GRACE_MINUTES = int(os.getenv("TOKEN_PURGE_GRACE_MINUTES", "720"))
+HOUSEKEEPING_INTERVAL = int(os.getenv("HOUSEKEEPING_INTERVAL", "300"))  # segundos
+
+# Aquecimento do worker no lifespan do ASGI e prontidão em /readyz (apps.orders.warmup)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "True") == "True"
+WARMUP_TIMEOUT_S = float(os.getenv("WARMUP_TIMEOUT_S", "20"))  # depois disso o worker atende mesmo frio
+WARMUP_RETRY_S = float(os.getenv("WARMUP_RETRY_S", "5"))  # /readyz refaz passos que falharam
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "4"))  # conexões abertas no pool por worker
 
 # FTPS export (CSV upload)
 FTPS_HOST = os.getenv("FTPS_HOST", "")
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
@@ -17,10 +18,22 @@ from apps.orders.views import (
     admin_routes,
     admin_metrics,
     admin_metrics_history,
+    admin_profiling,
     admin_reset_sales,
+    admin_events,
+    admin_waiting_room,
+    waiting_room_enter,
+    waiting_room_status,
+    admin_stage_analytics,
+    production_board_view,
+    bulk_status_view,
+    stock_overview_view,
+    bulk_stock_view,
+    catalog_import_view,
     register_presence,
     DashboardUserViewSet,
 )
+from apps.orders import async_views
 
 router = DefaultRouter()
 router.register("items", ItemView, basename="items")
@@ -28,13 +41,32 @@ router.register("orders", PedidoView, basename="orders")
 router.register("category-order", CategoryOrderView, basename="category-order")
 router.register("admin/users", DashboardUserViewSet, basename="dashboard-users")
 
+# Precisam vir antes do router: atendem GET (e o POST de presença) de forma
+# async e repassam os outros métodos para as views DRF.
+async_read_paths = [
+    path("api/items/", async_views.items_list),
+    path("api/orders/<str:pk>/", async_views.order_detail),
+    path("api/categories", async_views.categories),
+    path("api/presence", async_views.presence),
+] if settings.ASYNC_READ_VIEWS else []
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # antes de api/orders/<pk>/ (async) e do router
+    path("api/orders/board", production_board_view),
+    path("api/orders/bulk-status", bulk_status_view),
+    path("api/items/stock", stock_overview_view),
+    path("api/items/bulk-stock", bulk_stock_view),
+    path("api/items/import", catalog_import_view),
+    path("api/orders/<int:pk>/watch", async_views.order_watch),
+    *async_read_paths,
     path("api/", include(router.urls)),
     path("api/payments/preference", criar_preference_view),
     path("api/payments/webhook", webhook_mp),
     path("api/payments/sync", sync_payment),
     path("api/payments/pix", create_pix_payment),
+    path("api/waiting-room", waiting_room_enter),
+    path("api/waiting-room/<str:ticket>", waiting_room_status),
     path("api/categories", categories_view),
     path("api/admin/auth/login", admin_login),
     path("api/admin/auth/logout", admin_logout),
@@ -42,7 +74,12 @@ urlpatterns = [
     path("api/admin/routes", admin_routes),
     path("api/admin/metrics", admin_metrics),
     path("api/admin/metrics/history", admin_metrics_history),
+    path("api/admin/profiling", admin_profiling),
+    path("api/admin/analytics/stages", admin_stage_analytics),
     path("api/admin/reset-sales", admin_reset_sales),
+    path("api/admin/events", admin_events),
+    path("api/admin/waiting-room", admin_waiting_room),
     path("api/presence", register_presence),
     path("healthz", lambda r: JsonResponse({"ok": True})),
+    path("readyz", async_views.readiness),
 ]
@@ -1,7 +1,56 @@
 #!/usr/bin/env bash
 set -e
 
-python manage.py migrate --noinput
-python manage.py collectstatic --noinput
+# migrate e collectstatic só rodam quando algo que os afeta mudou desde a
+# última execução bem-sucedida (hash gravado em STARTUP_STAMP_DIR). O carimbo
+# fica no sistema de arquivos do container: um restart pula os dois passos,
+# um container novo roda de novo. FORCE_STARTUP_TASKS=True ignora os carimbos
+# (ex.: banco recriado com o mesmo container).
+#
+#   ./entrypoint.sh          passos de inicialização + gunicorn (gunicorn.conf.py)
+#   ./entrypoint.sh build    só o collectstatic, no build da imagem
+#   ./entrypoint.sh tasks    só os passos de inicialização, sem subir o servidor
 
-exec gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000 --timeout 120 --workers 3
+STAMP_DIR="${STARTUP_STAMP_DIR:-/app/.startup}"
+mkdir -p "$STAMP_DIR"
+
+fingerprint() {
+  # hash do conteúdo dos arquivos passados + texto extra (1º argumento)
+  local extra="$1"
+  shift
+  {
+    echo "$extra"
+    find "$@" -type f ! -name '*.pyc' -print0 2>/dev/null | sort -z | xargs -0 -r sha1sum
+  } | sha1sum | cut -d' ' -f1
+}
+
+run_step() {
+  local name="$1" hash="$2"
+  shift 2
+  if [ "${FORCE_STARTUP_TASKS:-False}" != "True" ] && [ "$(cat "$STAMP_DIR/$name" 2>/dev/null)" = "$hash" ]; then
+    echo "[entrypoint] $name: nada mudou, pulando"
+    return
+  fi
+  local started=$SECONDS
+  "$@"
+  echo "$hash" > "$STAMP_DIR/$name"
+  echo "[entrypoint] $name: $((SECONDS - started))s"
+}
+
+# estáticos vêm dos pacotes (admin, DRF) e de pastas static/ dos apps
+STATIC_HASH=$(fingerprint static requirements.txt $(find apps -type d -name static 2>/dev/null))
+run_step collectstatic "$STATIC_HASH" python manage.py collectstatic --noinput
+
+if [ "$1" = "build" ]; then
+  exit 0
+fi
+
+# migrações do projeto e dos pacotes (versões fixas no requirements) + banco de destino
+MIGRATE_HASH=$(fingerprint "${MYSQL_DATABASE}@db" requirements.txt $(find apps -type d -name migrations))
+run_step migrate "$MIGRATE_HASH" python manage.py migrate --noinput
+
+if [ "$1" = "tasks" ]; then
+  exit 0
+fi
+
+exec gunicorn core.asgi:application -c gunicorn.conf.py
@@ -0,0 +1,28 @@
+"""Configuração do gunicorn usada pelo entrypoint.sh.
+
+Com GUNICORN_PRELOAD=True (padrão) o app é importado uma vez no master antes
+do fork: Django, DRF, channels, models, URLs e views já chegam carregados nos
+workers e as páginas de memória ficam compartilhadas (copy-on-write). O que
+guarda conexão ou thread por processo (pool do banco, cache_bus, clientes
+async do Redis) já se recria ao detectar o pid novo.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "3"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    # get_asgi_application() só faz o setup; URLs e views entram no preload também
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    # nada aberto no master pode ser herdado pelos workers
+    from django.db import connections
+
+    connections.close_all()
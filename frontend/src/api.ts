@@ -8,10 +8,16 @@ export const setAuthToken = (token: string | null) => {
   authToken = token;
 };
 
+// mesmo id do heartbeat de presença (hooks/useClientPresence); o backend usa na cota por sessão
+const CLIENT_SESSION_STORAGE_KEY = "client-presence-id-v1";
+
 api.interceptors.request.use((config) => {
+  config.headers = config.headers ?? {};
   if (authToken) {
-    config.headers = config.headers ?? {};
     config.headers.Authorization = `Bearer ${authToken}`;
+  } else if (typeof window !== "undefined") {
+    const sessionId = window.localStorage.getItem(CLIENT_SESSION_STORAGE_KEY);
+    if (sessionId) config.headers["X-Session-Id"] = sessionId;
   }
   return config;
 });
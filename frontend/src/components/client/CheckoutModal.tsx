@@ -6,6 +6,8 @@ import { useToast } from "../../store/toast";
 import { useCart, useCartTotals } from "../../store/cart";
 import { useOrders } from "../../store/orders";
 import { api } from "../../api";
+import { waitForCheckoutTurn } from "../../utils/waitingRoom";
+import { watchOrderStatus } from "../../utils/orderStatus";
 
 type Props = { open: boolean; onClose: () => void };
 type Step = 1 | 2 | 3;
@@ -40,6 +42,7 @@ export default function CheckoutModal({ open, onClose }: Props) {
   const [pixQR, setPixQR] = useState<string | undefined>();
   const [pixCode, setPixCode] = useState<string | undefined>();
   const [loading, setLoading] = useState(false);
+  const [queuePosition, setQueuePosition] = useState<number | undefined>();
   const addOrderRef = useOrders((s) => s.addOrder);
   const pushToast = useToast((s) => s.push);
   const [verifying, setVerifying] = useState(false);
@@ -67,6 +70,7 @@ export default function CheckoutModal({ open, onClose }: Props) {
     setPixQR(undefined);
     setPixCode(undefined);
     setLoading(false);
+    setQueuePosition(undefined);
     setVerifying(false);
     setCopied(false);
     setOrderInfo({});
@@ -112,7 +116,9 @@ export default function CheckoutModal({ open, onClose }: Props) {
         observacoes: obs,
         precisa_embalagem: precisaEmbalagem,
       };
-      const p = await api.post("/orders/", payload);
+      const ticket = await waitForCheckoutTurn(setQueuePosition);
+      setQueuePosition(undefined);
+      const p = await api.post("/orders/", payload, ticket ? { headers: { "X-Waiting-Ticket": ticket } } : undefined);
       setPedidoId(p.data.id);
       const precisaFromResponse = p.data?.precisa_embalagem;
       const precisaNormalizada = typeof precisaFromResponse === "undefined" ? precisaEmbalagem : parseBoolean(precisaFromResponse);
@@ -140,7 +146,11 @@ export default function CheckoutModal({ open, onClose }: Props) {
         console.error("Erro ao criar PIX", err);
       }
       setStep(2);
+    } catch (e: any) {
+      const detail = e?.response?.data?.detail || e?.message;
+      pushToast({ type: "error", message: detail ? String(detail) : "Não foi possível criar o pedido." });
     } finally {
+      setQueuePosition(undefined);
       setLoading(false);
     }
   };
@@ -174,41 +184,34 @@ export default function CheckoutModal({ open, onClose }: Props) {
   useEffect(() => {
     if (step !== 2 || !pedidoId) return;
     let mounted = true;
-    let tries = 0;
-    const tick = async () => {
+    // status chega pelo long-poll; a sincronização com o Mercado Pago cobre webhooks atrasados
+    const stopWatching = watchOrderStatus(pedidoId, (state) => {
+      if (!mounted || (state.status !== "pago" && !state.paid_at)) return;
+      setStep(3);
+      clear();
+      setPrecisaEmbalagem(false);
+    });
+    let syncs = 0;
+    const sync = async () => {
       if (!mounted) return;
       try {
-        if (tries % 3 === 0) {
-          try {
-            await api.post(`/payments/sync`, { pedido_id: pedidoId });
-          } catch (err) {
-            console.warn('Falha ao sincronizar pagamento automaticamente', err);
-          }
-        }
-        const r = await api.get(`/orders/${pedidoId}/`);
-        if (r.data?.status === "pago") {
-          setStep(3);
-          clear();
-          setPrecisaEmbalagem(false);
-          setOrderInfo((prev) => ({ ...prev, precisa_embalagem: parseBoolean(r.data?.precisa_embalagem) }));
-          return;
-        }
-        tries += 1;
-        if (tries < 45) setTimeout(tick, 4000);
+        await api.post(`/payments/sync`, { pedido_id: pedidoId });
       } catch (err) {
-        console.warn('Falha ao consultar status do pedido', err);
-        tries += 1;
-        if (tries < 45) setTimeout(tick, 6000);
+        console.warn('Falha ao sincronizar pagamento automaticamente', err);
       }
+      syncs += 1;
+      if (mounted && syncs < 15) syncTimer = setTimeout(sync, 12000);
     };
+    let syncTimer = setTimeout(sync, 4000);
     const onVis = () => {
       if (document.visibilityState === "visible") confirmPaid();
     };
     window.addEventListener("visibilitychange", onVis);
     window.addEventListener("focus", onVis);
-    setTimeout(tick, 4000);
     return () => {
       mounted = false;
+      stopWatching();
+      clearTimeout(syncTimer);
       window.removeEventListener("visibilitychange", onVis);
       window.removeEventListener("focus", onVis);
     };
@@ -357,7 +360,11 @@ export default function CheckoutModal({ open, onClose }: Props) {
                       </div>
                       {summaryItems}
                       <div className="flex flex-col gap-2 md:flex-row md:items-center md:justify-between">
-                        <p className="text-sm text-slate-600">Revise seus dados antes de continuar.</p>
+                        <p className="text-sm text-slate-600" aria-live="polite">
+                          {queuePosition
+                            ? `Muita gente pedindo agora: você é o ${queuePosition}º da fila. Não feche esta tela.`
+                            : "Revise seus dados antes de continuar."}
+                        </p>
                         <button
                           type="button"
                           className="btn btn-primary min-h-[48px] md:min-w-[180px]"
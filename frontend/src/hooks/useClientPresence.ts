@@ -7,6 +7,9 @@ const STORAGE_MAP: Record<string, string> = {
 };
 
 const HEARTBEAT_MS = 30_000;
+const PING_MS = 25_000;
+const RECONNECT_MS = 15_000;
+const SOCKET_GRACE_MS = 5_000;
 
 function ensureSessionId(source: "client" | "admin"): string {
   if (typeof window === "undefined") return "";
@@ -37,18 +40,55 @@ async function sendPresence(sessionId: string, source: "client" | "admin") {
   }
 }
 
+function presenceSocketUrl(sessionId: string, source: "client" | "admin") {
+  const host = window.location.hostname + (window.location.port === "5173" ? ":8000" : "");
+  const wsProto = window.location.protocol === "https:" ? "wss" : "ws";
+  const query = new URLSearchParams({ session_id: sessionId, source });
+  return `${wsProto}://${host}/ws/presence?${query.toString()}`;
+}
+
+// Presença pela conexão WebSocket (entra no connect, sai ao fechar); enquanto
+// o socket não estiver aberto, o heartbeat HTTP assume.
 export function usePresence(source: "client" | "admin", enabled = true) {
   useEffect(() => {
     if (!enabled || typeof window === "undefined") return;
     const sessionId = ensureSessionId(source);
     let stopped = false;
+    let socket: WebSocket | null = null;
+    let socketOpen = false;
+    let pingTimer: number | undefined;
+    let reconnectTimer: number | undefined;
 
     const heartbeat = () => {
-      if (stopped) return;
+      if (stopped || socketOpen) return;
       void sendPresence(sessionId, source);
     };
 
-    heartbeat();
+    const connect = () => {
+      if (stopped || typeof WebSocket === "undefined") return;
+      try {
+        socket = new WebSocket(presenceSocketUrl(sessionId, source));
+      } catch {
+        return;
+      }
+      socket.onopen = () => {
+        socketOpen = true;
+        // mantém a conexão viva nos proxies; o servidor só responde, sem gravar nada
+        pingTimer = window.setInterval(() => socket?.send(JSON.stringify({ type: "ping" })), PING_MS);
+      };
+      socket.onclose = () => {
+        const wasOpen = socketOpen;
+        socketOpen = false;
+        window.clearInterval(pingTimer);
+        if (stopped) return;
+        if (wasOpen) heartbeat();
+        reconnectTimer = window.setTimeout(connect, RECONNECT_MS);
+      };
+    };
+
+    connect();
+    // dá tempo do socket abrir antes de cair no heartbeat HTTP
+    const firstBeat = window.setTimeout(heartbeat, socket ? SOCKET_GRACE_MS : 0);
     const interval = window.setInterval(heartbeat, HEARTBEAT_MS);
 
     const handleVisibility = () => {
@@ -62,6 +102,10 @@ export function usePresence(source: "client" | "admin", enabled = true) {
     return () => {
       stopped = true;
       window.clearInterval(interval);
+      window.clearInterval(pingTimer);
+      window.clearTimeout(reconnectTimer);
+      window.clearTimeout(firstBeat);
+      socket?.close();
       document.removeEventListener("visibilitychange", handleVisibility);
     };
   }, [enabled, source]);
@@ -706,9 +706,9 @@ export function ConfigResetPage() {
       const response = await api.post("/admin/reset-sales", { confirm });
       return response.data as {
         ok: boolean;
-        orders_deleted: number;
-        payments_deleted: number;
-        status_logs_deleted: number;
+        closed_event: { id: number; nome: string } | null;
+        new_event: { id: number; nome: string };
+        orders_to_archive: number;
         items_reset: number;
       };
     },
@@ -835,13 +835,13 @@ export function ConfigResetPage() {
             <div className="font-semibold text-slate-800">Resumo da limpeza executada</div>
             <ul className="mt-2 space-y-1">
               <li>
-                Pedidos removidos: <strong>{result.orders_deleted}</strong>
+                Evento encerrado: <strong>{result.closed_event?.nome ?? "—"}</strong>
               </li>
               <li>
-                Pagamentos removidos: <strong>{result.payments_deleted}</strong>
+                Novo evento: <strong>{result.new_event.nome}</strong>
               </li>
               <li>
-                Logs de status apagados: <strong>{result.status_logs_deleted}</strong>
+                Pedidos enviados para o arquivo: <strong>{result.orders_to_archive}</strong>
               </li>
               <li>
                 Itens com contador zerado: <strong>{result.items_reset}</strong>
@@ -1,92 +1,92 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { api } from "../api";
 
-type Item = {
+type StockItem = {
   id: number;
   nome: string;
   categoria?: string;
   estoque_inicial: number;
   vendidos: number;
+  pendentes: number;
+  disponivel: number;
 };
 
-const DEFAULT_CATEGORY_PRIORITY: Record<string, number> = {
-  hamburguer: 0,
-  drink: 1,
-  bebidas: 2,
+type StockCategory = {
+  nome: string;
+  estoque_inicial: number;
+  vendidos: number;
+  pendentes: number;
+  disponivel: number;
+  itens: StockItem[];
 };
 
+// cliques seguidos em +1/-1 saem juntos numa só requisição
+const SAVE_DELAY_MS = 600;
+
 export default function AdminEstoque(){
-  const [items,setItems]=useState<Item[]>([]);
-  const [orders,setOrders]=useState<any[]>([]);
+  const [categorias,setCategorias]=useState<StockCategory[]>([]);
   const [loading,setLoading]=useState(true);
-  const [categoryOrderMap,setCategoryOrderMap] = useState<Record<string, number>>({});
-  const carregar = async ()=>{
-    setLoading(true);
+  const [edits,setEdits]=useState<Record<number, number>>({});
+  const editsRef = useRef<Record<number, number>>({});
+  const timer = useRef<number | null>(null);
+
+  const carregar = async (showLoading = true)=>{
+    if(showLoading) setLoading(true);
     try{
-      const [ri, ro, rc] = await Promise.all([
-        api.get("/items/?all=1&limit=1000"),
-        api.get("/orders/?limit=1000"),
-        api.get("/category-order/"),
-      ]);
-      const arr = (ri.data?.results || ri.data || []) as Item[];
-      setItems(Array.isArray(arr)?arr:[]);
-      const ord = (ro.data?.results || ro.data || []) as any[];
-      setOrders(Array.isArray(ord)?ord:[]);
-      const cats = rc.data?.results || rc.data || [];
-      const map: Record<string, number> = {};
-      (Array.isArray(cats)?cats:[]).forEach((co:any)=>{
-        if(!co) return;
-        const key = String(co.nome || "").toLowerCase();
-        if(key) map[key] = Number(co.ordem ?? 0);
-      });
-      setCategoryOrderMap(map);
+      const { data } = await api.get("/items/stock");
+      setCategorias(Array.isArray(data?.categorias) ? data.categorias : []);
     } finally{ setLoading(false); }
   };
-  useEffect(()=>{ carregar(); },[]);
+  useEffect(()=>{
+    carregar();
+    return ()=>{ if(timer.current) window.clearTimeout(timer.current); };
+  },[]);
 
-  const groups = useMemo(()=>{
-    const map: Record<string, Item[]> = {};
-    items.forEach(it=>{ const c = it.categoria || "Outros"; (map[c] ||= []).push(it); });
-    const score = (c:string)=>{
-      const key = (c || "Outros").toLowerCase();
-      return categoryOrderMap[key] ?? DEFAULT_CATEGORY_PRIORITY[key] ?? 999;
-    };
-    const cats = Object.keys(map).sort((a,b)=> score(a)-score(b) || a.localeCompare(b));
-    return { cats, map };
-  },[items, categoryOrderMap]);
-
-  const vendidosMap = useMemo(()=>{
-    const paid = (orders||[]).filter((o:any)=> o.status==='pago' || !!o.paid_at);
-    const m: Record<number, number> = {};
-    paid.forEach((o:any)=> (o.itens||[]).forEach((i:any)=>{
-      const id = Number(i.item);
-      if(!id) return;
-      m[id] = (m[id]||0) + Number(i.qtd||0);
-    }));
-    return m;
-  },[orders]);
+  const salvar = async ()=>{
+    timer.current = null;
+    const pendentes = editsRef.current;
+    const changes = Object.entries(pendentes).map(([id, estoque])=>({ id: Number(id), estoque_inicial: estoque }));
+    if(!changes.length) return;
+    try{
+      await api.post("/items/bulk-stock", { changes });
+    } finally{
+      // edições feitas durante o envio continuam pendentes
+      const restantes = { ...editsRef.current };
+      changes.forEach(c=>{ if(restantes[c.id] === c.estoque_inicial) delete restantes[c.id]; });
+      editsRef.current = restantes;
+      setEdits(restantes);
+      await carregar(false);
+    }
+  };
 
-  const ajustar = async (it: Item, delta: number)=>{
-    const novo = Math.max(0, (it.estoque_inicial||0) + delta);
-    await api.patch(`/items/${it.id}/`, { estoque_inicial: novo });
-    await carregar();
+  const ajustar = (it: StockItem, delta: number)=>{
+    const atual = editsRef.current[it.id] ?? it.estoque_inicial ?? 0;
+    const next = { ...editsRef.current, [it.id]: Math.max(0, atual + delta) };
+    editsRef.current = next;
+    setEdits(next);
+    if(timer.current) window.clearTimeout(timer.current);
+    timer.current = window.setTimeout(salvar, SAVE_DELAY_MS);
   };
 
   return (
     <div className="flex flex-col gap-4">
       <div className="flex items-center justify-between">
         <div className="text-2xl font-black">Estoque</div>
-        <button className="btn btn-ghost" onClick={carregar}>Atualizar</button>
+        <button className="btn btn-ghost" onClick={()=>carregar()}>Atualizar</button>
       </div>
       {loading && <div className="card">Carregando...</div>}
-      {!loading && groups.cats.map(cat=> (
-        <div key={cat} className="card">
-          <div className="font-black mb-2">{cat}</div>
+      {!loading && categorias.map(cat=> (
+        <div key={cat.nome} className="card">
+          <div className="flex items-center justify-between mb-2">
+            <div className="font-black">{cat.nome}</div>
+            <div className="text-xs text-slate-600 whitespace-nowrap">
+              {cat.disponivel}/{cat.estoque_inicial} un · vendidos {cat.vendidos} · aguardando {cat.pendentes}
+            </div>
+          </div>
           <div className="grid grid-cols-1 md:grid-cols-2 gap-3">
-            {(groups.map[cat]||[]).map(it=>{
-              const vendidosCalc = vendidosMap[it.id] ?? it.vendidos ?? 0;
-              const disponivel = Math.max((it.estoque_inicial||0) - vendidosCalc, 0);
-              const total = Math.max(it.estoque_inicial||0, 0);
+            {cat.itens.map(it=>{
+              const total = Math.max(edits[it.id] ?? it.estoque_inicial ?? 0, 0);
+              const disponivel = Math.max(total - (it.vendidos||0), 0);
               const pct = total>0 ? Math.round((disponivel/total)*100) : 0;
               const barColor = pct<=20 ? "bg-rose-500" : pct<=50 ? "bg-amber-500" : "bg-brand-primary";
               return (
@@ -99,7 +99,8 @@ export default function AdminEstoque(){
                     <div className={`h-full ${barColor}`} style={{ width: `${pct}%` }}></div>
                   </div>
                   <div className="flex items-center justify-between text-xs text-slate-600">
-                    <span>Vendidos: <b>{vendidosCalc}</b></span>
+                    <span>Vendidos: <b>{it.vendidos}</b></span>
+                    <span>Aguardando pagamento: <b>{it.pendentes}</b></span>
                     <span>Disponível: <b>{pct}%</b></span>
                   </div>
                   <div className="flex items-center justify-end gap-2">
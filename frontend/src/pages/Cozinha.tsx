@@ -18,15 +18,13 @@ export default function Cozinha(){
   const [mostrarResumoItens, setMostrarResumoItens] = useState(false);
 
   const carregar = async ()=>{
-    const [orders, items] = await Promise.all([
-      api.get("/orders/?limit=500&ordering=created_at"),
-      api.get("/items/?all=1"),
-    ]);
-    const arr = orders.data?.results || orders.data || [];
-    setDados(Array.isArray(arr) ? arr : []);
+    // quadro de produção montado no servidor (filas por status, itens já com categoria)
+    const board = await api.get("/orders/board");
+    const queues = board.data?.queues || {};
+    const arr = Object.values(queues).flat() as any[];
+    setDados(arr);
     const map:Record<number,{categoria?:string}> = {};
-    const itemArr = items.data?.results || items.data || [];
-    (Array.isArray(itemArr)? itemArr : []).forEach((it:any)=>{ map[it.id] = {categoria: it.categoria}; });
+    arr.forEach((pedido:any)=> (pedido.itens || []).forEach((it:any)=>{ map[it.item] = {categoria: it.categoria}; }));
     setItemsMap(map);
   }
   useEffect(()=>{
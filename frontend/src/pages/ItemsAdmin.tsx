@@ -108,6 +108,27 @@ export default function ItemsAdmin(){
     } finally{ setLoading(false); }
   };
 
+  // arquivo inteiro em uma requisição (POST /items/import): primeiro valida, depois grava
+  const importar = async (file: File)=>{
+    const enviar = (dryRun: boolean)=>{
+      const body = new FormData();
+      body.append("file", file);
+      return api.post(`/items/import?dry_run=${dryRun ? 1 : 0}`, body);
+    };
+    setLoading(true);
+    try{
+      const { data } = await enviar(true);
+      const resumo = `${data.created.length} novos, ${data.updated.length} alterados, ${data.unchanged.length} sem mudança`;
+      if(!confirm(`Importar ${file.name}? ${resumo}.`)) return;
+      await enviar(false);
+      await carregar();
+    } catch(e:any){
+      const data = e?.response?.data;
+      const erros = (data?.errors || []).slice(0, 10).map((err:any)=> `linha ${err.linha}: ${err.campo} - ${err.erro}`);
+      alert(data?.detail || (erros.length ? `Nada foi importado:\n${erros.join("\n")}` : "Erro ao importar"));
+    } finally{ setLoading(false); }
+  };
+
   const remover = async (id:number)=>{
     if(!confirm("Excluir este item?")) return;
     await api.delete(`/items/${id}/`);
@@ -228,6 +249,11 @@ export default function ItemsAdmin(){
             <option value="">Todas as categorias</option>
             {categories.map(c=> <option key={c} value={c}>{c}</option>)}
           </select>
+          <label className={`btn btn-ghost ${loading ? "opacity-50 pointer-events-none" : "cursor-pointer"}`} title="CSV ou JSON com sku, nome, preco, categoria...">
+            Importar CSV/JSON
+            <input type="file" accept=".csv,.json,text/csv,application/json" className="hidden"
+              onChange={e=>{ const f = e.target.files?.[0]; e.target.value = ""; if(f) importar(f); }} />
+          </label>
           <button className="btn btn-ghost" onClick={carregar}>Atualizar</button>
         </div>
       </div>
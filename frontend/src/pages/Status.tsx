@@ -2,6 +2,7 @@ import { useEffect, useState } from "react";
 import { useParams, Link } from "react-router-dom";
 import { api } from "../api";
 import { useClientPresence } from "../hooks/useClientPresence";
+import { watchOrderStatus } from "../utils/orderStatus";
 
 // Jornada simplificada para o cliente
 const STEPS = [
@@ -27,7 +28,12 @@ export default function Status(){
     } finally{ setLoading(false); }
   };
 
-  useEffect(()=>{ carregar(); const t = setInterval(carregar, 4000); return ()=>clearInterval(t); },[id]);
+  // pedido completo uma vez; depois só o status resumido, quando mudar
+  useEffect(()=>{
+    carregar();
+    if(!id) return;
+    return watchOrderStatus(id, (s)=> setPedido((prev:any)=> prev ? { ...prev, status: s.status, paid_at: s.paid_at } : prev));
+  },[id]);
 
   if(loading && !pedido) return <div className="card">Carregando...</div>;
   if(!pedido) return <div className="card">Pedido não encontrado. <Link to="/cliente/pedidos" className="btn btn-ghost ml-2">Voltar</Link></div>;
@@ -85,7 +91,7 @@ export default function Status(){
         </ul>
       </div>
       <div className="text-sm text-slate-600">
-        Esta página atualiza automaticamente a cada alguns segundos.
+        Esta página atualiza automaticamente quando o status do pedido muda.
       </div>
     </div>
   );
@@ -0,0 +1,52 @@
+import { api } from "../api";
+
+export type OrderStatus = {
+  id: number;
+  status: string;
+  paid_at: string | null;
+  pagamento: string | null;
+  v: string;
+};
+
+const WAIT_S = 25;
+const RETRY_MS = 4000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Acompanha o status do pedido por long-poll (`/orders/<id>/watch`): o backend
+ * só responde quando algo muda, então não há consulta do pedido inteiro a cada
+ * poucos segundos. Chama `onChange` a cada versão nova; devolve a função que para.
+ */
+export function watchOrderStatus(id: string | number, onChange: (status: OrderStatus) => void): () => void {
+  let stopped = false;
+  const controller = new AbortController();
+
+  const loop = async () => {
+    let since = "";
+    while (!stopped) {
+      try {
+        const { data } = await api.get<OrderStatus>(`/orders/${id}/watch`, {
+          params: { since, timeout: WAIT_S },
+          signal: controller.signal,
+          timeout: (WAIT_S + 15) * 1000,
+        });
+        if (stopped) return;
+        if (data.v !== since) {
+          since = data.v;
+          onChange(data);
+        }
+      } catch (err: any) {
+        if (stopped) return;
+        if (err?.response?.status === 404) return;
+        await sleep(RETRY_MS);
+      }
+    }
+  };
+  void loop();
+
+  return () => {
+    stopped = true;
+    controller.abort();
+  };
+}
@@ -0,0 +1,75 @@
+import { api } from "../api";
+
+type WaitingState = { status: "admitted" | "waiting" | "unknown"; position?: number; expires_in?: number };
+
+const POLL_MS = 3000;
+
+function wsUrl(ticket: string) {
+  const host = window.location.hostname + (window.location.port === "5173" ? ":8000" : "");
+  const wsProto = window.location.protocol === "https:" ? "wss" : "ws";
+  return `${wsProto}://${host}/ws/waiting-room/${encodeURIComponent(ticket)}`;
+}
+
+// Sem WebSocket (proxy/rede bloqueando), consulta a posição por HTTP.
+function pollUntilAdmitted(ticket: string, onPosition: (position: number) => void): Promise<WaitingState> {
+  return new Promise((resolve) => {
+    const tick = async () => {
+      try {
+        const { data } = await api.get<WaitingState>(`/waiting-room/${encodeURIComponent(ticket)}`);
+        if (data.status === "waiting") {
+          onPosition(data.position ?? 0);
+          setTimeout(tick, POLL_MS);
+          return;
+        }
+        resolve(data);
+      } catch {
+        setTimeout(tick, POLL_MS);
+      }
+    };
+    void tick();
+  });
+}
+
+function waitOverWebSocket(ticket: string, onPosition: (position: number) => void): Promise<WaitingState> {
+  return new Promise((resolve) => {
+    let settled = false;
+    const ws = new WebSocket(wsUrl(ticket));
+    ws.onmessage = (message) => {
+      try {
+        const data = JSON.parse(message.data) as WaitingState;
+        if (data.status === "waiting") {
+          onPosition(data.position ?? 0);
+          return;
+        }
+        settled = true;
+        resolve(data);
+        ws.close();
+      } catch {
+        /* mensagem inválida: espera a próxima */
+      }
+    };
+    ws.onclose = () => {
+      if (!settled) {
+        settled = true;
+        void pollUntilAdmitted(ticket, onPosition).then(resolve);
+      }
+    };
+  });
+}
+
+/**
+ * Pega uma senha da sala de espera e espera a liberação.
+ * Devolve a senha para enviar em `X-Waiting-Ticket` (ou null com a sala desligada).
+ */
+export async function waitForCheckoutTurn(onPosition: (position: number) => void): Promise<string | null> {
+  const { data } = await api.post<WaitingState & { enabled: boolean; ticket: string | null }>("/waiting-room");
+  if (!data.enabled || !data.ticket) return null;
+  if (data.status === "admitted") return data.ticket;
+  onPosition(data.position ?? 0);
+  const final = await waitOverWebSocket(data.ticket, onPosition);
+  if (final.status !== "admitted") {
+    // senha expirou (aba em segundo plano): entra de novo no fim da fila
+    return waitForCheckoutTurn(onPosition);
+  }
+  return data.ticket;
+}